@@ -0,0 +1,74 @@
+"""LineDiffとdifflibの速度比較
+
+使い方: python scripts/python/bench_line_diff.py [行数]
+"""
+
+import difflib
+import random
+import sys
+import time
+
+from zoltraak.utils.diff_util import DiffUtil
+from zoltraak.utils.line_diff import LineDiff
+
+
+def create_document(line_count: int, seed: int) -> list[str]:
+    rand = random.Random(seed)  # noqa: S311
+    words = ["zoltraak", "grimoire", "layer", "要件", "定義", "コード", "生成", "def", "return", "class"]
+    return [f"{i % 50} " + " ".join(rand.choice(words) for _ in range(8)) for i in range(line_count)]
+
+
+def mutate(lines: list[str], ratio: float, seed: int) -> list[str]:
+    rand = random.Random(seed)  # noqa: S311
+    mutated = []
+    for line in lines:
+        r = rand.random()
+        if r < ratio / 3:
+            continue  # 削除
+        if r < ratio * 2 / 3:
+            mutated.append(line + " changed")  # 変更
+        else:
+            mutated.append(line)
+        if rand.random() < ratio / 3:
+            mutated.append("inserted " + line)  # 挿入
+    return mutated
+
+
+def measure(name: str, func) -> float:
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<40} {elapsed * 1000:10.2f} ms  (len={len(result) if isinstance(result, str) else result})")
+    return elapsed
+
+
+def main() -> None:
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    base = create_document(line_count, seed=0)
+    cases = {
+        "同一": base,
+        "変更1%": mutate(base, 0.01, seed=1),
+        "変更10%": mutate(base, 0.10, seed=2),
+        "別文書": create_document(line_count, seed=3),
+    }
+    # 同じ行が多い文書(difflibはautojunkにより冗長なdiffになる)
+    rand = random.Random(4)  # noqa: S311
+    repeated = [f"line{rand.randint(0, 20)}" for _ in range(line_count)]
+    repeated_other = list(repeated)
+    for _ in range(line_count // 30):
+        repeated_other[rand.randrange(line_count)] = f"line{rand.randint(0, 20)}"
+    for case_name, other in cases.items():
+        print(f"{line_count}行 {case_name}")
+        measure("difflib.unified_diff(n=0)", lambda o=other: "\n".join(difflib.unified_diff(base, o, lineterm="", n=0)))
+        measure("LineDiff.unified_diff0", lambda o=other: LineDiff.unified_diff0(base, o))
+        text1, text2 = "\n".join(base), "\n".join(other)
+        measure("DiffUtil.is_same_ignore_space", lambda t1=text1, t2=text2: DiffUtil.is_same_ignore_space(t1, t2))
+    print(f"{line_count}行 重複行が多い")
+    measure(
+        "difflib.unified_diff(n=0)", lambda: "\n".join(difflib.unified_diff(repeated, repeated_other, lineterm="", n=0))
+    )
+    measure("LineDiff.unified_diff0", lambda: LineDiff.unified_diff0(repeated, repeated_other))
+
+
+if __name__ == "__main__":
+    main()
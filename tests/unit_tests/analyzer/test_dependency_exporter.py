@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import networkx as nx
+
+from zoltraak.analyzer.dependency_map.dependency_exporter import DependencyExporter, DependencyExportFormat
+
+
+class TestDependencyExporter(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.a, self.b, self.c, self.d = (self.root / f"pkg/{name}.py" for name in "abcd")
+        self.nx_graph = nx.DiGraph([(self.a, self.b), (self.b, self.c), (self.c, self.d)])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_export_text_formats(self):
+        dot_path = DependencyExporter.export(self.nx_graph, str(self.root / "out/graph.dot"), self.root)
+        with open(dot_path, encoding="utf-8") as f:
+            dot = f.read()
+        self.assertIn(f'"{self.a}" -> "{self.b}";', dot)
+        self.assertIn('[label="pkg/a.py"]', dot)
+
+        json_path = DependencyExporter.export(self.nx_graph, str(self.root / "out/graph.json"), self.root)
+        with open(json_path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual(data["nodes"], ["pkg/a.py", "pkg/b.py", "pkg/c.py", "pkg/d.py"])
+        self.assertEqual(data["edges"]["pkg/b.py"], ["pkg/c.py"])
+
+        mermaid = DependencyExporter.to_mermaid(self.nx_graph, self.root)
+        self.assertIn('n0["pkg/a.py"]', mermaid)
+        self.assertIn("n0 --> n1", mermaid)
+        self.assertTrue(os.path.isfile(dot_path))
+
+    def test_get_focus_graph(self):
+        focus_graph = DependencyExporter.get_focus_graph(self.nx_graph, self.b, radius=1)
+        self.assertEqual(set(focus_graph.nodes), {self.a, self.b, self.c})
+        self.assertTrue(focus_graph.has_edge(self.a, self.b))
+        self.assertIs(DependencyExporter.get_focus_graph(self.nx_graph, None), self.nx_graph)
+        self.assertEqual(
+            list(DependencyExporter.get_focus_graph(self.nx_graph, self.root / "x.py").nodes), [self.root / "x.py"]
+        )
+
+    def test_layout_args(self):
+        self.assertEqual(DependencyExporter.get_layout_args(10)[0], "dot")
+        self.assertEqual(DependencyExporter.get_layout_args(1000)[0], "sfdp")
+        self.assertIn("-Gdpi=72", DependencyExporter.get_layout_args(1000)[1])
+        self.assertTrue(DependencyExportFormat.from_path("graph.png").is_raster())
+        self.assertEqual(DependencyExportFormat.from_path("graph.md"), DependencyExportFormat.MERMAID)
+
+
+if __name__ == "__main__":
+    unittest.main()
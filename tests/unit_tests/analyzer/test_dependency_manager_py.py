@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from zoltraak.analyzer.dependency_map.python.dependency_index_py import parse_python_file
+from zoltraak.analyzer.dependency_map.python.dependency_manager_py import DependencyManagerPy
+
+DUMMY_FILES = {
+    "pkg/__init__.py": "",
+    "pkg/main.py": "import os\nimport pkg.util\nfrom pkg import model\nfrom .sub.helper import run\n",
+    "pkg/util.py": "def util():\n    return 1\n",
+    "pkg/model.py": "from .util import util\n",
+    "pkg/sub/__init__.py": "",
+    "pkg/sub/helper.py": "from ..model import *\n\n\ndef run():\n    pass\n",
+    "script.py": "import tool\n",
+    "tool.py": "def metadata():\n    return {'tags': {'cli'}, 'category': 'tool', 'description': 'ツール'}\n",
+}
+
+
+class TestDependencyManagerPy(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name) / "project"
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+        for rel_path, content in DUMMY_FILES.items():
+            file_path = self.root / rel_path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(content, encoding="utf-8")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_parse_python_file(self):
+        parsed = parse_python_file(str(self.root / "pkg/main.py"))
+        self.assertEqual(
+            parsed["imports"],
+            [["os", "", 0], ["pkg.util", "", 0], ["pkg", "model", 0], ["sub.helper", "run", 1]],
+        )
+        parsed = parse_python_file(str(self.root / "tool.py"))
+        self.assertEqual(parsed["metadata"], {"tags": ["cli"], "category": "tool", "description": "ツール"})
+
+    def test_scan_project_all_edges(self):
+        dm = DependencyManagerPy(self.root, self.cache_dir)
+        dm.scan_project()
+        main_path = self.root / "pkg/main.py"
+        self.assertEqual(
+            set(dm.nx_graph.successors(main_path)),
+            {self.root / "pkg/util.py", self.root / "pkg/model.py", self.root / "pkg/sub/helper.py"},
+        )
+        self.assertEqual(set(dm.nx_graph.successors(self.root / "pkg/sub/helper.py")), {self.root / "pkg/model.py"})
+        self.assertEqual(set(dm.nx_graph.successors(self.root / "script.py")), {self.root / "tool.py"})
+        self.assertEqual(dm.get_metadata(self.root / "tool.py").category, "tool")
+        self.assertIn(main_path, dm.get_metadata(self.root / "pkg/util.py").included_files)
+        self.assertEqual(
+            dm.find_affected_files(self.root / "pkg/util.py"),
+            {main_path, self.root / "pkg/model.py", self.root / "pkg/sub/helper.py"},
+        )
+
+    def test_scan_project_incremental(self):
+        dm = DependencyManagerPy(self.root, self.cache_dir)
+        self.assertEqual(len(dm.scan_project()), 6)
+        self.assertEqual(dm.scan_project(), [])
+
+        # インデックスは保存されているので新しいインスタンスでも再パースしない
+        dm = DependencyManagerPy(self.root, self.cache_dir)
+        self.assertEqual(dm.scan_project(), [])
+
+        helper_path = self.root / "pkg/sub/helper.py"
+        helper_path.write_text("from pkg.util import util\n", encoding="utf-8")
+        self.assertEqual(dm.scan_project(), [helper_path])
+        self.assertEqual(set(dm.nx_graph.successors(helper_path)), {self.root / "pkg/util.py"})
+
+        (self.root / "tool.py").unlink()
+        self.assertEqual(dm.scan_project(), [])
+        self.assertFalse(dm.nx_graph.has_node(self.root / "tool.py"))
+        self.assertEqual(set(dm.nx_graph.successors(self.root / "script.py")), set())
+
+    def test_scan_project_package_marker(self):
+        # __init__.pyの追加/削除でモジュール名が変わったらエッジを作り直す
+        dm = DependencyManagerPy(self.root, self.cache_dir)
+        dm.scan_project()
+        helper_path = self.root / "pkg/sub/helper.py"
+        self.assertEqual(dm.module_map["pkg.sub.helper"], helper_path)
+
+        (self.root / "pkg/sub/__init__.py").unlink()
+        dm.scan_project()
+        self.assertNotIn("pkg.sub.helper", dm.module_map)
+        self.assertEqual(dm.module_map["helper"], helper_path)
+        self.assertNotIn(helper_path, set(dm.nx_graph.successors(self.root / "pkg/main.py")))
+
+        (self.root / "pkg/sub/__init__.py").write_text("", encoding="utf-8")
+        dm.scan_project()
+        self.assertEqual(dm.module_map["pkg.sub.helper"], helper_path)
+        self.assertIn(helper_path, set(dm.nx_graph.successors(self.root / "pkg/main.py")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from zoltraak.analyzer.dependency_map.llm_context_generator import ContextSliceMode, LLMContextGenerator
+from zoltraak.analyzer.dependency_map.python.ast_slicer_py import AstSlicerPy
+from zoltraak.analyzer.dependency_map.python.dependency_manager_py import DependencyManagerPy
+from zoltraak.core.context_packer import ContextPacker
+
+DUMMY_UTIL = '''"""ユーティリティ"""
+import os
+
+LIMIT = 10
+
+
+@staticmethod
+def used(x: int) -> int:
+    """使われる関数"""
+    # 本体のコメント
+    return x + 1
+
+
+def unused():
+    return "unused_body"
+
+
+class Helper:
+    """ヘルパー"""
+
+    name = "helper"
+
+    def run(self): return "run_body"
+'''
+
+DUMMY_FILES = {
+    "pkg/__init__.py": "",
+    "pkg/main.py": "from pkg.util import used\n\n\ndef main():\n    return used(1)\n",
+    "pkg/util.py": DUMMY_UTIL,
+    "pkg/base.py": "def base():\n    return 'base_body'\n",
+    "pkg/app.py": "from pkg import main\nfrom pkg.base import base\n",
+}
+
+
+class TestAstSlicerPy(unittest.TestCase):
+    def test_slice_signatures(self):
+        sliced = AstSlicerPy.slice_signatures(DUMMY_UTIL)
+        self.assertIn('"""ユーティリティ"""', sliced)
+        self.assertIn("LIMIT = 10", sliced)
+        self.assertIn('@staticmethod\ndef used(x: int) -> int:\n    """使われる関数"""\n    ...', sliced)
+        self.assertIn('    name = "helper"\n    def run(self):\n        ...', sliced)
+        self.assertNotIn("本体のコメント", sliced)
+        self.assertNotIn("_body", sliced)
+
+    def test_slice_symbols(self):
+        sliced = AstSlicerPy.slice_symbols(DUMMY_UTIL, {"used", "LIMIT"})
+        self.assertIn("LIMIT = 10", sliced)
+        self.assertIn("return x + 1", sliced)
+        self.assertNotIn("unused", sliced)
+        self.assertNotIn("Helper", sliced)
+
+    def test_syntax_error(self):
+        self.assertEqual(AstSlicerPy.slice_signatures("def broken(:\n"), "def broken(:\n")
+
+
+class TestLLMContextGenerator(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name) / "project"
+        for rel_path, content in DUMMY_FILES.items():
+            file_path = self.root / rel_path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(content, encoding="utf-8")
+        self.dm = DependencyManagerPy(self.root, os.path.join(self.temp_dir.name, "cache"))
+        self.dm.scan_project()
+        self.main_path = self.root / "pkg/main.py"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_rank_related_files(self):
+        generator = LLMContextGenerator(self.dm, mode="symbols", max_tokens=10000)
+        self.assertEqual(
+            generator.rank_related_files(self.main_path),
+            [(1, self.root / "pkg/util.py"), (1, self.root / "pkg/app.py"), (2, self.root / "pkg/base.py")],
+        )
+
+    def test_generate_context_symbols(self):
+        self.assertEqual(self.dm.get_imported_symbols(self.main_path), {self.root / "pkg/util.py": {"used"}})
+        context = LLMContextGenerator(self.dm, mode="symbols", max_tokens=10000).generate_context(self.main_path)
+        self.assertIn("return used(1)", context)
+        self.assertIn("return x + 1", context)
+        self.assertNotIn("unused_body", context)
+        self.assertIn("Slice: signatures", context)  # importしていないファイルは宣言だけ
+        self.assertNotIn("base_body", context)
+
+    def test_generate_context_budget(self):
+        full_context = LLMContextGenerator(self.dm, mode="full", max_tokens=10000).generate_context(self.main_path)
+        self.assertIn("unused_body", full_context)
+        self.assertIn("base_body", full_context)
+
+        max_tokens = 150
+        context = LLMContextGenerator(self.dm, mode="full", max_tokens=max_tokens).generate_context(self.main_path)
+        self.assertLessEqual(ContextPacker.estimate_tokens(context), max_tokens)
+        self.assertNotIn("unused_body", context)
+
+    def test_slice_cache(self):
+        sliced = LLMContextGenerator.slice_content(DUMMY_UTIL, ContextSliceMode.SYMBOLS, {"used"})
+        self.assertIs(LLMContextGenerator.slice_content(DUMMY_UTIL, ContextSliceMode.SYMBOLS, {"used"}), sliced)
+
+
+if __name__ == "__main__":
+    unittest.main()
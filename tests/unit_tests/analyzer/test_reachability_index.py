@@ -0,0 +1,60 @@
+import random
+import unittest
+from pathlib import Path
+
+import networkx as nx
+
+from zoltraak.analyzer.dependency_map.reachability_index import ReachabilityIndex
+
+
+class TestReachabilityIndex(unittest.TestCase):
+    def setUp(self):
+        # b => a, c => b, test_c => c (import元 => import先)
+        self.a, self.b, self.c, self.test_c = Path("a.py"), Path("b.py"), Path("c.py"), Path("test_c.py")
+        self.graph = nx.DiGraph([(self.b, self.a), (self.c, self.b), (self.test_c, self.c)])
+        self.index = ReachabilityIndex(self.graph)
+
+    def test_get_dependents(self):
+        self.assertEqual(self.index.get_dependents(self.a), {self.b, self.c, self.test_c})
+        self.assertEqual(self.index.get_dependents(self.test_c), set())
+        self.assertEqual(self.index.get_dependent_tests(self.a), {self.test_c})
+        self.assertEqual(self.index.get_dependents(Path("unknown.py")), set())
+
+    def test_update_edges_add(self):
+        self.index.get_dependents(self.a)
+        d, test_d = Path("d.py"), Path("test_d.py")
+        self.graph.add_edges_from([(test_d, d), (d, self.b)])
+        self.index.update_edges(test_d, set(), {d})
+        self.index.update_edges(d, set(), {self.b})
+        self.assertEqual(self.index.get_dependents(self.a), {self.b, self.c, self.test_c, d, test_d})
+        self.assertEqual(self.index.get_dependent_tests(self.b), {self.test_c, test_d})
+
+    def test_update_edges_remove_and_cycle(self):
+        self.index.get_dependents(self.a)
+        self.graph.remove_edge(self.c, self.b)
+        self.index.update_edges(self.c, {self.b}, set())
+        self.assertEqual(self.index.get_dependents(self.a), {self.b})
+
+        self.graph.add_edge(self.a, self.b)
+        self.index.update_edges(self.a, set(), {self.b})
+        self.assertEqual(self.index.get_dependents(self.a), {self.b})
+        self.assertEqual(self.index.get_dependents(self.b), {self.a})
+
+    def test_matches_networkx_ancestors(self):
+        rng = random.Random(0)
+        nodes = [Path(f"m{i}.py") for i in range(60)]
+        graph = nx.DiGraph()
+        graph.add_nodes_from(nodes)
+        index = ReachabilityIndex(graph)
+        for _ in range(3):
+            for _ in range(40):
+                src, dst = rng.sample(nodes, 2)
+                old_targets = set(graph.successors(src))
+                graph.add_edge(src, dst)
+                index.update_edges(src, old_targets, old_targets | {dst})
+            for node in nodes:
+                self.assertEqual(index.get_dependents(node), nx.ancestors(graph, node))
+
+
+if __name__ == "__main__":
+    unittest.main()
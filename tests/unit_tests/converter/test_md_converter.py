@@ -68,6 +68,32 @@ class TestMarkdownToMarkdownConverter(TestBaseConverter):
             self.assertEqual(result, "new_output.md")
             self.check_mock_call_count_llm_generate_response(1)
 
+    def test_update_target_file_from_target_and_prompt_full_text(self):
+        # 編集形式を説明するドキュメントも差分として部分適用せずに全文を書き込む
+        new_target_content = "# 編集ルール\n```\n<<<<<<< SEARCH\nTest File\n=======\n新ルール\n>>>>>>> REPLACE\n```\n"
+        with (
+            patch("zoltraak.settings.update_mode", "full"),
+            patch.object(self.md_converter, "generate_response", return_value=new_target_content),
+        ):
+            self.md_converter.update_target_file_from_target_and_prompt("output.md", "変更内容")
+        self.assertEqual(FileUtil.read_file("output.md"), new_target_content.strip())
+
+    def test_rewrite_target_file_over_budget(self):
+        # 大きすぎるターゲットは中略して再作成せずに編集で部分更新する
+        with (
+            patch("zoltraak.settings.max_tokens_rewrite_target", 1),
+            patch("zoltraak.settings.update_mode", "full"),
+            patch.object(self.md_converter, "handle_new_target_file_with_old_context") as mock_rewrite,
+            patch.object(self.md_converter, "update_target_file_by_section", return_value=False),
+            patch.object(self.md_converter, "update_target_file_by_edit", return_value=1.0) as mock_edit,
+        ):
+            score = self.md_converter.rewrite_target_file("# 旧ソース", "# 新ソース", "# 旧ターゲット")
+            self.md_converter.update_target_file_from_target_and_prompt("output.md", "変更内容")
+        self.assertEqual(score, 1.0)
+        mock_rewrite.assert_not_called()
+        self.assertEqual(mock_edit.call_count, 2)
+        self.assertIn("# 新ソース", mock_edit.call_args_list[0].args[1])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from zoltraak.core.context_packer import ContextPacker, ContextSection
+
+SOURCE_BLOCK = "# 要求\nユーザーはWebアプリでタスクを管理したいと考えています。期限と優先度を設定できること。"
+CONTEXT_BLOCK = "# 背景\n既存システムはPythonで書かれており、データベースにはSQLiteを利用しています。"
+
+
+class TestContextPacker(unittest.TestCase):
+    def test_dedup_lower_priority(self):
+        sections = [
+            ContextSection(name="source_content", content=f"{SOURCE_BLOCK}\n\n{CONTEXT_BLOCK}", priority=1),
+            ContextSection(name="prompt", content=f"作って\n\n{SOURCE_BLOCK}", priority=0),
+        ]
+        context_packer = ContextPacker(max_tokens=10000)
+        packed_map = context_packer.pack(sections)
+        self.assertEqual(packed_map["prompt"], f"作って\n\n{SOURCE_BLOCK}")  # 優先度が高い方は変更なし
+        self.assertEqual(packed_map["source_content"], CONTEXT_BLOCK)
+        self.assertEqual(context_packer.report["sections"]["source_content"]["dedup_blocks"], 1)
+
+    def test_short_block_not_dedup(self):
+        sections = [
+            ContextSection(name="a", content="---\n\n## 概要", priority=0),
+            ContextSection(name="b", content="---\n\n## 概要", priority=1),
+        ]
+        packed_map = ContextPacker(max_tokens=10000).pack(sections)
+        self.assertEqual(packed_map["b"], "---\n\n## 概要")
+
+    def test_truncate_by_budget(self):
+        sections = [
+            ContextSection(name="prompt", content="あ" * 300, priority=0),
+            ContextSection(name="target_content", content="い" * 1000, priority=1, max_tokens=600),
+        ]
+        context_packer = ContextPacker(max_tokens=700)
+        packed_map = context_packer.pack(sections)
+        self.assertEqual(packed_map["prompt"], "あ" * 300)
+        self.assertIn("中略", packed_map["target_content"])
+        self.assertTrue(packed_map["target_content"].startswith("い"))
+        self.assertTrue(packed_map["target_content"].endswith("い"))
+        self.assertTrue(context_packer.report["sections"]["target_content"]["truncated"])
+        self.assertLessEqual(context_packer.report["tokens_total"], 700)
+
+    def test_fixed_section_not_truncated(self):
+        sections = [
+            ContextSection(name="prompt", content=f"作って\n\n{SOURCE_BLOCK}", priority=0),
+            ContextSection(
+                name="target_content", content=f"{SOURCE_BLOCK}\n\n" + "い" * 1000, priority=4, is_fixed=True
+            ),
+            ContextSection(name="destiny_content", content="う" * 1000, priority=5),
+        ]
+        context_packer = ContextPacker(max_tokens=700)
+        packed_map = context_packer.pack(sections)
+        self.assertEqual(packed_map["target_content"], sections[1].content)  # 重複除去も中略もしない
+        self.assertIn("中略", packed_map["destiny_content"])
+        self.assertFalse(context_packer.report["sections"]["target_content"]["truncated"])
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from zoltraak.core.magic_workflow import MagicWorkflow
+from zoltraak.eval.eval_queue import EvalResult
+from zoltraak.schema.schema import MagicLayer
+from zoltraak.utils.file_util import FileUtil
+
+
+class TestMagicWorkflowEvaluation(unittest.TestCase):
+    def setUp(self):
+        self.magic_workflow = MagicWorkflow()
+        self.magic_workflow.magic_info.magic_layer = MagicLayer.LAYER_6_CODEBASE_GEN
+        self.evaluator = MagicMock()
+        patcher = patch("zoltraak.core.magic_workflow.BackgroundEvaluator.get_instance", return_value=self.evaluator)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_requeue_rolled_back_target(self):
+        rolled_back = EvalResult("a.md", str(MagicLayer.LAYER_3_REQUIREMENT_GEN), 0.1, is_rolled_back=True)
+        self.evaluator.drain.side_effect = [[rolled_back], []]
+        called_states = []
+
+        def run_converters(layer: MagicLayer) -> tuple[bool, list[float]]:
+            called_states.append((layer, self.magic_workflow.magic_info.magic_layer, self.magic_workflow.target_filter))
+            return True, [1.0]
+
+        with patch.object(self.magic_workflow, "run_converters", side_effect=run_converters):
+            self.magic_workflow.wait_evaluations(["a.md"])
+
+        # 生成したレイヤでロールバックしたターゲットだけを再生成し、状態を戻す
+        layer = MagicLayer.LAYER_3_REQUIREMENT_GEN
+        self.assertEqual(called_states, [(layer, layer, {os.path.abspath("a.md")})])
+        self.assertEqual(self.magic_workflow.magic_info.magic_layer, MagicLayer.LAYER_6_CODEBASE_GEN)
+        self.assertIsNone(self.magic_workflow.target_filter)
+        self.evaluator.drain.assert_called_with(["a.md"])
+
+    def test_requeue_max(self):
+        rolled_back = EvalResult("a.md", str(MagicLayer.LAYER_3_REQUIREMENT_GEN), 0.1, is_rolled_back=True)
+        self.evaluator.drain.return_value = [rolled_back]
+        with (
+            patch("zoltraak.settings.eval_requeue_max", 1),
+            patch.object(self.magic_workflow, "run_converters", return_value=(True, [1.0])) as mock_run_converters,
+        ):
+            self.magic_workflow.wait_evaluations()
+        self.assertEqual(mock_run_converters.call_count, 1)  # 上限を超えたらロールバックしたまま(次回再生成)
+
+
+class TestMagicWorkflowValidation(unittest.TestCase):
+    def test_validate_generated_files(self):
+        # 一括検証で見つかった未解決のimportはファイル毎の修正セッションでLLMに渡す
+        magic_workflow = MagicWorkflow()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            main_path = os.path.join(temp_dir, "main.py")
+            FileUtil.write_file(main_path, "import missing_module_xyz\n\nprint(missing_module_xyz)\n")
+            fixed_code = "import os\n\nprint(os)\n"
+            with patch("zoltraak.core.magic_workflow.FixSession.fix", return_value=fixed_code) as mock_fix:
+                magic_workflow.validate_generated_files([main_path])
+            self.assertEqual(FileUtil.read_file(main_path), fixed_code.strip())
+            self.assertEqual(mock_fix.call_count, 1)
+            self.assertIn("missing_module_xyz", mock_fix.call_args.args[1])
+        self.assertEqual(magic_workflow.workflow_history, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from zoltraak import settings
+from zoltraak.core.map_reduce import MapReduce
+
+DUMMY_SECTION = "## 機能{}\n" + "- 要件の説明です。\n" * 20
+
+
+def create_content(count: int) -> str:
+    return "# 要件定義書\n" + "".join(DUMMY_SECTION.format(i) for i in range(count))
+
+
+class TestMapReduce(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir_patcher = patch("zoltraak.settings.cache_dir", self.temp_dir.name)
+        self.cache_dir_patcher.start()
+        self.prompts = []
+
+    def tearDown(self):
+        self.cache_dir_patcher.stop()
+        self.temp_dir.cleanup()
+
+    def fake_generate(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return f"summary{len(self.prompts)}"
+
+    def test_split_chunks(self):
+        content = create_content(10)
+        chunks = MapReduce.split_chunks(content, 300)
+        self.assertEqual("".join(chunks), content)
+        self.assertTrue(all(chunk.startswith("#") for chunk in chunks))
+        self.assertGreater(len(chunks), 1)
+
+    def test_split_long_line(self):
+        chunks = MapReduce.split_chunks("あ" * 1000, 300)
+        self.assertEqual(len(chunks), 4)
+
+    def test_grimoire_paths(self):
+        # 内部用のグリモアはコンパイラーの候補に出さない
+        self.assertTrue(os.path.isfile(MapReduce.MAP_GRIMOIRE_PATH))
+        self.assertTrue(os.path.isfile(MapReduce.REDUCE_GRIMOIRE_PATH))
+        self.assertFalse(os.path.isfile(os.path.join(settings.compiler_dir, "map_chunk.md")))
+
+    def test_run_and_cache(self):
+        content = create_content(10)
+        map_reduce = MapReduce(generate_response_fn=self.fake_generate, chunk_tokens=300)
+        self.assertTrue(map_reduce.run(content).startswith("summary"))
+        self.assertGreater(map_reduce.report["levels"], 0)
+        self.assertEqual(map_reduce.report["calls"], len(self.prompts))
+        chunk_count = map_reduce.report["chunks"]
+
+        # 1チャンクだけ編集した場合はそのチャンクとreduceだけ再計算
+        map_reduce = MapReduce(generate_response_fn=self.fake_generate, chunk_tokens=300)
+        map_reduce.run(content.replace("## 機能0\n", "## 機能0(改)\n"))
+        self.assertEqual(map_reduce.report["chunks"], chunk_count)
+        self.assertEqual(map_reduce.report["cache_hits"], chunk_count - 1)
+
+    def test_shared_litellm_api(self):
+        # 呼び出し元のLitellmApiをチャンク間で使い回す
+        litellm_api = MagicMock()
+        litellm_api.generate_response.return_value = "summary"
+        map_reduce = MapReduce(chunk_tokens=300, litellm_api=litellm_api)
+        self.assertEqual(map_reduce.run(create_content(10)), "summary")
+        self.assertEqual(litellm_api.generate_response.call_count, map_reduce.report["calls"])
+
+
+if __name__ == "__main__":
+    unittest.main()
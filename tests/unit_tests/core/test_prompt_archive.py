@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+from zoltraak.core.prompt_archive import PromptArchive
+from zoltraak.utils.diff_util import DiffUtil
+
+
+class TestPromptArchive(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.archive = PromptArchive(self.temp_dir.name)
+        self.prompt_path_a = os.path.join(self.temp_dir.name, "layer_1", "a.md_final.prompt")
+        self.prompt_path_b = os.path.join(self.temp_dir.name, "layer_1", "b.md_final.prompt")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_write_and_read_prompt(self):
+        prompt_ref = self.archive.write_prompt("共通の本文\nprompt", self.prompt_path_a)
+        self.assertTrue(os.path.isfile(PromptArchive.get_ref_path(self.prompt_path_a)))
+        self.assertTrue(os.path.isfile(self.archive.get_blob_path(prompt_ref.digest)))
+        self.assertEqual(self.archive.read_prompt(self.prompt_path_a), "共通の本文\nprompt")
+
+    def test_dedup_same_content(self):
+        prompt_ref_a = self.archive.write_prompt("same", self.prompt_path_a)
+        prompt_ref_b = self.archive.write_prompt("same", self.prompt_path_b)
+        self.assertEqual(prompt_ref_a.digest, prompt_ref_b.digest)
+        blob_files = [f for _, _, files in os.walk(self.archive.blob_dir) for f in files]
+        self.assertEqual(len(blob_files), 1)
+
+    def test_legacy_prompt_fallback(self):
+        os.makedirs(os.path.dirname(self.prompt_path_a), exist_ok=True)
+        with open(self.prompt_path_a, "w", encoding="utf-8") as f:
+            f.write("legacy  \n\n prompt")
+        prompt_ref = self.archive.read_ref(self.prompt_path_a)
+        self.assertEqual(prompt_ref.normalized_digest, DiffUtil.get_normalized_digest("legacy\nprompt"))
+        self.assertEqual(self.archive.read_prompt(self.prompt_path_a), "legacy\n\n prompt")
+
+        # 新形式で書き込むと旧形式のファイルは削除される
+        self.archive.write_prompt("new prompt", self.prompt_path_a)
+        self.assertFalse(os.path.isfile(self.prompt_path_a))
+        self.assertEqual(self.archive.read_prompt(self.prompt_path_a), "new prompt")
@@ -0,0 +1,49 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from zoltraak.core.prompt_ledger import PromptLedger, PromptRecord
+
+
+class TestPromptLedger(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.ledger_file_path = os.path.join(self.temp_dir.name, "prompt", PromptLedger.DEF_LEDGER_FILE_NAME)
+        self.ledger = PromptLedger(flush_batch_size=2)
+        self.ledger.set_ledger_file_path(self.ledger_file_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_append_flush_by_batch_size(self):
+        self.ledger.append(PromptRecord(prompt_len=1, prompt_head="a"))
+        self.assertFalse(os.path.isfile(self.ledger_file_path))  # バッチサイズ未満は未書き出し
+
+        self.ledger.append(PromptRecord(prompt_len=2, prompt_head="b"))
+        self.assertTrue(os.path.isfile(self.ledger_file_path))
+
+        records = self.ledger.read_records(self.ledger.run_id)
+        self.assertEqual([record["prompt_head"] for record in records], ["a", "b"])
+
+    def test_read_records_filter_run_id(self):
+        other_ledger = PromptLedger(ledger_file_path=self.ledger_file_path)
+        other_ledger.run_id = "other_run"
+        other_ledger.append(PromptRecord(prompt_len=1))
+        other_ledger.flush()
+
+        self.ledger.append(PromptRecord(prompt_len=3))
+        self.assertEqual(len(self.ledger.read_records()), 2)
+        self.assertEqual(len(self.ledger.read_records(self.ledger.run_id)), 1)
+
+    def test_export_csv(self):
+        self.ledger.append(PromptRecord(prompt_len=5, prompt_head="日本語", prompt_diff="- a\n+ b"))
+        csv_file_path = os.path.join(self.temp_dir.name, "prompt.csv")
+        self.ledger.export_csv(csv_file_path)
+
+        with open(csv_file_path, encoding="utf-8", newline="") as csv_file:
+            rows = list(csv.reader(csv_file))
+        self.assertEqual(rows[0], ["", *PromptLedger.CSV_COLUMNS])
+        self.assertEqual(rows[1][0], "0")
+        self.assertEqual(rows[1][1], "5")
+        self.assertEqual(rows[1][-1], "- a\n+ b")
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+
+from zoltraak.core.target_lineage import TargetLineage
+from zoltraak.core.watch_runner import WatchRunner
+from zoltraak.schema.schema import MagicLayer, MagicMode, ZoltraakParams
+from zoltraak.utils.file_watcher import FileWatcher
+
+
+class TestTargetLineage(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = self.temp_dir.name
+        self.lineage = TargetLineage("test", self.cache_dir)
+        self.lineage.add("a_requirement.md", "a.py", MagicLayer.LAYER_5_CODE_GEN)
+        self.lineage.add("b_requirement.md", "b.py", MagicLayer.LAYER_5_CODE_GEN)
+        self.lineage.add("a.py", "a.md", MagicLayer.LAYER_6_CODEBASE_GEN)
+        self.lineage.add("test.md", "a_requirement.md", MagicLayer.LAYER_4_REQUIREMENT_GEN)
+        self.lineage.add("test.md", "b_requirement.md", MagicLayer.LAYER_4_REQUIREMENT_GEN)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_affected_targets(self):
+        affected_targets = self.lineage.get_affected_targets({"a_requirement.md"})
+        self.assertEqual(
+            affected_targets,
+            {
+                os.path.abspath("a.py"): MagicLayer.LAYER_5_CODE_GEN,
+                os.path.abspath("a.md"): MagicLayer.LAYER_6_CODEBASE_GEN,
+            },
+        )
+        self.assertEqual(TargetLineage.get_first_layer(list(affected_targets.values())), MagicLayer.LAYER_5_CODE_GEN)
+        self.assertEqual(len(self.lineage.get_affected_targets({"test.md"})), 5)
+        self.assertEqual(self.lineage.get_affected_targets({"unknown.md"}), {})
+
+    def test_save_and_load(self):
+        self.lineage.save()
+        lineage = TargetLineage("test", self.cache_dir)
+        self.assertEqual(lineage.source_map, self.lineage.source_map)
+
+
+class TestWatchRunner(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.org_dir = os.getcwd()
+        os.chdir(self.temp_dir.name)
+        self.params = ZoltraakParams(
+            canonical_name="watch_test",
+            magic_mode=MagicMode.GRIMOIRE_AND_PROMPT,
+            magic_layer=MagicLayer.LAYER_4_REQUIREMENT_GEN.value,
+            magic_layer_end=MagicLayer.LAYER_6_CODEBASE_GEN.value,
+        )
+        self.run_calls = []
+        self.watch_runner = WatchRunner(
+            lambda: self.params,
+            lambda params, target_filter: self.run_calls.append((params, target_filter)),
+            "def_watch_test.md",
+            FileWatcher([], is_polling=True),
+        )
+        self.watch_runner.lineage = TargetLineage("watch_test", self.temp_dir.name)
+        self.watch_runner.lineage.add("a_requirement.md", "a.py", MagicLayer.LAYER_5_CODE_GEN)
+        self.watch_runner.lineage.add("a.py", "a_info_structure.md", MagicLayer.LAYER_7_INFO_STRUCTURE_GEN)
+
+    def tearDown(self):
+        os.chdir(self.org_dir)
+        self.temp_dir.cleanup()
+
+    def test_plan(self):
+        params, target_filter = self.watch_runner.plan({os.path.abspath("a_requirement.md")})
+        self.assertEqual(params.magic_layer, MagicLayer.LAYER_5_CODE_GEN.value)
+        self.assertEqual(params.magic_mode, MagicMode.GRIMOIRE_ONLY)
+        self.assertEqual(target_filter, {os.path.abspath("a.py"), os.path.abspath("a_info_structure.md")})
+
+        # 終了レイヤより後のターゲットだけなら再生成しない
+        self.assertIsNone(self.watch_runner.plan({os.path.abspath("a.py")}))
+
+        params, target_filter = self.watch_runner.plan({os.path.abspath("def_watch_test.md")})
+        self.assertEqual(params.magic_layer, MagicLayer.LAYER_4_REQUIREMENT_GEN.value)
+        self.assertIsNone(target_filter)
+
+        params, target_filter = self.watch_runner.plan({self.watch_runner.file_info.structure_file_path})
+        self.assertEqual(params.magic_layer, MagicLayer.LAYER_4_REQUIREMENT_GEN.value)
+        self.assertIsNone(target_filter)
+
+    def test_get_changed_files(self):
+        file_path = os.path.abspath("a_requirement.md")
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write("v1")
+        self.watch_runner.refresh()
+        self.assertEqual(self.watch_runner.get_changed_files({file_path}), set())
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write("v2")
+        self.assertEqual(self.watch_runner.get_changed_files({file_path}), {file_path})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from zoltraak.eval.eval_queue import BackgroundEvaluator, EvalTask
+
+MOCK_GET_POLICY_SCORE = "zoltraak.eval.eval_queue.get_policy_score"
+
+
+class TestBackgroundEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.target_file_path = self.write_file("target.md", "# new")
+        self.past_source_file_path = self.write_file("past_source.md", "# source")
+        self.evaluator = BackgroundEvaluator(max_workers=2)
+
+    def tearDown(self):
+        self.evaluator.executor.shutdown()
+        self.temp_dir.cleanup()
+
+    def write_file(self, file_name: str, content: str) -> str:
+        file_path = os.path.join(self.temp_dir.name, file_name)
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return file_path
+
+    def create_task(self) -> EvalTask:
+        return EvalTask(
+            target_file_path=self.target_file_path,
+            magic_layer="3_requirement_gen",
+            checks=[("# source", "# new", "relation")],
+            dst_content="# new",
+            rollback_content="# old",
+            past_source_file_path=self.past_source_file_path,
+        )
+
+    def test_drain_ok(self):
+        with patch(MOCK_GET_POLICY_SCORE, return_value=0.9):
+            self.evaluator.submit(self.create_task())
+            results = self.evaluator.drain()
+        self.assertEqual(len(results), 1)
+        self.assertFalse(results[0].is_rolled_back)
+        with open(self.target_file_path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "# new")
+
+    def test_drain_rollback(self):
+        with patch(MOCK_GET_POLICY_SCORE, return_value=0.1):
+            self.evaluator.submit(self.create_task())
+            results = self.evaluator.drain()
+        self.assertTrue(results[0].is_rolled_back)
+        with open(self.target_file_path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "# old")
+        self.assertFalse(os.path.isfile(self.past_source_file_path))  # 次回再生成の対象
+        self.assertEqual(self.evaluator.drain(), [])
+        self.assertEqual(len(self.evaluator.results), 1)
+
+    def test_drain_target_file_paths(self):
+        with patch(MOCK_GET_POLICY_SCORE, return_value=0.9):
+            self.evaluator.submit(self.create_task())
+            self.assertEqual(self.evaluator.drain(["other.md"]), [])
+            self.assertEqual(len(self.evaluator.pending), 1)
+            results = self.evaluator.drain([self.target_file_path])
+        self.assertEqual(len(results), 1)
+        self.assertEqual(self.evaluator.pending, [])
+
+    def test_skip_rollback_if_updated(self):
+        with patch(MOCK_GET_POLICY_SCORE, return_value=0.1):
+            self.evaluator.submit(self.create_task())
+            self.write_file("target.md", "# updated")
+            results = self.evaluator.drain()
+        self.assertFalse(results[0].is_rolled_back)
+
+
+if __name__ == "__main__":
+    unittest.main()
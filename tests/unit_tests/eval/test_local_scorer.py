@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import patch
+
+from zoltraak.eval.eval_policy import EvalPolicy, get_policy_score
+from zoltraak.eval.local_scorer import LocalScorer
+
+SOURCE_MD = """# 要件定義書
+## 機能
+- UserManager クラスで login と logout を提供する
+- SearchService クラスで search を提供する
+"""
+
+TARGET_PY = """class UserManager:
+    def login(self):
+        pass
+
+    def logout(self):
+        pass
+
+
+class SearchService:
+    def search(self, query):
+        return query
+"""
+
+
+class TestLocalScorer(unittest.TestCase):
+    def test_good_code(self):
+        local_score = LocalScorer.score(SOURCE_MD, TARGET_PY, "main.py")
+        self.assertEqual(local_score.checks["structure"], 1.0)
+        self.assertGreaterEqual(local_score.score, LocalScorer.AMBIGUOUS_HIGH)
+        self.assertFalse(local_score.is_ambiguous)
+
+    def test_broken_code(self):
+        local_score = LocalScorer.score(SOURCE_MD, "class UserManager(:\n", "main.py")
+        self.assertEqual(local_score.score, 0.0)
+        local_score = LocalScorer.score(SOURCE_MD, "<<<<<<< SEARCH\n# 要件\n", "def.md")
+        self.assertEqual(local_score.score, 0.0)
+
+    def test_diff_example_is_not_leftover(self):
+        target_md = (
+            "# 設計書\n## 差分の例\n```diff\n@@ -1,2 +1,2 @@\n-old\n+new\n```\n`<<<<<<< SEARCH`で始まるブロック\n"
+        )
+        self.assertEqual(LocalScorer.get_structure_score(target_md, "def.md"), 1.0)
+        self.assertEqual(LocalScorer.get_structure_score(target_md + ">>>>>>> REPLACE\n", "def.md"), 0.0)
+
+    def test_low_coverage(self):
+        local_score = LocalScorer.score(SOURCE_MD, "def main():\n    pass\n" * 5, "main.py")
+        self.assertLess(local_score.checks["coverage"], 0.5)
+        self.assertLess(local_score.score, LocalScorer.AMBIGUOUS_HIGH)
+
+
+class TestEvalPolicy(unittest.TestCase):
+    def test_get_with_layer_override(self):
+        with (
+            patch("zoltraak.settings.eval_policy", "tiered"),
+            patch("zoltraak.settings.eval_policy_layers", "5_code_gen:all, layer_11_clean_up:off"),
+        ):
+            self.assertEqual(EvalPolicy.get("layer_5_code_gen"), EvalPolicy.ALL)
+            self.assertEqual(EvalPolicy.get("11_clean_up"), EvalPolicy.OFF)
+            self.assertEqual(EvalPolicy.get("3_requirement_gen"), EvalPolicy.TIERED)
+
+    def test_get_policy_score_tiered(self):
+        with (
+            patch("zoltraak.settings.eval_policy", "tiered"),
+            patch("zoltraak.eval.eval_policy.get_score", return_value=0.55) as mock_get_score,
+        ):
+            # 明確に良い結果はローカル評価のみ
+            self.assertGreaterEqual(get_policy_score(SOURCE_MD, TARGET_PY, target_file_path="main.py"), 0.7)
+            mock_get_score.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
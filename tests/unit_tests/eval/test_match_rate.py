@@ -0,0 +1,42 @@
+import unittest
+
+from zoltraak.eval.match_rate import MatchRateEstimator
+
+OLD_SOURCE = "# 要件定義書\n" + "".join(f"## 機能{i}\n- 要件{i}の説明\n" for i in range(10))
+OLD_TARGET = "# 設計書\n## 概要\n- 設計の説明\n"
+
+
+class TestMatchRateEstimator(unittest.TestCase):
+    def test_patch(self):
+        new_source = OLD_SOURCE.replace("- 要件3の説明", "- 要件3の説明(修正)")
+        estimate = MatchRateEstimator.estimate(OLD_SOURCE, new_source, OLD_TARGET, 0.05)
+        self.assertEqual(estimate.decision, "patch")
+        self.assertEqual(estimate.match_rate, MatchRateEstimator.PATCH_MATCH_RATE)
+
+    def test_rebuild(self):
+        new_source = "# 全く別の資料\n" + "".join(f"## 項目{i}\n- 内容{i}\n" for i in range(10))
+        estimate = MatchRateEstimator.estimate(OLD_SOURCE, new_source, OLD_TARGET, 0.9)
+        self.assertEqual(estimate.decision, "rebuild")
+        self.assertEqual(estimate.match_rate, MatchRateEstimator.REBUILD_MATCH_RATE)
+
+    def test_rebuild_broken_target(self):
+        estimate = MatchRateEstimator.estimate(OLD_SOURCE, OLD_SOURCE, "<<<<<<< SEARCH\n# 設計書\n", 0.0)
+        self.assertEqual(estimate.decision, "rebuild")
+
+    def test_patch_with_diff_example_in_target(self):
+        old_target = OLD_TARGET + "## 差分の例\n```diff\n@@ -1 +1 @@\n-old\n+new\n```\n"
+        new_source = OLD_SOURCE.replace("- 要件3の説明", "- 要件3の説明(修正)")
+        estimate = MatchRateEstimator.estimate(OLD_SOURCE, new_source, old_target, 0.05)
+        self.assertEqual(estimate.checks["target_structure"], 1.0)
+        self.assertEqual(estimate.decision, "patch")
+
+    def test_ambiguous(self):
+        new_source = OLD_SOURCE.replace("の説明", "の詳細な説明", 4)
+        estimate = MatchRateEstimator.estimate(OLD_SOURCE, new_source, OLD_TARGET, 0.2)
+        self.assertEqual(estimate.decision, "ambiguous")
+        self.assertIsNone(estimate.match_rate)
+        self.assertGreater(MatchRateEstimator.get_path_counter()["llm"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import tempfile
+import unittest
+
+from zoltraak.eval.score_cache import ScoreCache
+
+
+class TestScoreCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_key(self):
+        key = ScoreCache.get_key("src", "dst", "relation", "model")
+        self.assertEqual(key, ScoreCache.get_key("src", "dst", "relation", "model"))
+        self.assertNotEqual(key, ScoreCache.get_key("src", "dst", "relation", "other_model"))
+        self.assertNotEqual(key, ScoreCache.get_key("src", "dst2", "relation", "model"))
+
+    def test_set_and_get(self):
+        score_cache = ScoreCache(self.temp_dir.name)
+        key = ScoreCache.get_key("src", "dst", "relation", "model")
+        self.assertIsNone(score_cache.get(key))
+        score_cache.set(key, 0.8)
+        self.assertEqual(score_cache.get(key), 0.8)
+
+        # 別インスタンス(次回実行)でもファイルから読める
+        self.assertEqual(ScoreCache(self.temp_dir.name).get(key), 0.8)
+
+    def test_skip_failed_score(self):
+        score_cache = ScoreCache(self.temp_dir.name)
+        key = ScoreCache.get_key("src", "dst", "relation", "model")
+        score_cache.set(key, -1.0)
+        self.assertIsNone(score_cache.get(key))
+
+
+if __name__ == "__main__":
+    unittest.main()
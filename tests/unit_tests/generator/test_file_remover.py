@@ -0,0 +1,69 @@
+import os
+import unittest
+
+from tests.unit_tests.helper import SampleProjectTestCase
+from zoltraak.core.prompt_manager import PromptManager
+from zoltraak.generator.file_remover import CodeFileIndex, FileRemover
+from zoltraak.schema.schema import ZoltraakParams
+from zoltraak.utils.file_util import FileUtil
+
+STRUCTURE_CONTENT = "sample/README.md\nsample/src/main.py\nsample/src/utils/file_util.py\n"
+
+GENERATED_FILES = {
+    "sample/README.md": True,  # True: 残る
+    "sample/README.md.md": True,
+    "sample/src/main.py": True,
+    "sample/src/main_requirement.md": True,
+    "sample/src/info_structure.md": True,
+    "sample/src/utils/file_util_test.py": True,
+    "sample/src/__init__.py": False,
+    "sample/utils/file_util.py": False,
+    "sample/old/deep/unused.py": False,
+}
+
+
+class TestFileRemover(SampleProjectTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_sample_files(STRUCTURE_CONTENT, GENERATED_FILES)
+        self.file_remover = FileRemover(self.magic_info, PromptManager())
+
+    def get_remaining_files(self) -> set[str]:
+        dir_paths: list[str] = []
+        return {
+            os.path.relpath(file_path, self.target_dir)
+            for file_path in FileRemover.iter_files(self.target_dir, dir_paths)
+        }
+
+    def test_should_remove_file(self):
+        code_file_path_list = ["./src/main.py", "./src/utils/file_util.py"]
+        index = CodeFileIndex(code_file_path_list)
+        self.assertTrue(FileRemover.should_remove_file("./src/__init__.py", index))
+        self.assertFalse(FileRemover.should_remove_file("./src/main.md", index))
+        self.assertFalse(FileRemover.should_remove_file("./src/utils/file_util_test.py", code_file_path_list))
+        self.assertTrue(FileRemover.should_remove_file("./utils/file_util.py", code_file_path_list))
+
+    def test_prepare_generation(self):
+        self.file_remover.prepare_generation()
+        self.assertEqual(self.get_remaining_files(), {path for path, is_kept in GENERATED_FILES.items() if is_kept})
+        self.assertFalse(os.path.isdir(os.path.join(self.target_dir, "sample/old")))  # 空フォルダも削除
+
+    def test_dry_run(self):
+        self.magic_info.is_dry_run = True
+        self.file_remover.prepare_generation()
+        self.assertEqual(self.get_remaining_files(), set(GENERATED_FILES))
+        self.assertIn("dry-run: 削除対象ファイル数: 3", self.magic_info.history_info)
+
+    def test_empty_structure(self):
+        FileUtil.write_file(self.magic_info.file_info.structure_file_path, "")
+        self.file_remover.prepare_generation()
+        self.assertEqual(self.get_remaining_files(), set(GENERATED_FILES))
+
+    def test_zoltraak_command(self):
+        params = ZoltraakParams(canonical_name="sample", dry_run=True)
+        self.assertIn("--dry_run", params.get_zoltraak_command())
+        self.assertNotIn("--dry_run", ZoltraakParams(canonical_name="sample").get_zoltraak_command())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import unittest
+
+from tests.unit_tests.helper import SampleProjectTestCase
+from zoltraak.core.prompt_manager import PromptManager
+from zoltraak.generator.file_analyzer import FileAnalyzer
+from zoltraak.generator.gencode import CodeGenerator
+from zoltraak.generator.gencodebase import CodeBaseGenerator
+from zoltraak.schema.schema import MagicLayer
+from zoltraak.utils.file_util import FileUtil
+
+CODE_FILES = [f"sample/src/module_{i:02d}.py" for i in range(20)] + ["sample/README.md"]
+
+
+class TestPrepareGeneration(SampleProjectTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_sample_files("\n".join(CODE_FILES), CODE_FILES)
+
+    def test_code_generator(self):
+        self.magic_info.magic_layer = MagicLayer.LAYER_5_CODE_GEN
+        source_target_set_list = CodeGenerator(self.magic_info, PromptManager()).prepare_generation()
+        self.assertEqual(
+            [source_target_set.target_file_path for source_target_set in source_target_set_list],
+            [os.path.join(self.target_dir, rel_path) for rel_path in CODE_FILES],
+        )
+        self.assertEqual(self.magic_info.grimoire_compiler, "general_md.md")  # 最後のファイル(README.md)に合わせる
+
+    def test_code_base_generator(self):
+        self.magic_info.magic_layer = MagicLayer.LAYER_9_CODE_GEN_FINAL
+        source_target_set_list = CodeBaseGenerator(self.magic_info, PromptManager()).prepare_generation()
+        self.assertEqual(len(source_target_set_list), 20)  # pyファイルだけ
+        self.assertTrue(source_target_set_list[0].target_file_path.endswith("module_00.py"))
+        self.assertEqual(self.magic_info.grimoire_compiler, "dev_obj_final.md")
+
+    def test_file_analyzer(self):
+        self.magic_info.magic_layer = MagicLayer.LAYER_2_1_AFFECTED_FILE_LIST_GEN
+        FileUtil.write_file(
+            self.magic_info.file_info.request_file_path,
+            "# 要求\n### 修正対象のファイルパス\n- sample/src/module_01.py\n- sample/src/module_02.py\n",
+        )
+        source_target_set_list = FileAnalyzer(self.magic_info, PromptManager()).prepare_generation()
+        self.assertEqual(len(source_target_set_list), 2)
+        merged_file_path = source_target_set_list[0].source_file_path
+        self.assertIn("### 修正対象のファイルパス", FileUtil.read_file(merged_file_path))
+
+        # 内容が同じなら書き込まない
+        os.utime(merged_file_path, ns=(0, 0))
+        FileAnalyzer(self.magic_info, PromptManager()).prepare_generation()
+        self.assertEqual(os.stat(merged_file_path).st_mtime_ns, 0)
+        self.assertFalse(FileUtil.write_file_if_changed(merged_file_path, FileUtil.read_file(merged_file_path) + "\n"))
+        self.assertTrue(FileUtil.write_file_if_changed(merged_file_path, "changed"))
+
+
+if __name__ == "__main__":
+    unittest.main()
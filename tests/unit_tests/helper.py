@@ -1,9 +1,15 @@
 import inspect
+import os
+import tempfile
 import unittest
 import unittest.mock
+from collections.abc import Iterable
 from typing import Any
 from unittest.mock import MagicMock, patch
 
+from zoltraak.schema.schema import FileInfo, MagicInfo
+from zoltraak.utils.file_util import FileUtil
+
 
 class MockManager:
     """複数のモックをmock_nameという名前でアクセスできるようにするクラス"""
@@ -136,3 +142,28 @@ class BaseTestCase(unittest.TestCase):
     def set_mock_side_effect(self, mock_target: str = "", mock_alias: str = "", side_effect: Any = lambda: None):
         # サイドエフェクトを持つモックを設定
         self.mock_manager.set_mock_side_effect(mock_target=mock_target, mock_alias=mock_alias, side_effect=side_effect)
+
+
+class SampleProjectTestCase(unittest.TestCase):
+    """一時フォルダに生成済みのsampleプロジェクト(canonical_name=sample)を用意するテストの共通処理"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.target_dir = os.path.join(self.temp_dir.name, "generated")
+        self.magic_info = MagicInfo()
+        self.magic_info.file_info = FileInfo(
+            canonical_name="sample",
+            structure_file_path=os.path.join(self.temp_dir.name, "structure_sample.md"),
+            request_file_path=os.path.join(self.temp_dir.name, "request_sample.md"),
+            target_dir=self.target_dir,
+            final_dir=self.target_dir + "_final",
+        )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_sample_files(self, structure_content: str, rel_paths: Iterable[str]) -> None:
+        # 構造定義書と生成済みファイル(内容は相対パス)を書き込む
+        FileUtil.write_file(self.magic_info.file_info.structure_file_path, structure_content)
+        for rel_path in rel_paths:
+            FileUtil.write_file(os.path.join(self.target_dir, rel_path), rel_path)
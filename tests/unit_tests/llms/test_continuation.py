@@ -0,0 +1,88 @@
+import gc
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from zoltraak.llms.continuation import ContinuationStore, ContinuationUtil
+
+
+class TestContinuationUtil(unittest.TestCase):
+    def test_is_length_cut(self):
+        self.assertTrue(ContinuationUtil.is_length_cut("length"))
+        self.assertFalse(ContinuationUtil.is_length_cut("stop"))
+        self.assertFalse(ContinuationUtil.is_length_cut(None))
+
+    def test_stitch(self):
+        text = "## 機能要件\n- ログイン機能\n- 検索"
+        # 重複なし
+        self.assertEqual(ContinuationUtil.stitch(text, "機能\n"), text + "機能\n")
+        # 末尾の行を繰り返した場合は重複を除去
+        self.assertEqual(ContinuationUtil.stitch(text, "- ログイン機能\n- 検索機能\n"), text + "機能\n")
+
+    def test_stitch_reopened_fence(self):
+        text = "```python\ndef main():\n"
+        self.assertEqual(ContinuationUtil.stitch(text, "```python\n    pass\n```"), text + "    pass\n```")
+
+    def test_create_continuation_messages(self):
+        messages = [{"role": "user", "content": "prompt"}]
+        with patch("zoltraak.settings.continuation_tail_chars", 3):
+            continuation_messages = ContinuationUtil.create_continuation_messages(messages, "abcdef")
+        self.assertEqual(continuation_messages[0], messages[0])
+        self.assertEqual(continuation_messages[1], {"role": "assistant", "content": "def"})
+        self.assertEqual(continuation_messages[2]["role"], "user")
+
+
+class TestContinuationStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir_patcher = patch("zoltraak.settings.cache_dir", self.temp_dir.name)
+        self.cache_dir_patcher.start()
+        self.messages = [{"role": "user", "content": "prompt"}]
+
+    def tearDown(self):
+        self.cache_dir_patcher.stop()
+        self.temp_dir.cleanup()
+
+    def test_append_load_clear(self):
+        store = ContinuationStore("model", self.messages)
+        self.assertEqual(store.load(), "")
+        store.append("part1 ")
+        store.append("part2")
+        # 実行中の呼び出しの.partは同じプロンプトの別の呼び出しから再開しない
+        self.assertEqual(ContinuationStore("model", self.messages).load(), "")
+
+        del store  # 中断(呼び出しが終了)
+        gc.collect()
+        resumed_store = ContinuationStore("model", self.messages)
+        self.assertEqual(resumed_store.load(), "part1 part2")
+        self.assertEqual(ContinuationStore("model", self.messages).load(), "")  # 引き取り済み
+        resumed_store.clear()
+        self.assertFalse(os.path.isfile(resumed_store.part_file_path))
+
+    def test_other_process(self):
+        ContinuationStore("model", self.messages, generation_id="1234_dead").append("dead ")
+        ContinuationStore("model", self.messages, generation_id="5678_alive").append("alive ")
+        with patch.object(ContinuationStore, "is_process_alive", side_effect=lambda pid: pid == 5678):  # noqa: PLR2004
+            store = ContinuationStore("model", self.messages)
+            self.assertEqual(store.load(), "dead ")
+            self.assertEqual(
+                ContinuationStore("model", self.messages).load(), ""
+            )  # 実行中のプロセスの.partは再開しない
+
+    def test_expired_part(self):
+        store = ContinuationStore("model", self.messages, generation_id="1234_expired")
+        store.append("expired")
+        expired_time = time.time() - 100
+        os.utime(store.part_file_path, (expired_time, expired_time))
+        with (
+            patch("zoltraak.settings.continuation_part_ttl_sec", 10),
+            patch.object(ContinuationStore, "is_process_alive", return_value=False),
+        ):
+            self.assertEqual(ContinuationStore("model", self.messages).load(), "")
+        self.assertFalse(os.path.isfile(store.part_file_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
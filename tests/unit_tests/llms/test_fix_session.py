@@ -0,0 +1,57 @@
+import unittest
+from unittest.mock import MagicMock
+
+from zoltraak.llms.fix_session import FixSession
+
+CODE = "def main():\n    return value\n"
+FIX_RESPONSE = """<<<<<<< SEARCH
+    return value
+=======
+    value = 1
+    return value
+>>>>>>> REPLACE"""
+
+
+class TestFixSession(unittest.TestCase):
+    def setUp(self):
+        self.litellm_api = MagicMock()
+        self.fix_session = FixSession("main.py", self.litellm_api, model_name="gemini/gemini-1.5-flash-latest")
+
+    def get_sent_messages(self, call_index: int) -> list[dict]:
+        return self.litellm_api.generate_response.call_args_list[call_index].args[0]["messages"]
+
+    def test_fix_multi_turn(self):
+        self.litellm_api.generate_response.return_value = FIX_RESPONSE
+        fixed_code = self.fix_session.fix(CODE, "NameError: name 'value' is not defined")
+        self.assertEqual(fixed_code, "def main():\n    value = 1\n    return value\n")
+
+        # 2ターン目はコード全体を送らずエラーだけを送る
+        self.litellm_api.generate_response.return_value = ""
+        self.fix_session.fix(fixed_code, "RuntimeError: other")
+        messages = self.get_sent_messages(1)
+        self.assertEqual([message["role"] for message in messages], ["user", "assistant", "user"])
+        self.assertIn("RuntimeError: other", messages[-1]["content"])
+        self.assertNotIn("def main", messages[-1]["content"])
+
+        # LLM以外でコードが変わった場合は差分だけを送る
+        self.fix_session.fix(fixed_code + "print(main())\n", "RuntimeError: other2")
+        self.assertIn("+print(main())", self.get_sent_messages(2)[-1]["content"])
+
+    def test_reset_by_budget(self):
+        self.fix_session.max_tokens_budget = 10
+        self.litellm_api.generate_response.return_value = FIX_RESPONSE
+        fixed_code = self.fix_session.fix(CODE, "NameError")
+        self.fix_session.fix(fixed_code, "NameError")
+        self.assertEqual(len(self.get_sent_messages(1)), 1)  # 会話をやり直してコード全体から送る
+        self.assertEqual(self.fix_session.reset_count, 1)
+
+    def test_prompt_cache(self):
+        fix_session = FixSession("main.py", self.litellm_api, model_name="claude-3-haiku-20240307")
+        self.litellm_api.generate_response.return_value = FIX_RESPONSE
+        fix_session.fix(CODE, "NameError")
+        first_content = fix_session.messages[0]["content"]
+        self.assertEqual(first_content[0]["cache_control"], {"type": "ephemeral"})
+
+
+if __name__ == "__main__":
+    unittest.main()
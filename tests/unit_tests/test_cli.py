@@ -0,0 +1,27 @@
+import unittest
+from unittest.mock import patch
+
+from zoltraak import cli
+
+
+class TestCli(unittest.TestCase):
+    @patch("zoltraak.cli.display_info_full")
+    @patch("zoltraak.cli.WatchRunner")
+    def test_main_watch(self, mock_watch_runner, mock_display_info_full):
+        argv = ["zoltraak", "watch", "sample.md", "--poll", "--debounce", "0.5", "--no-initial-run"]
+        with patch("sys.argv", argv):
+            cli.main()
+
+        mock_watch_runner.assert_called_once()
+        mock_display_info_full.assert_called_once()
+        load_params, run_workflow, input_path, watcher = mock_watch_runner.call_args.args
+        self.assertTrue(callable(load_params))
+        self.assertTrue(callable(run_workflow))
+        self.assertEqual(input_path, "sample.md")
+        self.assertTrue(watcher.is_polling)
+        self.assertEqual(watcher.debounce_sec, 0.5)
+        mock_watch_runner.return_value.run.assert_called_once_with(is_initial_run=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
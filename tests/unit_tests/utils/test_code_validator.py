@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+from zoltraak.utils.code_validator import CodeValidator
+
+VALID_CODE = """import os
+
+from app.models import User
+
+
+def main(name):
+    user = User(name)
+    return os.path.join(user.name, "x")
+"""
+
+
+class TestCodeValidator(unittest.TestCase):
+    def test_repair_fence_and_prose(self):
+        code = "以下がコードです。\n```python\nprint('ok')\n```\n以上です。"
+        repaired, repairs = CodeValidator.repair(code)
+        self.assertEqual(repaired, "print('ok')\n")
+        self.assertTrue(repairs)
+
+        code = "以下がコードです。\nprint('ok')\n"
+        repaired, _ = CodeValidator.repair(code)
+        self.assertEqual(repaired, "print('ok')\n")
+
+    def test_repair_keeps_valid_code(self):
+        code = 'def main():\n    """使い方\n\n    ```bash\n    run\n    ```\n    """\n    return 1\n'
+        repaired, repairs = CodeValidator.repair(code)
+        self.assertEqual(repaired, code)
+        self.assertEqual(repairs, [])
+
+    def test_repair_keeps_truncated_code(self):
+        code = "import os\n\n\ndef main():\n    print(os.getcwd())\n    print(f(\n"
+        repaired, repairs = CodeValidator.repair(code)
+        self.assertEqual(repaired, code)
+        self.assertEqual(repairs, [])
+
+        result = CodeValidator().validate(code)
+        self.assertEqual(result.code, code)
+        self.assertEqual([d.kind for d in result.diagnostics], ["syntax"])
+
+    def test_syntax_error(self):
+        result = CodeValidator().validate("def main(:\n    pass\n")
+        self.assertFalse(result.is_valid)
+        self.assertEqual(result.diagnostics[0].kind, "syntax")
+
+    def test_undefined_name(self):
+        result = CodeValidator().validate("def main():\n    return undefined_value + len([])\n")
+        self.assertEqual([d.kind for d in result.diagnostics], ["undefined_name"])
+        self.assertIn("undefined_value", result.get_error_message())
+
+    def test_imports_and_batch(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.makedirs(os.path.join(temp_dir, "app"))
+            models_path = os.path.join(temp_dir, "app", "models.py")
+            main_path = os.path.join(temp_dir, "app", "main.py")
+            with open(models_path, "w", encoding="utf-8") as f:
+                f.write("```python\nclass User:\n    def __init__(self, name):\n        self.name = name\n```\n")
+            with open(main_path, "w", encoding="utf-8") as f:
+                f.write(VALID_CODE + "import missing_module_xyz\n")
+            broken_path = os.path.join(temp_dir, "app", "broken.py")
+            with open(broken_path, "w", encoding="utf-8") as f:
+                f.write("```python\ndef broken(:\n```\n")
+
+            self.assertIn("app.models", CodeValidator.build_module_index(temp_dir))
+            result_map = CodeValidator.validate_batch([models_path, main_path, broken_path], temp_dir)
+            self.assertTrue(result_map[models_path].is_valid)
+            with open(models_path, encoding="utf-8") as f:
+                self.assertTrue(f.read().startswith("class User:"))  # 修復して書き戻し
+            self.assertEqual(
+                [d.message for d in result_map[main_path].diagnostics], ["No module named 'missing_module_xyz'"]
+            )
+            self.assertEqual([d.kind for d in result_map[broken_path].diagnostics], ["syntax"])
+            with open(broken_path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), "```python\ndef broken(:\n```\n")  # 直せないものは書き戻さない
+
+
+if __name__ == "__main__":
+    unittest.main()
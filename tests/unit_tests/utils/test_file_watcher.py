@@ -0,0 +1,55 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from zoltraak.utils.file_watcher import FileWatcher
+
+
+class TestFileWatcher(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.watched_path = os.path.join(self.temp_dir.name, "def_test.md")
+        self.other_path = os.path.join(self.temp_dir.name, "other.md")
+        for file_path in (self.watched_path, self.other_path):
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write("before")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_later(self, file_path: str, content: str, delay_sec: float = 0.1) -> threading.Thread:
+        def write():
+            time.sleep(delay_sec)
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(content)
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        return thread
+
+    def check_wait_changes(self, watcher: FileWatcher):
+        try:
+            self.assertEqual(watcher.wait_changes(timeout_sec=0.2), set())
+            threads = [self.write_later(self.other_path, "after"), self.write_later(self.watched_path, "after!")]
+            changed_files = watcher.wait_changes(timeout_sec=3.0)
+            for thread in threads:
+                thread.join()
+            self.assertEqual(changed_files, {self.watched_path})
+        finally:
+            watcher.close()
+
+    def test_wait_changes_polling(self):
+        watcher = FileWatcher([self.watched_path], debounce_sec=0.2, poll_interval_sec=0.05, is_polling=True)
+        self.assertTrue(watcher.is_polling)
+        self.check_wait_changes(watcher)
+
+    def test_wait_changes_default(self):
+        # Linuxではinotify、使えない環境ではポーリングになる
+        watcher = FileWatcher([self.watched_path], debounce_sec=0.2, poll_interval_sec=0.05)
+        self.check_wait_changes(watcher)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import os
+import tempfile
+import unittest
+
+from zoltraak.utils.grimoire_registry import GrimoireRegistry
+
+
+class TestGrimoireRegistry(unittest.TestCase):
+    def setUp(self):
+        GrimoireRegistry.clear()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.grimoire_path = os.path.join(self.temp_dir.name, "compiler.md")
+        self.write_grimoire("# {prompt}\n[source_file_path] {{language}}\ncode: {x}  \n")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        GrimoireRegistry.clear()
+
+    def write_grimoire(self, content: str, mtime_ns: int = 1_000_000_000) -> None:
+        with open(self.grimoire_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.utime(self.grimoire_path, ns=(mtime_ns, mtime_ns))
+
+    def test_render(self):
+        replace_map = {"prompt": "要求", "source_file_path": "a.md", "language": "ja"}
+        content = GrimoireRegistry.render(self.grimoire_path, replace_map)
+        self.assertEqual(content, "# 要求\na.md ja\ncode: {x}")
+
+    def test_cache_by_mtime(self):
+        template = GrimoireRegistry.load(self.grimoire_path)
+        self.assertIs(GrimoireRegistry.load(self.grimoire_path), template)
+
+        self.write_grimoire("{prompt}!", mtime_ns=2_000_000_000)
+        self.assertEqual(GrimoireRegistry.render(self.grimoire_path, {"prompt": "p"}), "p!")
+
+    def test_missing_file(self):
+        self.assertEqual(GrimoireRegistry.render(os.path.join(self.temp_dir.name, "none.md"), {}), "")
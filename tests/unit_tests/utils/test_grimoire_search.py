@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from zoltraak.utils.grimoire_search import GrimoireIndex, GrimoireSearchResult
+
+
+class TestGrimoireIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.compiler_dir = os.path.join(self.temp_dir.name, "compiler")
+        os.makedirs(self.compiler_dir)
+        self.write_grimoire("dev_web.md", "# Webアプリ開発\nPythonでWebアプリを作成する")
+        self.write_grimoire("book_quiz.md", "# 講義資料\n本の内容からクイズを作成する")
+        self.index_file_path = os.path.join(self.temp_dir.name, "cache", GrimoireIndex.DEF_INDEX_FILE_NAME)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_grimoire(self, file_name: str, content: str) -> None:
+        with open(os.path.join(self.compiler_dir, file_name), "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def create_index(self) -> GrimoireIndex:
+        return GrimoireIndex(self.index_file_path, {"compiler": self.compiler_dir})
+
+    def test_tokenize(self):
+        self.assertEqual(GrimoireIndex.tokenize("Python講義"), ["python", "講義"])
+        self.assertEqual(GrimoireIndex.tokenize("クイズ作成"), ["クイ", "イズ", "ズ作", "作成"])
+
+    def test_search(self):
+        grimoire_index = self.create_index()
+        self.assertTrue(grimoire_index.update())
+        results = grimoire_index.search("クイズを作りたい", categories=("compiler",))
+        self.assertEqual(os.path.basename(results[0].file_path), "book_quiz.md")
+
+    def test_search_all_categories(self):
+        # categories未指定ならarchitectやformatterも対象
+        formatter_dir = os.path.join(self.temp_dir.name, "formatter")
+        os.makedirs(formatter_dir)
+        with open(os.path.join(formatter_dir, "md_comment.md"), "w", encoding="utf-8") as f:
+            f.write("# 整形\nマークダウンにコメントを付与する")
+        grimoire_index = GrimoireIndex(
+            self.index_file_path, {"compiler": self.compiler_dir, "formatter": formatter_dir}
+        )
+        grimoire_index.update()
+        results = grimoire_index.search("コメントを付与")
+        self.assertEqual(results[0].category, "formatter")
+        self.assertEqual(grimoire_index.search("コメントを付与", categories=("compiler",)), [])
+
+    def test_incremental_update(self):
+        grimoire_index = self.create_index()
+        grimoire_index.update()
+
+        # 保存済みのインデックスを読み込んだ場合は変更なし
+        grimoire_index = self.create_index()
+        self.assertEqual(len(grimoire_index.doc_map), 2)
+        self.assertFalse(grimoire_index.update())
+
+        os.remove(os.path.join(self.compiler_dir, "dev_web.md"))
+        self.assertTrue(grimoire_index.update())
+        self.assertEqual(len(grimoire_index.doc_map), 1)
+
+    def test_rerank(self):
+        results = [
+            GrimoireSearchResult(os.path.join(self.compiler_dir, name)) for name in ("dev_web.md", "book_quiz.md")
+        ]
+        reranked = GrimoireIndex.rerank("クイズ", results, lambda _: "1")
+        self.assertEqual(reranked[0], results[1])
+        self.assertEqual(GrimoireIndex.rerank("クイズ", results, lambda _: "不明"), results)
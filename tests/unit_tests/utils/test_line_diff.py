@@ -0,0 +1,36 @@
+import difflib
+import random
+import unittest
+
+from zoltraak.utils.diff_util import DiffUtil
+from zoltraak.utils.line_diff import LineDiff
+
+
+class TestLineDiff(unittest.TestCase):
+    def test_unified_diff0_same_format_as_difflib(self):
+        lines1 = ["a", "b", "c", "d"]
+        lines2 = ["a", "x", "c", "d", "e"]
+        expected = "\n".join(difflib.unified_diff(lines1, lines2, lineterm="", n=0))
+        self.assertEqual(LineDiff.unified_diff0(lines1, lines2), expected)
+        self.assertEqual(LineDiff.unified_diff0(lines1, lines1), "")
+
+    def test_opcodes_rebuild_and_minimal(self):
+        rand = random.Random(0)
+        for _ in range(300):
+            a = [rand.randint(0, 5) for _ in range(rand.randint(0, 20))]
+            b = [rand.randint(0, 5) for _ in range(rand.randint(0, 20))]
+            rebuilt = []
+            for tag, i1, i2, j1, j2 in LineDiff.get_opcodes(a, b):
+                rebuilt += a[i1:i2] if tag == "equal" else b[j1:j2]
+            self.assertEqual(rebuilt, b)
+
+            # 一致数はdifflib(非最小)以上
+            matched = sum(size for _, _, size in LineDiff.get_matching_blocks(a, b))
+            matched_difflib = sum(block.size for block in difflib.SequenceMatcher(None, a, b).get_matching_blocks())
+            self.assertGreaterEqual(matched, matched_difflib)
+
+    def test_diff_util_ignore_space(self):
+        self.assertTrue(DiffUtil.is_same_ignore_space("a\n\n  b  \n", "a\nb"))
+        self.assertFalse(DiffUtil.is_same_ignore_space("a\nb", "a\nc"))
+        self.assertEqual(DiffUtil.diff0_ignore_space(" a\n\nb", "a\nb"), "")
+        self.assertEqual(DiffUtil.diff0_ignore_space("a\nb", "a\nc"), "--- \n+++ \n@@ -2 +2 @@\n-b\n+c")
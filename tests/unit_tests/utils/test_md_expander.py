@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+
+from zoltraak.utils.md_expander import MdExpander
+
+
+class TestMdExpander(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_md(self, file_name: str, content: str) -> str:
+        file_path = os.path.join(self.temp_dir.name, file_name)
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return file_path
+
+    def test_expand_tree(self):
+        root_path = self.write_md("spec.md", "# spec\n[a](a.md)")
+        self.write_md("a.md", "# a")
+        self.assertEqual(MdExpander().expand(root_path), "# spec\n[a](a.md)\n\na.md\n# a")
+
+    def test_cycle_and_shared_doc(self):
+        root_path = self.write_md("spec.md", "# spec\n[a](a.md) [b](b.md)")
+        self.write_md("a.md", "# a\n[common](common.md) [spec](spec.md)")
+        self.write_md("b.md", "# b\n[common](common.md)")
+        self.write_md("common.md", "# common")
+
+        md_expander = MdExpander()
+        contents = md_expander.expand(root_path)
+        self.assertEqual(contents.count("# common"), 1)
+        self.assertIn("(既出: common.md を参照)", contents)
+        self.assertIn("(既出: spec.md を参照)", contents)
+        self.assertEqual(len(md_expander.content_map), 4)
+        self.assertIn("- spec.md (reference)", md_expander.format_tree())
+
+    def test_max_chars(self):
+        root_path = self.write_md("spec.md", "# spec\n[a](a.md) [b](b.md)")
+        self.write_md("a.md", "a" * 100)
+        self.write_md("b.md", "# b")
+
+        md_expander = MdExpander(max_chars=50)
+        contents = md_expander.expand(root_path)
+        self.assertIn("展開の上限により省略", contents)
+        self.assertNotIn("# b", contents)
+        self.assertEqual([child.status for child in md_expander.root.children], ["truncated", "skipped"])
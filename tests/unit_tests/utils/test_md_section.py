@@ -0,0 +1,63 @@
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from zoltraak.utils.md_section import MdSectionMap, MdSectionUtil
+
+DUMMY_MD = """前書き
+
+# 要件定義書
+
+## 機能要件
+- ログイン機能
+- 検索機能
+
+```python
+# コード内の見出しは無視
+```
+
+## 非機能要件
+- 応答時間 1秒以内
+
+## 機能要件
+- 重複見出し
+"""
+
+
+class TestMdSectionUtil(unittest.TestCase):
+    def test_split_and_join(self):
+        sections = MdSectionUtil.split(DUMMY_MD)
+        self.assertEqual(
+            [section.key for section in sections], ["", "要件定義書", "機能要件", "非機能要件", "機能要件#2"]
+        )
+        self.assertIn("# コード内の見出しは無視", sections[2].text)
+        self.assertEqual(MdSectionUtil.join(sections), DUMMY_MD)
+
+    def test_get_changed_keys(self):
+        new_md = DUMMY_MD.replace("1秒以内", "2秒以内") + "\n## 追加要件\n- 追加\n"
+        changed_keys = MdSectionUtil.get_changed_keys(MdSectionUtil.split(DUMMY_MD), MdSectionUtil.split(new_md))
+        self.assertEqual(changed_keys, ["非機能要件", "追加要件"])
+
+
+class TestMdSectionMap(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir_patcher = patch("zoltraak.settings.cache_dir", self.temp_dir.name)
+        self.cache_dir_patcher.start()
+
+    def tearDown(self):
+        self.cache_dir_patcher.stop()
+        self.temp_dir.cleanup()
+
+    def test_get_target_keys_and_cache(self):
+        target_sections = MdSectionUtil.split("# 設計\n\n## login\nlogin api design\n\n## search\nsearch api design\n")
+        section_map = MdSectionMap("def_app.md")
+        self.assertEqual(section_map.get_target_keys("機能要件", "search engine", target_sections), ["search"])
+        section_map.save()
+
+        # キャッシュされた対応が優先される
+        self.assertEqual(MdSectionMap("def_app.md").get_target_keys("機能要件", "login", target_sections), ["search"])
+
+
+if __name__ == "__main__":
+    unittest.main()
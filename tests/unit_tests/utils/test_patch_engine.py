@@ -0,0 +1,66 @@
+import unittest
+
+from zoltraak.utils.patch_engine import PatchEngine
+
+CONTENT = """# 要件定義書
+## 機能
+- ログイン
+- ログアウト
+
+## 非機能
+- 応答時間は1秒以内"""
+
+
+class TestPatchEngine(unittest.TestCase):
+    def test_search_replace_exact(self):
+        text = "説明\n<<<<<<< SEARCH\n- ログアウト\n=======\n- ログアウト\n- パスワード変更\n>>>>>>> REPLACE\n"
+        hunks = PatchEngine.parse(text)
+        self.assertEqual(len(hunks), 1)
+        result = PatchEngine.apply(CONTENT, hunks)
+        self.assertTrue(result.is_success)
+        self.assertIn("- ログアウト\n- パスワード変更\n\n## 非機能", result.content)
+        self.assertEqual(hunks[0].match_method, "exact")
+
+    def test_search_replace_ignore_space_and_fuzzy(self):
+        text = (
+            "<<<<<<< SEARCH\n  ## 非機能  \n=======\n## 非機能要件\n>>>>>>> REPLACE\n"
+            "<<<<<<< SEARCH\n- 応答時間は1秒以内です\n=======\n- 応答時間は0.5秒以内\n>>>>>>> REPLACE"
+        )
+        result = PatchEngine.apply(CONTENT, PatchEngine.parse(text))
+        self.assertTrue(result.is_success)
+        self.assertEqual([hunk.match_method for hunk in result.applied_hunks], ["ignore_space", "fuzzy"])
+        self.assertTrue(result.content.endswith("## 非機能要件\n- 応答時間は0.5秒以内"))
+
+    def test_unified_diff(self):
+        text = "--- a\n+++ b\n@@ -3,2 +3,2 @@\n - ログイン\n-- ログアウト\n+- サインアウト\n"
+        result = PatchEngine.apply(CONTENT, PatchEngine.parse(text))
+        self.assertTrue(result.is_success)
+        self.assertIn("- ログイン\n- サインアウト\n", result.content)
+
+    def test_unified_diff_at_eof(self):
+        # 末尾の改行は空行のコンテキストとみなさない(ファイル末尾のhunkも適用できる)
+        text = (
+            "@@ -4,4 +4,4 @@\n-- ログアウト\n+- サインアウト\n\n ## 非機能\n"
+            "-- 応答時間は1秒以内\n+- 応答時間は0.5秒以内\n"
+        )
+        hunks = PatchEngine.parse(text)
+        self.assertEqual(hunks[0].search, "- ログアウト\n\n## 非機能\n- 応答時間は1秒以内")
+        result = PatchEngine.apply(CONTENT, hunks)
+        self.assertTrue(result.is_success)
+        self.assertEqual(result.applied_hunks[0].match_method, "exact")
+        self.assertTrue(result.content.endswith("- サインアウト\n\n## 非機能\n- 応答時間は0.5秒以内"))
+
+    def test_failed_hunk(self):
+        text = "<<<<<<< SEARCH\n- 存在しない行\n=======\n- 何か\n>>>>>>> REPLACE"
+        result = PatchEngine.apply(CONTENT, PatchEngine.parse(text))
+        self.assertFalse(result.is_success)
+        self.assertEqual(result.content, CONTENT)
+        self.assertEqual(len(result.failed_hunks), 1)
+
+    def test_parse_not_patch(self):
+        self.assertEqual(PatchEngine.parse("dummy_diff"), [])
+
+    def test_validate(self):
+        self.assertTrue(PatchEngine.validate("x = 1\n", "a.py"))
+        self.assertFalse(PatchEngine.validate("x = (\n", "a.py"))
+        self.assertFalse(PatchEngine.validate("  \n", "a.md"))
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+
+from zoltraak.utils.file_util import FileUtil
+from zoltraak.utils.structure_manifest import StructureManifest, StructurePathKind
+
+STRUCTURE_CONTENT = """# ファイル・フォルダ構成
+
+以下の構成です。
+
+```plaintext
+sample/pyproject.toml
+- sample/README.md
+├── sample/src/main.py  # エントリポイント
+./sample/src/utils/
+sample/src/main.py
+sample/Dockerfile
+sample/docs/日本語.md
+sample/../outside.py
+sample/src/*.py
+```
+"""
+
+
+class TestStructureManifest(unittest.TestCase):
+    def test_parse(self):
+        manifest = StructureManifest.from_content(STRUCTURE_CONTENT)
+        self.assertEqual(
+            manifest.rel_paths,
+            [
+                "sample/pyproject.toml",
+                "sample/README.md",
+                "sample/src/main.py",
+                "sample/Dockerfile",
+                "sample/docs/日本語.md",
+            ],
+        )
+        self.assertEqual(
+            manifest.rejected_lines,
+            [
+                "# ファイル・フォルダ構成",
+                "以下の構成です。",
+                "./sample/src/utils/",
+                "sample/../outside.py",
+                "sample/src/*.py",
+            ],
+        )
+        self.assertIs(StructureManifest.from_content(STRUCTURE_CONTENT), manifest)
+
+    def test_parse_line_description(self):
+        # 末尾の説明は"# コメント"と同様に除く
+        self.assertEqual(StructureManifest.parse_line("src/main.py - エントリポイント"), "src/main.py")
+        self.assertEqual(StructureManifest.parse_line("├── src/db.py: DBアクセス"), "src/db.py")
+        self.assertEqual(StructureManifest.parse_line("src/api.py：API定義"), "src/api.py")
+        self.assertEqual(StructureManifest.parse_line("src/my-app.py"), "src/my-app.py")
+        self.assertEqual(StructureManifest.parse_line("説明: 以下の構成です"), "")
+
+    def test_resolve(self):
+        manifest = StructureManifest.from_content(STRUCTURE_CONTENT)
+        base_dir = os.path.abspath("generated")
+        entries = manifest.resolve(base_dir, "sample")
+        self.assertEqual(entries[2].file_path, os.path.join(base_dir, "sample/src/main.py"))
+        self.assertEqual(entries[2].kind, StructurePathKind.PYTHON)
+        self.assertEqual(entries[3].kind, StructurePathKind.NO_EXT)
+        self.assertEqual(entries[1].code_base_file_path, os.path.join(base_dir, "sample/README.md.md"))
+        self.assertEqual(entries[2].requirement_file_path, os.path.join(base_dir, "sample/src/main_requirement.md"))
+        self.assertEqual(
+            entries[2].info_structure_file_path_merged, os.path.join(base_dir, "sample/src/info_structure.md")
+        )
+        # canonical_nameが含まれない場合は付与する
+        self.assertEqual(
+            manifest.get_file_paths(base_dir, "other")[0], os.path.join(base_dir, "other/sample/pyproject.toml")
+        )
+
+    def test_load_and_diff(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            structure_file_path = os.path.join(temp_dir, "structure_sample.md")
+            FileUtil.write_file(structure_file_path, STRUCTURE_CONTENT)
+            old_manifest = StructureManifest.load(structure_file_path)
+            self.assertEqual(
+                FileUtil.read_structure_file_content(structure_file_path, temp_dir, "sample"),
+                old_manifest.get_file_paths(temp_dir, "sample"),
+            )
+
+            FileUtil.write_file(structure_file_path, "sample/README.md\nsample/src/app.py\n")
+            new_manifest = StructureManifest.load(structure_file_path)
+            diff = old_manifest.diff(new_manifest)
+            self.assertEqual(diff.added, ["sample/src/app.py"])
+            self.assertEqual(
+                diff.removed,
+                ["sample/Dockerfile", "sample/docs/日本語.md", "sample/pyproject.toml", "sample/src/main.py"],
+            )
+            self.assertTrue(new_manifest.diff(new_manifest).is_empty())
+
+
+if __name__ == "__main__":
+    unittest.main()
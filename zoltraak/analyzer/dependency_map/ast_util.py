@@ -6,3 +6,29 @@ def ast_parse(content: str) -> ast.AST:
         return ast.parse(content)
     except SyntaxError:
         return ast.AST()
+
+
+def extract_metadata(tree: ast.AST) -> dict:
+    """metadata()関数がreturnするdictリテラルからメタデータを抽出(tags, category, description)"""
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.FunctionDef) and node.name == "metadata"):
+            continue
+        for child in ast.walk(node):
+            if not (isinstance(child, ast.Return) and child.value is not None):
+                continue
+            try:
+                value = ast.literal_eval(child.value)
+            except (ValueError, TypeError, SyntaxError, RecursionError):
+                return {}
+            if not isinstance(value, dict):
+                return {}
+            metadata = {}
+            if "tags" in value:
+                metadata["tags"] = sorted(str(tag) for tag in value["tags"])
+            if "category" in value:
+                metadata["category"] = str(value["category"])
+            if "description" in value:
+                metadata["description"] = str(value["description"])
+            return metadata
+        break
+    return {}
@@ -1,4 +1,5 @@
 import difflib
+import hashlib
 from pathlib import Path
 
 from zoltraak.analyzer.dependency_map.dependency_manager_base import DependencyManagerBase
@@ -8,14 +9,22 @@ from zoltraak.analyzer.dependency_map.dependency_types import ChangeImpactResult
 class ChangeImpactAnalyzer:
     def __init__(self, dependency_manager: DependencyManagerBase):
         self.dm = dependency_manager
+        self._diff_cache: dict[tuple[Path, str, str], list[str]] = {}  # (ファイル, 旧hash, 新hash) => 差分
 
     def analyze_change(self, file_path: Path, new_content: str) -> ChangeImpactResult:
-        """変更の影響範囲を分析"""
+        """変更の影響範囲を分析(影響範囲はdmの逆引きインデックスから取得するので再スキャンしない)"""
         with open(file_path, encoding="utf-8") as f:
             old_content = f.read()
 
-        # 差分を解析
-        diff = difflib.unified_diff(old_content.splitlines(), new_content.splitlines())
+        # 差分を解析(同じ変更内容なら前回の結果を使う)
+        cache_key = (
+            Path(file_path),
+            hashlib.sha256(old_content.encode("utf-8")).hexdigest(),
+            hashlib.sha256(new_content.encode("utf-8")).hexdigest(),
+        )
+        if cache_key not in self._diff_cache:
+            diff = difflib.unified_diff(old_content.splitlines(), new_content.splitlines())
+            self._diff_cache[cache_key] = list(diff)
 
         # 影響を受けるファイルを特定
         affected_files = self.dm.find_affected_files(file_path)
@@ -23,4 +32,6 @@ class ChangeImpactAnalyzer:
         # 必要なテストを特定
         tests_to_run = self.dm.suggest_test_targets(file_path)
 
-        return ChangeImpactResult(affected_files=affected_files, tests_to_run=tests_to_run, diff_summary=list(diff))
+        return ChangeImpactResult(
+            affected_files=affected_files, tests_to_run=tests_to_run, diff_summary=self._diff_cache[cache_key]
+        )
@@ -0,0 +1,217 @@
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
+from pathlib import Path
+
+import networkx as nx
+from networkx.drawing import nx_agraph
+
+from zoltraak import settings
+from zoltraak.utils.log_util import log, log_w
+
+
+class DependencyExportFormat(str, Enum):
+    """依存グラフの出力形式(拡張子で判定)"""
+
+    DOT = "dot"  # graphvizのDOT(レイアウトしない)
+    JSON = "json"  # {"nodes": [...], "edges": {ファイル: [importするファイル]}}
+    MERMAID = "mmd"  # mermaidのflowchart
+    PNG = "png"  # 画像(graphvizでレイアウトするので重い => DependencyRendererでバックグラウンド実行)
+    SVG = "svg"
+
+    @staticmethod
+    def from_path(output_path: str) -> "DependencyExportFormat":
+        suffix = Path(output_path).suffix.lstrip(".").lower()
+        if suffix in ("md", "mermaid"):
+            return DependencyExportFormat.MERMAID
+        return DependencyExportFormat(suffix)
+
+    @staticmethod
+    def from_settings() -> list["DependencyExportFormat"]:
+        """settings.dependency_export_formats(カンマ区切り)を変換する(不明な形式は無視)"""
+        export_formats = []
+        for value in settings.dependency_export_formats.split(","):
+            if not value.strip():
+                continue
+            try:
+                export_formats.append(DependencyExportFormat.from_path(f"dummy.{value.strip()}"))
+            except ValueError:
+                log_w("不明な依存グラフの出力形式です: %s", value)
+        return export_formats
+
+    def is_raster(self) -> bool:
+        return self in (DependencyExportFormat.PNG, DependencyExportFormat.SVG)
+
+
+class DependencyExporter:
+    """依存グラフ(nx.DiGraph)をファイルに出力するクラス
+
+    - DOT/JSON/Mermaidはグラフをたどって文字列にするだけなので、大きなグラフでもすぐに書き終わる
+    - 画像はノード数に合わせてレイアウトを選び、DependencyRendererでバックグラウンドで描画する
+    - focus_fileを指定した場合は、依存グラフ上でradius以内のファイルだけを出力する
+    """
+
+    @staticmethod
+    def get_focus_graph(nx_graph: nx.DiGraph, focus_file: Path | None, radius: int = 0) -> nx.DiGraph:
+        """focus_fileから(向きを無視して)radius以内のサブグラフを返す(focus_fileがなければ全体)"""
+        if focus_file is None:
+            return nx_graph
+        focus_file = Path(focus_file)
+        if focus_file not in nx_graph:
+            focus_graph = nx.DiGraph()
+            focus_graph.add_node(focus_file)
+            return focus_graph
+        return nx.ego_graph(nx_graph, focus_file, radius=radius or settings.dependency_focus_radius, undirected=True)
+
+    @staticmethod
+    def export(nx_graph: nx.DiGraph, output_path: str, project_root: Path | str = "") -> str:
+        """拡張子に合わせた形式で出力する(画像は同期で描画する)"""
+        export_format = DependencyExportFormat.from_path(output_path)
+        if export_format.is_raster():
+            return DependencyExporter.render(nx_graph, output_path)
+
+        if export_format == DependencyExportFormat.JSON:
+            content = DependencyExporter.to_json(nx_graph, project_root)
+        elif export_format == DependencyExportFormat.MERMAID:
+            content = DependencyExporter.to_mermaid(nx_graph, project_root)
+        else:
+            content = DependencyExporter.to_dot(nx_graph, project_root)
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        log("依存グラフを出力しました: %s (nodes=%d)", output_path, nx_graph.number_of_nodes())
+        return output_path
+
+    @staticmethod
+    def to_dot(nx_graph: nx.DiGraph, project_root: Path | str = "") -> str:
+        lines = ["strict digraph {"]
+        for node in sorted(nx_graph.nodes, key=str):
+            label = DependencyExporter._get_node_label(nx_graph, node, project_root)
+            lines.append(f"  {DependencyExporter._quote(str(node))} [label={DependencyExporter._quote(label)}];")
+        for src, dst in sorted(nx_graph.edges, key=lambda edge: (str(edge[0]), str(edge[1]))):
+            lines.append(f"  {DependencyExporter._quote(str(src))} -> {DependencyExporter._quote(str(dst))};")
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def to_json(nx_graph: nx.DiGraph, project_root: Path | str = "") -> str:
+        nodes = sorted(DependencyExporter._get_label(node, project_root) for node in nx_graph.nodes)
+        edges = {
+            DependencyExporter._get_label(node, project_root): sorted(
+                DependencyExporter._get_label(dep, project_root) for dep in nx_graph.successors(node)
+            )
+            for node in nx_graph.nodes
+        }
+        return json.dumps({"nodes": nodes, "edges": dict(sorted(edges.items()))}, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def to_mermaid(nx_graph: nx.DiGraph, project_root: Path | str = "") -> str:
+        node_ids = {node: f"n{i}" for i, node in enumerate(sorted(nx_graph.nodes, key=str))}
+        lines = ["graph LR"]
+        for node, node_id in node_ids.items():
+            label = DependencyExporter._get_node_label(nx_graph, node, project_root)
+            label = label.replace('"', "#quot;").replace("\n", "<br/>")
+            lines.append(f'  {node_id}["{label}"]')
+        lines.extend(
+            f"  {node_ids[src]} --> {node_ids[dst]}"
+            for src, dst in sorted(nx_graph.edges, key=lambda edge: (str(edge[0]), str(edge[1])))
+        )
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def get_layout_args(node_count: int) -> tuple[str, str]:
+        """ノード数に合わせて(レイアウトのprog, graphvizの引数)を返す(大きいほど速いレイアウトと低いdpiにする)"""
+        if node_count <= 50:  # noqa: PLR2004
+            return "dot", "-Gdpi=150 -Grankdir=LR -Granksep=1.0 -Gnodesep=0.5 -Nshape=box -Nheight=0.4"
+        if node_count <= 300:  # noqa: PLR2004
+            return "neato", '-Gdpi=96 -Goverlap=false -Gsplines=false -Gsep="+10" -Nshape=box -Nheight=0.4'
+        return "sfdp", "-Gdpi=72 -Goverlap=prism -Gsplines=false -Goutputorder=edgesfirst -Nshape=point"
+
+    @staticmethod
+    def render(nx_graph: nx.DiGraph, output_path: str) -> str:
+        """graphvizでレイアウトして画像に描画する(同期)"""
+        prog, args = DependencyExporter.get_layout_args(nx_graph.number_of_nodes())
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        agraph = nx_agraph.to_agraph(nx_graph)
+        agraph.draw(output_path, prog=prog, args=args)
+        log("依存グラフを描画しました: %s (nodes=%d, prog=%s)", output_path, nx_graph.number_of_nodes(), prog)
+        return output_path
+
+    @staticmethod
+    def _get_node_label(nx_graph: nx.DiGraph, node: Path, project_root: Path | str) -> str:
+        """ノードのlabel属性(なければproject_rootからの相対パス)"""
+        return nx_graph.nodes[node].get("label") or DependencyExporter._get_label(node, project_root)
+
+    @staticmethod
+    def _get_label(node: Path, project_root: Path | str) -> str:
+        if project_root:
+            try:
+                return Path(node).relative_to(project_root).as_posix()
+            except ValueError:
+                pass
+        return str(node)
+
+    @staticmethod
+    def _quote(text: str) -> str:
+        return '"' + text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+
+class DependencyRenderer:
+    """依存グラフの画像の描画をバックグラウンドで実行するクラス
+
+    - submit()はグラフをコピーしてすぐに戻るので、LAYER_5_1の処理は描画を待たない
+    - 同じ出力先への描画を再依頼した場合、未着手の古い依頼は取り消す
+    - dependency_render_max_nodesを超えるグラフは描画しない(テキスト形式を使う)
+    """
+
+    _instance: "DependencyRenderer | None" = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dependency_render")
+        self.pending: dict[str, Future] = {}  # 出力先 => 描画中のFuture
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_instance() -> "DependencyRenderer":
+        with DependencyRenderer._instance_lock:
+            if DependencyRenderer._instance is None:
+                DependencyRenderer._instance = DependencyRenderer()
+            return DependencyRenderer._instance
+
+    def submit(self, nx_graph: nx.DiGraph, output_path: str) -> Future | None:
+        node_count = nx_graph.number_of_nodes()
+        if node_count > settings.dependency_render_max_nodes:
+            log_w("ノード数が多いため依存グラフの画像は作成しません: %s (nodes=%d)", output_path, node_count)
+            return None
+
+        with self._lock:
+            old_future = self.pending.pop(output_path, None)
+            if old_future is not None:
+                old_future.cancel()
+            future = self.executor.submit(DependencyRenderer._render, nx_graph.copy(), output_path)
+            self.pending[output_path] = future
+        log("依存グラフの描画を予約しました: %s (nodes=%d)", output_path, node_count)
+        return future
+
+    def wait(self) -> list[str]:
+        """予約済みの描画の完了を待って、描画できたファイルのリストを返す"""
+        with self._lock:
+            pending, self.pending = self.pending, {}
+        return [output_path for output_path, future in pending.items() if not future.cancelled() and future.result()]
+
+    @staticmethod
+    def _render(nx_graph: nx.DiGraph, output_path: str) -> str:
+        try:
+            return DependencyExporter.render(nx_graph, output_path)
+        except Exception as e:  # noqa: BLE001
+            log_w("依存グラフの描画に失敗しました: %s, %s", output_path, e)
+            return ""
+
+    def __str__(self) -> str:
+        return f"DependencyRenderer(pending={len(self.pending)})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -1,10 +1,18 @@
 import ast
+import os
 from pathlib import Path
 
 import networkx as nx
-from networkx.drawing import nx_agraph
 
+from zoltraak.analyzer.dependency_map.ast_util import extract_metadata
+from zoltraak.analyzer.dependency_map.dependency_exporter import (
+    DependencyExporter,
+    DependencyExportFormat,
+    DependencyRenderer,
+)
 from zoltraak.analyzer.dependency_map.dependency_types import FileMetadata
+from zoltraak.analyzer.dependency_map.reachability_index import ReachabilityIndex
+from zoltraak.utils.log_util import log
 
 
 class DependencyManagerBase:
@@ -12,38 +20,59 @@ class DependencyManagerBase:
         self.project_root = Path(project_root)
         self.nx_graph = nx.DiGraph()
         self.metadata: dict[Path, FileMetadata] = {}
+        self.reachability = ReachabilityIndex(self.nx_graph)
 
-    def scan_project(self) -> None:
-        """プロジェクト全体をスキャンして依存関係を構築"""
+    def scan_project(self) -> list[Path]:
+        """プロジェクト全体をスキャンして依存関係を構築(解析したファイルのリストを返す)"""
+        file_paths = self.list_project_files()
+        for file_path in file_paths:
+            self._analyze_file(file_path)
+        return file_paths
+
+    def list_project_files(self) -> list[Path]:
+        """解析対象のファイルを列挙"""
         # 除外キーワード(.git配下は対象外など)
         ignore_keywords = [".git", "__pycache__", "__init__.py", "site-packages"]
 
-        for file_path in self.project_root.rglob("*.py"):
-            if any(keyword in str(file_path) for keyword in ignore_keywords):
-                continue
-            self._analyze_file(file_path)
+        return [
+            file_path
+            for file_path in self.project_root.rglob("*.py")
+            if not any(keyword in str(file_path) for keyword in ignore_keywords)
+        ]
 
     def find_affected_files(self, changed_file: Path) -> set[Path]:
-        """変更されたファイルに影響を受けるファイルを特定"""
-        try:
-            return set(nx.descendants(self.nx_graph, changed_file))
-        except nx.NetworkXError as e:
-            print("Error in find_affected_files", e)
-            return set()
+        """変更されたファイルに影響を受けるファイル(直接/間接にimportしているファイル)を特定"""
+        return set(self.reachability.get_dependents(changed_file))
 
     def suggest_test_targets(self, changed_file: Path) -> set[Path]:
         """変更に関連するテストファイルを提案"""
-        affected = self.find_affected_files(changed_file)
-        return {p for p in affected if p.stem.startswith("test_")}
+        return set(self.reachability.get_dependent_tests(changed_file))
 
     def get_metadata(self, file_path: Path) -> FileMetadata:
         """ファイルのメタデータを取得"""
         default_metadata = FileMetadata(path=file_path, last_modified=None)
         return self.metadata.get(file_path, default_metadata)
 
-    def write_dependency_file(self, output_path_dot: str) -> None:
-        print("write_dependency_file output_path_dot=", output_path_dot)
-        nx_agraph.write_dot(self.nx_graph, output_path_dot)
+    def get_imported_symbols(self, file_path: Path) -> dict[Path, set[str]]:
+        """file_pathがimportしているファイル => importしている名前(モジュールごとimportの場合は空)"""
+        return {include_file: set() for include_file in self.get_metadata(file_path).include_files}
+
+    def write_dependency_file(self, output_path_dot: str) -> list[str]:
+        """依存関係をDOTで出力する(dependency_export_formatsの他の形式も出力し、画像はバックグラウンドで描画)"""
+        log("write_dependency_file output_path_dot=%s", output_path_dot)
+        output_paths = [DependencyExporter.export(self.nx_graph, output_path_dot, self.project_root)]
+        output_base = os.path.splitext(output_path_dot)[0]
+        for export_format in DependencyExportFormat.from_settings():
+            output_path = f"{output_base}.{export_format.value}"
+            if output_path in output_paths:
+                continue
+            if export_format.is_raster():
+                if DependencyRenderer.get_instance().submit(self.nx_graph, output_path) is None:
+                    continue
+            else:
+                DependencyExporter.export(self.nx_graph, output_path, self.project_root)
+            output_paths.append(output_path)
+        return output_paths
 
     def _analyze_file(self, file_path: Path) -> None:
         """個別ファイルの解析"""
@@ -53,9 +82,4 @@ class DependencyManagerBase:
         """ASTからメタデータを抽出
         TODO: python以外も対応
         """
-        metadata = {}
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef) and node.name == "metadata":
-                metadata = self._parse_metadata(node)
-                break
-        return metadata
+        return extract_metadata(tree)
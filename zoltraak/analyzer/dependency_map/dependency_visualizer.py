@@ -1,41 +1,36 @@
 from pathlib import Path
 
-import pygraphviz as pgv
-
+from zoltraak.analyzer.dependency_map.dependency_exporter import (
+    DependencyExporter,
+    DependencyExportFormat,
+    DependencyRenderer,
+)
 from zoltraak.analyzer.dependency_map.dependency_manager_base import DependencyManagerBase
 
 
 class DependencyVisualizer:
     @staticmethod
     def create_diagram(
-        manager: DependencyManagerBase, focus_file: Path | None, output_path: str = "dependency_graph.png"
+        manager: DependencyManagerBase,
+        focus_file: Path | None,
+        output_path: str = "dependency_graph.png",
+        radius: int = 0,
+        *,
+        is_background: bool = False,
     ) -> str:
-        """依存関係の図を生成し、画像ファイルに保存"""
-        graph = pgv.AGraph(directed=True)
-
-        # 特定ファイルにフォーカスするか、全体の依存関係を表示するかを設定
-        if focus_file:
-            metadata_focus_file = manager.get_metadata(focus_file)
-            relevant_files = {focus_file}
-            relevant_files |= metadata_focus_file.include_files
-            relevant_files |= metadata_focus_file.included_files
-        else:
-            relevant_files = set(manager.metadata.keys())
-
-        # ノードの作成
-        for file in relevant_files:
-            metadata_file = manager.get_metadata(file)
-            label = f"{file!s}\n{metadata_file.category}"
-            graph.add_node(str(file), label=label)
-
-        # エッジの作成(ノード作成完了後に実行する必要あり)
-        for file in relevant_files:
-            metadata_file = manager.get_metadata(file)
-            for dep in metadata_file.include_files & relevant_files:
-                graph.add_edge(str(file), str(dep))
-
-        # 画像として保存
-        graph.layout(prog="dot")
-        graph.draw(output_path)
-
-        return output_path
+        """依存関係の図を生成し、ファイルに保存
+
+        - focus_fileを指定した場合は依存グラフ上でradius以内のファイルだけを含める
+        - 出力形式はoutput_pathの拡張子で決める(dot/json/mmdはすぐに書き出す)
+        - 画像はis_background=Trueならバックグラウンドで描画する(戻り値のパスは描画完了後に作られる)
+        """
+        graph = DependencyExporter.get_focus_graph(manager.nx_graph, focus_file, radius).copy()
+
+        # ノードのラベルにカテゴリを付ける
+        for file in graph.nodes:
+            graph.nodes[file]["label"] = f"{file!s}\n{manager.get_metadata(file).category}"
+
+        if is_background and DependencyExportFormat.from_path(output_path).is_raster():
+            DependencyRenderer.get_instance().submit(graph, output_path)
+            return output_path
+        return DependencyExporter.export(graph, output_path, manager.project_root)
@@ -22,7 +22,7 @@ def handle_file_change(file_path: Path, new_content: str, root_dir: str = ""):
 
     # 可視化
     viz = DependencyVisualizer()
-    diagram = viz.create_diagram(dm, file_path)
+    diagram = viz.create_diagram(dm, file_path, is_background=True)  # 画像は待たない
 
     # LLMコンテキスト生成
     context_gen = LLMContextGenerator(dm)
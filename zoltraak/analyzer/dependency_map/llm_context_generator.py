@@ -1,37 +1,166 @@
+import hashlib
+import threading
+from enum import Enum
 from pathlib import Path
+from typing import ClassVar
 
+import networkx as nx
+
+from zoltraak import settings
 from zoltraak.analyzer.dependency_map.dependency_manager_base import DependencyManagerBase
+from zoltraak.analyzer.dependency_map.python.ast_slicer_py import AstSlicerPy
+from zoltraak.core.context_packer import ContextPacker
+from zoltraak.utils.log_util import log, log_w
+
+
+class ContextSliceMode(str, Enum):
+    """関連ファイルの内容をどこまでコンテキストに含めるか"""
+
+    FULL = "full"  # 全文
+    SIGNATURES = "signatures"  # class/defの宣言とdocstringだけ
+    SYMBOLS = "symbols"  # ターゲットがimportしている定義だけ(それ以外のファイルはSIGNATURES)
 
 
 class LLMContextGenerator:
-    def __init__(self, dependency_manager: DependencyManagerBase):
+    """依存関係からLLM用のコンテキストを生成するクラス
+
+    - 関連ファイルは依存グラフ上の距離が近い順(同じ距離ならimport先を優先)に並べる
+    - max_tokensを超えるファイルはSIGNATURESに落とし、それでも入らなければ含めない
+    - 切り出し結果はファイル内容のhash単位でキャッシュする
+    """
+
+    DEF_MAX_DISTANCE = 2  # 依存グラフ上でこの距離までのファイルを関連ファイルとする
+
+    _slice_cache: ClassVar[dict[str, str]] = {}
+    _slice_cache_lock = threading.Lock()
+
+    def __init__(
+        self,
+        dependency_manager: DependencyManagerBase,
+        mode: str = "",
+        max_tokens: int = 0,
+        max_distance: int = DEF_MAX_DISTANCE,
+    ):
         self.dependency_manager = dependency_manager
+        self.mode = ContextSliceMode(mode or settings.llm_context_mode)
+        self.max_tokens = max_tokens or settings.max_tokens_llm_context
+        self.max_distance = max_distance
 
     def generate_context(self, target_file: Path) -> str:
         """LLM用のコンテキストを生成"""
         metadata = self.dependency_manager.get_metadata(target_file)
 
-        # 関連ファイルを収集
-        related_files = {target_file} | metadata.include_files | metadata.included_files
-
         # コンテキストを構築
         context = [
             "# Project Context",
             f"Target file: {target_file}",
             f"Category: {metadata.category}",
             f"Description: {metadata.description}",
-            "\n# Related Files:",
         ]
+        remaining_tokens = self.max_tokens - ContextPacker.estimate_tokens("\n".join(context)) - 1
 
-        for file in related_files:
-            rel_metadata = self.dependency_manager.get_metadata(file)
-            context.append(f"\n## {file!s}")
-            context.append(f"Category: {rel_metadata.category}")
-            context.append(f"Description: {rel_metadata.description}")
-            with open(file, encoding="utf-8") as f:
-                # TODO: 暫定でpython専用コードとしているが、他言語にも対応する
-                context.append("```python")
-                context.append(f.read())
-                context.append("```")
+        # ターゲットファイルは全文(予算の半分まで)
+        target_content = self._read_file(target_file)
+        if target_content:
+            overhead_tokens = ContextPacker.estimate_tokens(self._format_section(target_file, "", ""))
+            target_content = ContextPacker.truncate(target_content, max(0, remaining_tokens // 2 - overhead_tokens))
+            target_section = self._format_section(target_file, "", target_content)
+            context.append(target_section)
+            remaining_tokens -= ContextPacker.estimate_tokens(target_section) + 1  # +1は結合時の改行と端数の分
+
+        # 関連ファイルを距離の近い順に予算内で追加
+        context.append("\n# Related Files:")
+        remaining_tokens -= ContextPacker.estimate_tokens(context[-1]) + 1
+        imported_symbols = self.dependency_manager.get_imported_symbols(target_file)
+        omitted_files = []
+        for distance, file in self.rank_related_files(target_file):
+            content = self._read_file(file)
+            if not content:
+                continue
+            section = ""
+            symbols = imported_symbols.get(file, set())
+            for candidate_mode in self._get_mode_candidates():
+                mode = LLMContextGenerator.get_effective_mode(candidate_mode, symbols)
+                sliced = self.slice_content(content, mode, symbols)
+                section = self._format_section(file, f"Distance: {distance}, Slice: {mode.value}", sliced)
+                if ContextPacker.estimate_tokens(section) + 1 <= remaining_tokens:
+                    break
+                section = ""
+            if not section:
+                omitted_files.append(file)
+                continue
+            context.append(section)
+            remaining_tokens -= ContextPacker.estimate_tokens(section) + 1
 
+        if omitted_files:
+            log("トークン予算を超えるため関連ファイルを省略しました: %d件 %s", len(omitted_files), omitted_files[:5])
         return "\n".join(context)
+
+    def rank_related_files(self, target_file: Path) -> list[tuple[int, Path]]:
+        """関連ファイルを(距離, ファイル)の近い順で返す"""
+        nx_graph = self.dependency_manager.nx_graph
+        metadata = self.dependency_manager.get_metadata(target_file)
+        if target_file in nx_graph:
+            distance_map = nx.single_source_shortest_path_length(
+                nx_graph.to_undirected(as_view=True), target_file, cutoff=self.max_distance
+            )
+        else:
+            distance_map = dict.fromkeys(metadata.include_files | metadata.included_files, 1)
+        distance_map.pop(target_file, None)
+        return sorted(
+            ((distance, file) for file, distance in distance_map.items()),
+            key=lambda item: (item[0], item[1] not in metadata.include_files, str(item[1])),
+        )
+
+    @staticmethod
+    def slice_content(content: str, mode: ContextSliceMode, symbols: set[str]) -> str:
+        """modeに合わせて内容を切り出す(ファイル内容のhash単位でキャッシュ)"""
+        mode = LLMContextGenerator.get_effective_mode(mode, symbols)
+        if mode == ContextSliceMode.FULL:
+            return content
+
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        cache_key = (
+            f"{content_hash}:{mode.value}:{','.join(sorted(symbols)) if mode == ContextSliceMode.SYMBOLS else ''}"
+        )
+        with LLMContextGenerator._slice_cache_lock:
+            if cache_key in LLMContextGenerator._slice_cache:
+                return LLMContextGenerator._slice_cache[cache_key]
+
+        # TODO: 暫定でpython専用としているが、他言語にも対応する
+        if mode == ContextSliceMode.SYMBOLS:
+            sliced = AstSlicerPy.slice_symbols(content, symbols) or AstSlicerPy.slice_signatures(content)
+        else:
+            sliced = AstSlicerPy.slice_signatures(content)
+        with LLMContextGenerator._slice_cache_lock:
+            LLMContextGenerator._slice_cache[cache_key] = sliced
+        return sliced
+
+    @staticmethod
+    def get_effective_mode(mode: ContextSliceMode, symbols: set[str]) -> ContextSliceMode:
+        if mode == ContextSliceMode.SYMBOLS and not symbols:
+            return ContextSliceMode.SIGNATURES  # importしていないファイル、モジュールごとimportしている場合など
+        return mode
+
+    def _get_mode_candidates(self) -> list[ContextSliceMode]:
+        if self.mode == ContextSliceMode.SIGNATURES:
+            return [ContextSliceMode.SIGNATURES]
+        return [self.mode, ContextSliceMode.SIGNATURES]
+
+    def _format_section(self, file: Path, slice_info: str, content: str) -> str:
+        rel_metadata = self.dependency_manager.get_metadata(file)
+        section = [f"\n## {file!s}", f"Category: {rel_metadata.category}", f"Description: {rel_metadata.description}"]
+        if slice_info:
+            section.append(slice_info)
+        # TODO: 暫定でpython専用コードとしているが、他言語にも対応する
+        section.extend(["```python", content.rstrip("\n"), "```"])
+        return "\n".join(section)
+
+    @staticmethod
+    def _read_file(file: Path) -> str:
+        try:
+            with open(file, encoding="utf-8") as f:
+                return f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            log_w("関連ファイルを読み込めません: %s, %s", file, e)
+            return ""
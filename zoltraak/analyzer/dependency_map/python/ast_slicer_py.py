@@ -0,0 +1,117 @@
+import ast
+
+from zoltraak.analyzer.dependency_map.ast_util import ast_parse
+
+
+class AstSlicerPy:
+    """pythonのソースからLLMに渡す部分だけを切り出すクラス
+
+    - slice_signatures: class/defの宣言行とdocstringだけを残す(本体は...に置き換え)
+    - slice_symbols: 指定した名前のトップレベル定義だけを残す
+    パースできないソースはそのまま返す
+    """
+
+    @staticmethod
+    def slice_signatures(content: str) -> str:
+        tree = ast_parse(content)
+        if not isinstance(tree, ast.Module):
+            return content
+        lines = content.splitlines()
+        sliced_lines = []
+        docstring_node = AstSlicerPy._get_docstring_node(tree)
+        if docstring_node:
+            sliced_lines.extend(lines[docstring_node.lineno - 1 : docstring_node.end_lineno])
+        for node in tree.body:
+            sliced_lines.extend(AstSlicerPy._slice_node_signature(node, lines))
+        return "\n".join(sliced_lines) + "\n" if sliced_lines else ""
+
+    @staticmethod
+    def slice_symbols(content: str, symbols: set[str]) -> str:
+        tree = ast_parse(content)
+        if not isinstance(tree, ast.Module):
+            return content
+        lines = content.splitlines()
+        sliced_blocks = []
+        for node in tree.body:
+            if symbols & AstSlicerPy.get_defined_names(node):
+                start = AstSlicerPy._get_start_lineno(node)
+                sliced_blocks.append("\n".join(lines[start - 1 : node.end_lineno]))
+        return "\n\n".join(sliced_blocks) + "\n" if sliced_blocks else ""
+
+    @staticmethod
+    def get_defined_names(node: ast.stmt) -> set[str]:
+        """トップレベルの文が定義する名前"""
+        if isinstance(node, ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef):
+            return {node.name}
+        if isinstance(node, ast.Assign):
+            return {target.id for target in node.targets if isinstance(target, ast.Name)}
+        if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            return {node.target.id}
+        return set()
+
+    @staticmethod
+    def _slice_node_signature(node: ast.stmt, lines: list[str]) -> list[str]:
+        if isinstance(node, ast.FunctionDef | ast.AsyncFunctionDef):
+            sliced_lines = AstSlicerPy._get_header_lines(node, lines)
+            docstring_node = AstSlicerPy._get_docstring_node(node)
+            if docstring_node:
+                sliced_lines.extend(lines[docstring_node.lineno - 1 : docstring_node.end_lineno])
+            indent = " " * node.body[0].col_offset if node.body[0].lineno > node.lineno else " " * (node.col_offset + 4)
+            sliced_lines.append(f"{indent}...")
+            return sliced_lines
+
+        if isinstance(node, ast.ClassDef):
+            sliced_lines = AstSlicerPy._get_header_lines(node, lines)
+            docstring_node = AstSlicerPy._get_docstring_node(node)
+            if docstring_node:
+                sliced_lines.extend(lines[docstring_node.lineno - 1 : docstring_node.end_lineno])
+            for child in node.body:
+                if child is docstring_node:
+                    continue
+                if isinstance(child, ast.Assign | ast.AnnAssign) and child.lineno == child.end_lineno:
+                    sliced_lines.append(lines[child.lineno - 1])  # クラス変数は1行のものだけ残す
+                else:
+                    sliced_lines.extend(AstSlicerPy._slice_node_signature(child, lines))
+            if len(sliced_lines) == len(AstSlicerPy._get_header_lines(node, lines)):
+                sliced_lines.append(" " * (node.col_offset + 4) + "...")
+            return sliced_lines
+
+        if isinstance(node, ast.Import | ast.ImportFrom) or (
+            isinstance(node, ast.Assign | ast.AnnAssign) and node.lineno == node.end_lineno
+        ):
+            return lines[node.lineno - 1 : node.end_lineno]
+        return []
+
+    @staticmethod
+    def _get_header_lines(node: ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef, lines: list[str]) -> list[str]:
+        """デコレータからbody直前までの宣言部分"""
+        start = AstSlicerPy._get_start_lineno(node)
+        body_start = node.body[0]
+        if body_start.lineno > node.lineno:
+            # 宣言とbodyの間のコメント行は含めない
+            header_lines = lines[start - 1 : node.lineno - 1]
+            for line in lines[node.lineno - 1 : body_start.lineno - 1]:
+                header_lines.append(line)
+                if line.split("#")[0].rstrip().endswith(":"):
+                    break
+            return header_lines
+        # def f(): passのような1行定義
+        header_lines = lines[start - 1 : body_start.lineno]
+        header_lines[-1] = header_lines[-1][: body_start.col_offset].rstrip()
+        return header_lines
+
+    @staticmethod
+    def _get_start_lineno(node: ast.stmt) -> int:
+        decorator_list = getattr(node, "decorator_list", [])
+        return min([node.lineno] + [decorator.lineno for decorator in decorator_list])
+
+    @staticmethod
+    def _get_docstring_node(
+        node: ast.Module | ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef,
+    ) -> ast.Expr | None:
+        if not node.body:
+            return None
+        first = node.body[0]
+        if isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant) and isinstance(first.value.value, str):
+            return first
+        return None
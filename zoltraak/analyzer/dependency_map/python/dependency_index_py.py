@@ -0,0 +1,141 @@
+import ast
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from zoltraak import settings
+from zoltraak.analyzer.dependency_map.ast_util import ast_parse, extract_metadata
+from zoltraak.utils.log_util import log, log_w
+
+
+def parse_python_file(file_path: str) -> dict:
+    """1ファイルをパースしてimport情報とメタデータを返す
+
+    ProcessPoolExecutorから呼ぶためモジュール関数にしている
+    imports: [module, name, level] のリスト(import xの場合はname="")
+    """
+    try:
+        with open(file_path, encoding="utf-8") as f:
+            content = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return {"imports": [], "metadata": {}, "error": str(e)}
+
+    tree = ast_parse(content)
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend([alias.name, "", 0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = node.module or ""
+            imports.extend([module, alias.name, node.level] for alias in node.names)
+    return {"imports": imports, "metadata": extract_metadata(tree)}
+
+
+class DependencyIndexPy:
+    """pythonファイルのパース結果を(path, mtime, size)単位で保存するインデックス
+
+    - cache_dir/dependency_index/<project_rootのhash>.json に保存して次回以降も使う
+    - update()ではmtimeかsizeが変わったファイルだけパースし直す
+    - パースするファイルが多い場合はプロセスプールで並列に処理する
+    """
+
+    DEF_INDEX_VERSION = 1
+    DEF_PARALLEL_MIN_FILES = 16  # これ未満のファイル数ならプロセスプールを使わない
+
+    def __init__(self, project_root: Path | str, cache_dir: str = ""):
+        self.project_root = os.path.abspath(project_root)
+        root_hash = hashlib.sha256(self.project_root.encode("utf-8")).hexdigest()[:16]
+        self.index_file_path = Path(cache_dir or settings.cache_dir) / "dependency_index" / f"{root_hash}.json"
+        self.entries: dict[str, dict] = {}  # 絶対パス => {mtime_ns, size, imports, metadata}
+        self.is_dirty = False
+        self.load()
+
+    def load(self) -> None:
+        if not self.index_file_path.is_file():
+            return
+        try:
+            index_data = json.loads(self.index_file_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            log_w("依存関係インデックスの読み込みに失敗しました: %s, %s", self.index_file_path, e)
+            return
+        if index_data.get("version") != DependencyIndexPy.DEF_INDEX_VERSION:
+            return
+        self.entries = index_data.get("entries", {})
+
+    def save(self) -> None:
+        if not self.is_dirty:
+            return
+        self.index_file_path.parent.mkdir(parents=True, exist_ok=True)
+        index_data = {
+            "version": DependencyIndexPy.DEF_INDEX_VERSION,
+            "project_root": self.project_root,
+            "entries": self.entries,
+        }
+        tmp_path = self.index_file_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(index_data, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(self.index_file_path)
+        self.is_dirty = False
+
+    def update(self, file_paths: list[Path], max_workers: int = 0) -> tuple[list[Path], list[Path]]:
+        """インデックスをfile_pathsに合わせて更新する
+
+        Returns:
+            (パースし直したファイル, 削除されたファイル)
+        """
+        entries = {}
+        changed: list[tuple[Path, os.stat_result]] = []
+        for file_path in file_paths:
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            key = os.path.abspath(file_path)
+            entry = self.entries.get(key)
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                entries[key] = entry
+            else:
+                changed.append((file_path, stat))
+
+        parsed_list = self.parse_all([str(file_path) for file_path, _ in changed], max_workers)
+        for (file_path, stat), parsed in zip(changed, parsed_list, strict=True):
+            entries[os.path.abspath(file_path)] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, **parsed}
+
+        removed_files = [Path(key) for key in self.entries if key not in entries]
+        self.entries = entries
+        if changed or removed_files:
+            self.is_dirty = True
+        log(
+            "依存関係インデックスを更新しました: 全体=%d, 再パース=%d, 削除=%d",
+            len(entries),
+            len(changed),
+            len(removed_files),
+        )
+        return [file_path for file_path, _ in changed], removed_files
+
+    def get(self, file_path: Path) -> dict:
+        return self.entries.get(os.path.abspath(file_path), {"imports": [], "metadata": {}})
+
+    @staticmethod
+    def parse_all(file_paths: list[str], max_workers: int = 0) -> list[dict]:
+        """複数ファイルをパースする(ファイル数が多い場合はプロセスプールで並列化)"""
+        max_workers = max_workers or settings.dependency_scan_max_workers
+        if len(file_paths) < DependencyIndexPy.DEF_PARALLEL_MIN_FILES or max_workers <= 1:
+            return [parse_python_file(file_path) for file_path in file_paths]
+
+        chunksize = max(1, len(file_paths) // (max_workers * 4))
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(parse_python_file, file_paths, chunksize=chunksize))
+        except (OSError, BrokenProcessPool) as e:
+            log_w("プロセスプールが使えないため逐次パースします: %s", e)
+            return [parse_python_file(file_path) for file_path in file_paths]
+
+    def __str__(self) -> str:
+        return f"DependencyIndexPy({self.project_root}, files={len(self.entries)})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -1,203 +1,197 @@
-import ast
 import datetime
-import importlib.util
 import os
-import sys
 from pathlib import Path
 
-from networkx.drawing import nx_agraph
-
-from zoltraak.analyzer.dependency_map.ast_util import ast_parse
+from zoltraak import settings
+from zoltraak.analyzer.dependency_map.dependency_exporter import DependencyExporter, DependencyRenderer
 from zoltraak.analyzer.dependency_map.dependency_manager_base import DependencyManagerBase
 from zoltraak.analyzer.dependency_map.dependency_types import FileMetadata
+from zoltraak.analyzer.dependency_map.python.dependency_index_py import DependencyIndexPy
+from zoltraak.utils.log_util import log
 
 
 class DependencyManagerPy(DependencyManagerBase):
-    def __init__(self, project_root):
-        super().__init__(project_root)
-
-    def _analyze_file(self, file_path: Path) -> None:
-        """個別ファイルの解析"""
-        print("file_path=", file_path)
+    """pythonファイルの依存関係を管理する
 
-        # プロジェクトルートを追加
-        self._add_project_path(file_path)
+    - パース結果はDependencyIndexPyに保存し、変更のあったファイルだけパースし直す
+    - importの解決はスキャンしたファイルから作ったモジュール名の対応表で行う(sys.pathやfind_specは使わない)
+    """
 
-        with open(file_path, encoding="utf-8") as f:
-            content = f.read()
-
-        # ASTを使用して依存関係を抽出
-        tree = ast_parse(content)
-        import_map = self._extract_imports(tree, file_path)
-        print("import_map=", import_map)
-
-        # メタデータを抽出（docstringから）
-        metadata = self._extract_metadata(tree)
+    def __init__(self, project_root, cache_dir: str = ""):
+        super().__init__(project_root)
+        self.index = DependencyIndexPy(self.project_root, cache_dir)
+        self.file_paths: list[Path] = []
+        self.module_map: dict[str, Path] = {}  # モジュール名 => ファイルパス
+        self._module_name_map: dict[Path, str] = {}  # ファイルパス => モジュール名
+        self._package_dir_cache: dict[Path, bool] = {}
+        self._resolve_cache: dict[tuple[str, str, str, int], Path | None] = {}
+
+    def scan_project(self) -> list[Path]:
+        """プロジェクト全体をスキャンして依存関係を構築(パースし直したファイルのリストを返す)"""
+        file_paths = self.list_project_files()
+        changed_files, removed_files = self.index.update(file_paths)
+        self.index.save()
+
+        if set(file_paths) != set(self.file_paths) or self._is_package_dirs_changed():
+            # ファイルや__init__.pyの追加/削除があるとimportの解決先が変わるので全ファイルのエッジを作り直す
+            self.file_paths = file_paths
+            self._build_module_map()
+            self.nx_graph.clear()
+            self.metadata.clear()
+            self.reachability.invalidate()
+            update_files = file_paths
+        else:
+            update_files = changed_files
+
+        for file_path in update_files:
+            self._update_file_node(file_path)
+        self._update_included_files()
+        log(
+            "依存関係を更新しました: files=%d, edges=%d, updated=%d, removed=%d",
+            self.nx_graph.number_of_nodes(),
+            self.nx_graph.number_of_edges(),
+            len(update_files),
+            len(removed_files),
+        )
 
-        # グラフに追加
-        include_files = []  # file_pathがimportするファイルのリスト
-        included_files = []  # file_pathをimportする他のファイルのリスト #TODO: 未実装
+        if settings.is_debug and update_files:
+            os.makedirs("out_png", exist_ok=True)
+            self._draw_dependency_graph(os.path.join("out_png", "dependency_graph_all.png"))
+        return changed_files
+
+    def _update_file_node(self, file_path: Path) -> None:
+        """インデックスのimport情報からfile_pathのノードとエッジを作り直す"""
+        entry = self.index.get(file_path)
+        old_include_files = set()
+        if self.nx_graph.has_node(file_path):
+            old_include_files = set(self.nx_graph.successors(file_path))
+            self.nx_graph.remove_edges_from(list(self.nx_graph.out_edges(file_path)))
         self.nx_graph.add_node(file_path)
-        for org_file_path, dst_file_path in import_map.items():
-            include_files.append(dst_file_path)
-            self.nx_graph.add_edge(org_file_path, dst_file_path)
 
-        # メタデータを保存
+        include_files = set()  # file_pathがimportするファイル
+        for module, name, level in entry["imports"]:
+            resolved_path = self._resolve_import_path(module, name, level, file_path)
+            if resolved_path and resolved_path != file_path:
+                include_files.add(resolved_path)
+                self.nx_graph.add_edge(file_path, resolved_path)
+        self.reachability.update_edges(file_path, old_include_files, include_files)
+
+        # メタデータを保存(included_filesは全ノード更新後に_update_included_files()で設定)
+        metadata = entry.get("metadata", {})
         self.metadata[file_path] = FileMetadata(
             path=file_path,
-            last_modified=datetime.datetime.fromtimestamp(file_path.stat().st_mtime, tz=datetime.timezone.utc),  # noqa: UP017
-            include_files=set(include_files),
-            included_files=set(included_files),
-            tags=metadata.get("tags", set()),
+            last_modified=datetime.datetime.fromtimestamp(entry.get("mtime_ns", 0) / 1e9, tz=datetime.timezone.utc),  # noqa: UP017
+            include_files=include_files,
+            tags=set(metadata.get("tags", [])),
             category=metadata.get("category", "unknown"),
             description=metadata.get("description", ""),
         )
 
-        # 画像として保存
-        output_path_name = os.path.basename(file_path)
-        output_path_path = os.path.join("out_png", "dependency_graph_all_" + output_path_name + ".png")
-        os.makedirs("out_png", exist_ok=True)
-        self._draw_dependency_graph(output_path_path)
-
-    def _extract_imports(self, tree: ast.AST, file_path: Path) -> set[str]:
-        """ASTからimport文を抽出"""
-        import_map = {}
-
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    resolved_path = self._resolve_import_path(alias.name, file_path)
-                    if resolved_path:
-                        import_map[file_path] = resolved_path
-
-            elif isinstance(node, ast.ImportFrom):
-                module = node.module if node.module else ""
-                for alias in node.names:
-                    full_name = f"{module}.{alias.name}" if module else alias.name
-                    resolved_path = self._resolve_import_path(full_name, file_path)
-                    if resolved_path:
-                        import_map[file_path] = resolved_path
-
-        return import_map
-
-    def _draw_dependency_graph(self, output_path: str = "dependency_graph_all.png"):
-        """依存関係の図を生成し、画像ファイルに保存"""
-        agraph = nx_agraph.to_agraph(self.nx_graph)
-
-        # ノードの属性を設定
-        # https://networkx.org/documentation/stable/reference/generated/networkx.drawing.nx_pylab.draw_networkx_nodes.html
-        # ノードの形: shape[so^>v<dph8]
-        #   s: square, o: circle, ^: triangle, >: triangle_right, v: triangle_down
-        #   <: triangle_left, d: diamond, p: pentagon, h: hexagon, 8: octagon
-        agraph.node_attr.update(
-            shape="s",  # ノードの形
-            # width="0.8",  # ノードの幅
-            height="0.4",  # ノードの高さ
-            fixedsize="false",  # サイズを固定
+    def get_imported_symbols(self, file_path: Path) -> dict[Path, set[str]]:
+        """file_pathがimportしているファイル => importしている名前(モジュールごとimportの場合は空)"""
+        imported_symbols: dict[Path, set[str]] = {}
+        whole_module_files = set()
+        for module, name, level in self.index.get(file_path)["imports"]:
+            resolved_path = self._resolve_import_path(module, name, level, file_path)
+            if not resolved_path or resolved_path == file_path:
+                continue
+            symbols = imported_symbols.setdefault(resolved_path, set())
+            absolute_module = self._get_absolute_module(module, level, file_path)
+            module_name = f"{absolute_module}.{name}" if absolute_module else name
+            if name and name != "*" and self.module_map.get(module_name) != resolved_path:
+                symbols.add(name)  # from module import name
+            else:
+                whole_module_files.add(resolved_path)  # import module, from package import module
+        for resolved_path in whole_module_files:
+            imported_symbols[resolved_path] = set()
+        return imported_symbols
+
+    def _update_included_files(self) -> None:
+        """file_pathをimportする他のファイルを設定"""
+        for file_path, file_metadata in self.metadata.items():
+            file_metadata.included_files = set(self.nx_graph.predecessors(file_path))
+
+    def _draw_dependency_graph(self, output_path: str = "dependency_graph_all.png") -> None:
+        """依存関係の図を保存(テキスト形式はすぐに書き出し、画像はバックグラウンドで描画)"""
+        DependencyExporter.export(self.nx_graph, os.path.splitext(output_path)[0] + ".mmd", self.project_root)
+        DependencyRenderer.get_instance().submit(self.nx_graph, output_path)
+
+    def _build_module_map(self) -> None:
+        """スキャンしたファイルからモジュール名 => ファイルパスの対応表を作る"""
+        self.module_map.clear()
+        self._module_name_map.clear()
+        self._resolve_cache.clear()
+        self._package_dir_cache.clear()
+        for file_path in self.file_paths:
+            module_name = self._get_module_name(file_path)
+            self._module_name_map[file_path] = module_name
+            self.module_map.setdefault(module_name, file_path)
+
+    def _get_module_name(self, file_path: Path) -> str:
+        """__init__.pyのあるディレクトリをたどってモジュール名を求める(例: zoltraak.utils.log_util)"""
+        parts = [file_path.stem]
+        current = file_path.parent
+        while current != current.parent and self._is_package_dir(current):
+            parts.append(current.name)
+            current = current.parent
+        return ".".join(reversed(parts))
+
+    def _is_package_dir(self, dir_path: Path) -> bool:
+        if dir_path not in self._package_dir_cache:
+            self._package_dir_cache[dir_path] = (dir_path / "__init__.py").is_file()
+        return self._package_dir_cache[dir_path]
+
+    def _is_package_dirs_changed(self) -> bool:
+        """__init__.pyの追加/削除でパッケージ判定が変わったか(list_project_filesには__init__.pyが含まれないため)"""
+        return any(
+            (dir_path / "__init__.py").is_file() != is_package
+            for dir_path, is_package in self._package_dir_cache.items()
         )
 
-        # レイアウトアルゴリズムの選択
-        # prog=dot  # 階層的レイアウト（デフォルト）
-        # prog=neato  # スプリングモデル
-        # prog=fdp  # スプリングモデル（大規模グラフ向け）
-        # prog=circo # 円形レイアウト
-        # prog=twopi # 放射状レイアウト
-        # prog=sfdp  # 多次元スケーリング
-        prog = "neato"
-
-        # 基本的なレイアウト制御
-        if prog != "dot":
-            agraph.draw(
-                output_path,
-                prog=prog,
-                args="""
-                    -Gdpi=600
-                    -Gsize="10,10!"
-                    -Goverlap=false
-                    -Gsplines=true
-                    -Gsep="+10"
-                    """,
-            )
-        else:  # 階層的レイアウト（dot）の場合のオプション
-            agraph.draw(
-                output_path,
-                prog=prog,
-                args="""
-                    -Gdpi=600
-                    -Gsize="10,10!"
-                    -Grankdir=LR
-                    -Granksep=2.0
-                    -Gnodesep=1.0
-                    """,
-            )
-
-        # 個別のノード位置を指定
-        # A.get_node("node1").attr["pos"] = "100,100!"  # 特定のノードの位置を固定
-        # A.get_node("node2").attr["pos"] = "200,200!"
-
-        # 特定のノードをグループ化（サブグラフ作成）
-        # subgraph = A.add_subgraph(["node1", "node2"], name="cluster_0")
-        # subgraph.graph_attr["style"] = "filled"
-        # subgraph.graph_attr["color"] = "lightgrey"
-        # A.draw(output_path, prog="dot")
-
-    def _resolve_import_path(self, import_name: str, current_file: Path) -> Path | None:
+    def _resolve_import_path(self, module: str, name: str, level: int, current_file: Path) -> Path | None:
         """
-        import文の文字列をファイルパスに解決する
+        import文をプロジェクト内のファイルパスに解決する(結果はキャッシュする)
 
         Args:
-            import_name: 'package.module' 形式のimport文字列
+            module: 'package.module' 形式のモジュール名(from .. import xの場合は空)
+            name: from module import nameのname(import moduleの場合は空)
+            level: 相対インポートの階層(from .x importなら1)
             current_file: 解析対象のPythonファイルのパス
         """
-
-        try:
-            # まずsys.pathにある場所から探す
-            spec = importlib.util.find_spec(import_name)
-            if spec and spec.origin and self._is_valid_path(str(spec.origin)):
-                return Path(spec.origin)
-
-            # 相対インポートの場合は現在のファイルからの相対パスを考慮
-            parts = import_name.split(".")
-            possible_paths = [
-                # 同じディレクトリから探す
-                current_file.parent / f"{parts[-1]}.py",
-                # パッケージとして探す
-                current_file.parent / parts[-1] / "__init__.py",
-            ]
-
-            for path in possible_paths:
-                if path.exists() and self._is_valid_path(str(path)):
-                    return path
-
-        except (ImportError, AttributeError):
-            pass
-
+        cache_key = (str(current_file.parent), module, name, level)
+        if cache_key not in self._resolve_cache:
+            self._resolve_cache[cache_key] = self._resolve_import_path_impl(module, name, level, current_file)
+        return self._resolve_cache[cache_key]
+
+    def _get_absolute_module(self, module: str, level: int, current_file: Path) -> str | None:
+        """相対インポートは現在のパッケージを基準に絶対名にする(解決できない場合はNone)"""
+        if level == 0:
+            return module
+        package_parts = self._get_module_name(current_file).split(".")[:-1]
+        if level - 1 > len(package_parts):
+            return None
+        base_parts = package_parts[: len(package_parts) - (level - 1)]
+        return ".".join([*base_parts, module] if module else base_parts)
+
+    def _resolve_import_path_impl(self, module: str, name: str, level: int, current_file: Path) -> Path | None:
+        module = self._get_absolute_module(module, level, current_file)
+        if module is None:
+            return None
+
+        # from a.b import cはa.b.c(モジュール)を優先し、なければa.b
+        candidates = []
+        if name:
+            candidates.append(f"{module}.{name}" if module else name)
+        if module:
+            candidates.append(module)
+        for candidate in candidates:
+            if candidate in self.module_map:
+                return self.module_map[candidate]
+
+        if level == 0:
+            # パッケージ外のスクリプト向けに同じディレクトリから探す
+            for candidate in candidates:
+                sibling_path = current_file.parent / f"{candidate.split('.')[-1]}.py"
+                if sibling_path in self._module_name_map:
+                    return sibling_path
         return None
-
-    def _is_valid_path(self, file_path: str) -> bool:
-        # フィルタキーワード
-        filter_keywords = [".py"]
-        if not any(keyword in file_path for keyword in filter_keywords):
-            return False
-
-        # 除外キーワード(.git配下は対象外など)
-        ignore_keywords = [".git", ".pyenv", "__pycache__", "__init__.py", "site-packages", "built-in"]
-        if any(keyword in str(file_path) for keyword in ignore_keywords):  # noqa: SIM103
-            return False
-
-        return True
-
-    def _get_project_root(self, file_path: Path) -> Path:
-        """プロジェクトのルートディレクトリを推測"""
-        current = file_path.parent
-        while current != current.parent:
-            if (current / "setup.py").exists() or (current / "pyproject.toml").exists():
-                return current
-            current = current.parent
-        return file_path.parent
-
-    def _add_project_path(self, file_path: Path):
-        """一時的にプロジェクトパスをsys.pathに追加"""
-        project_root = self._get_project_root(file_path)
-        sys.path.insert(0, str(project_root))
-        return project_root
@@ -0,0 +1,134 @@
+from pathlib import Path
+
+import networkx as nx
+
+from zoltraak.utils.log_util import log
+
+
+class ReachabilityIndex:
+    """依存グラフ(import元 => import先)の逆方向の推移閉包をビット集合で保持するクラス
+
+    - get_dependents(x)はxを直接/間接にimportしている全ファイル(= xの変更の影響を受けるファイル)
+    - 直接のimport元はnx_graph.predecessors()(networkxが持つ逆エッジ)をそのまま使う
+    - 構築は強連結成分をまとめたDAGをトポロジカル順にたどり、各ノードの閉包をintのビット集合で作る
+    - エッジの追加は影響するノードだけ差分更新し、削除があった場合は次の問い合わせ時に作り直す
+    - 問い合わせ結果はノード単位でキャッシュする
+    """
+
+    def __init__(self, nx_graph: nx.DiGraph):
+        self.nx_graph = nx_graph
+        self._node_bit: dict[Path, int] = {}  # ノード => ビット位置
+        self._nodes: list[Path] = []  # ビット位置 => ノード
+        self._dependent_bits: dict[Path, int] = {}  # ノード => 影響を受けるノードのビット集合
+        self._test_bits = 0  # テストファイルのビット集合
+        self._dependents_cache: dict[Path, frozenset[Path]] = {}
+        self._tests_cache: dict[Path, frozenset[Path]] = {}
+        self._is_dirty = True
+
+    @staticmethod
+    def is_test_file(file_path: Path) -> bool:
+        return file_path.stem.startswith("test_")
+
+    def invalidate(self) -> None:
+        """次の問い合わせ時に作り直す"""
+        self._is_dirty = True
+        self._dependents_cache.clear()
+        self._tests_cache.clear()
+
+    def rebuild(self) -> None:
+        self._node_bit.clear()
+        self._nodes.clear()
+        self._dependent_bits.clear()
+        self._test_bits = 0
+        self._dependents_cache.clear()
+        self._tests_cache.clear()
+        for node in self.nx_graph.nodes:
+            self._add_node(node)
+
+        # 強連結成分(循環import)を1ノードにまとめたDAGで、import元 => import先の順に閉包を伝播する
+        condensed = nx.condensation(self.nx_graph)
+        component_bits: dict[int, int] = {}  # 成分 => 成分のメンバーのビット集合
+        component_dependents: dict[int, int] = {}  # 成分 => 成分をimportしている全ノードのビット集合
+        for component in nx.topological_sort(condensed):
+            members = condensed.nodes[component]["members"]
+            bits = 0
+            for member in members:
+                bits |= 1 << self._node_bit[member]
+            component_bits[component] = bits
+
+            dependents = 0
+            for pred in condensed.predecessors(component):
+                dependents |= component_dependents[pred] | component_bits[pred]
+            if len(members) > 1:
+                dependents |= bits  # 循環している成分内は互いに影響する
+            component_dependents[component] = dependents
+
+            for member in members:
+                self._dependent_bits[member] = dependents & ~(1 << self._node_bit[member])
+
+        self._is_dirty = False
+        log(
+            "依存関係の逆引きインデックスを構築しました: nodes=%d, components=%d",
+            len(self._nodes),
+            condensed.number_of_nodes(),
+        )
+
+    def update_edges(self, file_path: Path, old_targets: set[Path], new_targets: set[Path]) -> None:
+        """file_pathのimport先がold_targets => new_targetsに変わったことを反映する"""
+        if self._is_dirty:
+            return
+        if old_targets - new_targets:
+            # エッジの削除は閉包から差し引けないので作り直す
+            self.invalidate()
+            return
+
+        for node in [file_path, *new_targets]:
+            if node not in self._node_bit:
+                self._add_node(node)
+        gain = self._dependent_bits[file_path] | (1 << self._node_bit[file_path])
+        for target in new_targets - old_targets:
+            # target以降(targetがimportしている先も含む)は全てfile_pathとその依存元の影響を受ける
+            for node in {target} | nx.descendants(self.nx_graph, target):
+                new_bits = (self._dependent_bits[node] | gain) & ~(1 << self._node_bit[node])
+                if new_bits != self._dependent_bits[node]:
+                    self._dependent_bits[node] = new_bits
+                    self._dependents_cache.pop(node, None)
+                    self._tests_cache.pop(node, None)
+
+    def get_dependents(self, file_path: Path) -> frozenset[Path]:
+        """file_pathを直接/間接にimportしている全ファイル"""
+        if self._is_dirty:
+            self.rebuild()
+        if file_path not in self._dependents_cache:
+            self._dependents_cache[file_path] = self._decode(self._dependent_bits.get(file_path, 0))
+        return self._dependents_cache[file_path]
+
+    def get_dependent_tests(self, file_path: Path) -> frozenset[Path]:
+        """file_pathを直接/間接にimportしているテストファイル"""
+        if self._is_dirty:
+            self.rebuild()
+        if file_path not in self._tests_cache:
+            self._tests_cache[file_path] = self._decode(self._dependent_bits.get(file_path, 0) & self._test_bits)
+        return self._tests_cache[file_path]
+
+    def _add_node(self, node: Path) -> None:
+        bit = len(self._nodes)
+        self._node_bit[node] = bit
+        self._nodes.append(node)
+        self._dependent_bits[node] = 0
+        if ReachabilityIndex.is_test_file(Path(node)):
+            self._test_bits |= 1 << bit
+
+    def _decode(self, bits: int) -> frozenset[Path]:
+        nodes = []
+        while bits:
+            low_bit = bits & -bits
+            nodes.append(self._nodes[low_bit.bit_length() - 1])
+            bits ^= low_bit
+        return frozenset(nodes)
+
+    def __str__(self) -> str:
+        return f"ReachabilityIndex(nodes={len(self._nodes)}, is_dirty={self._is_dirty})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -8,8 +8,11 @@ import zoltraak
 import zoltraak.llms.litellm_api as litellm
 from zoltraak import settings
 from zoltraak.core.magic_workflow import MagicWorkflow
+from zoltraak.core.map_reduce import MapReduce
+from zoltraak.core.watch_runner import WatchRunner
 from zoltraak.schema.schema import MagicInfo, MagicLayer, MagicMode, ZoltraakParams
 from zoltraak.utils.file_util import FileUtil
+from zoltraak.utils.file_watcher import FileWatcher
 from zoltraak.utils.grimoires_util import GrimoireUtil
 from zoltraak.utils.log_util import log, log_i
 from zoltraak.utils.rich_console import display_info_full
@@ -35,6 +38,18 @@ def main() -> None:
     log("========================================")
     log("||         zoltraak cli start         ||")
     log("========================================")
+    if len(sys.argv) > 1 and sys.argv[1] == "watch":
+        watch_main(sys.argv[2:])
+        return
+
+    parser = create_parser()
+    args = parser.parse_args()
+    params = create_params(args)
+    display_info_full(params, title="ZoltraakParams")
+    main_exec(params)
+
+
+def create_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="MarkdownファイルをPythonファイルに変換します", formatter_class=argparse.RawTextHelpFormatter
     )
@@ -88,7 +103,17 @@ def main() -> None:
         help="全レイヤで共通不変の永続的な作業指示です。新規の生成処理のプロンプト冒頭に例外なく適用されます。最小設定推奨。",
         default="",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--dry_run",
+        "--dry-run",
+        action="store_true",
+        help="クリーンアップ(layer_11)で削除せずに削除対象の一覧を報告します。",
+    )
+    return parser
+
+
+def create_params(args: argparse.Namespace) -> ZoltraakParams:
+    """argsからZoltraakParamsを作成する(inputの前処理も行う)"""
     if args.version:  # バージョン情報表示オプションが指定された場合
         show_version_and_exit()  # - バージョン情報を表示して終了
 
@@ -113,9 +138,38 @@ def main() -> None:
     params.magic_layer = args.magic_layer
     params.magic_layer_end = args.magic_layer_end
     params.eternal_intent = args.eternal_intent
+    params.dry_run = args.dry_run
     preprocess_input(args.input, params)
-    display_info_full(params, title="ZoltraakParams")
-    main_exec(params)
+    return params
+
+
+def watch_main(argv: list[str]) -> None:
+    """watchモード(zoltraak watch <mdファイル>): ソースの変更を監視して影響するターゲットだけを再生成する"""
+    parser = create_parser()
+    parser.prog = "zoltraak watch"
+    parser.add_argument(
+        "--debounce", type=float, help="変更が止まってから再生成するまでの秒数", default=settings.watch_debounce_sec
+    )
+    parser.add_argument("--poll", action="store_true", help="inotifyを使わずにポーリングで監視")
+    parser.add_argument("--no-initial-run", "--no_initial_run", action="store_true", help="起動時の全体生成をしない")
+    args = parser.parse_args(argv)
+
+    def load_params() -> ZoltraakParams:
+        params = create_params(args)  # 入力のmdが変わったらpromptを作り直すため毎回argsから作る
+        if not params.canonical_name:
+            show_usage_and_exit()  # watchモードではテキスト入力からの名前生成はしない
+        return params
+
+    def run_workflow(params: ZoltraakParams, target_filter: set[str] | None) -> None:
+        process_markdown_file(params, target_filter=target_filter, is_stream_result=True)
+        litellm.show_used_total_tokens()
+
+    watcher = FileWatcher(
+        [], debounce_sec=args.debounce, poll_interval_sec=settings.watch_poll_interval_sec, is_polling=args.poll
+    )
+    watch_runner = WatchRunner(load_params, run_workflow, args.input or "", watcher)
+    display_info_full(watch_runner.params, title="ZoltraakParams")
+    watch_runner.run(is_initial_run=not args.no_initial_run)
 
 
 def preprocess_input(args_input: str, params: ZoltraakParams) -> None:
@@ -165,14 +219,16 @@ def preprocess_input_prompt(args_input: str, params: ZoltraakParams) -> None:
     if params.prompt:
         # ただし、mdファイルが有効なら中身を展開する
         if params.prompt.endswith(".md") and FileUtil.has_content(params.prompt, 10):
-            params.prompt = "次の資料を参考にしてください。\n" + FileUtil.read_md_recursive(params.prompt)
+            md_content = MapReduce.reduce_if_oversized(FileUtil.read_md_recursive(params.prompt))
+            params.prompt = "次の資料を参考にしてください。\n" + md_content
         return
 
     # inputが有効
     if args_input:
         # ただし、mdファイルかつ有効なら中身を展開する
         if args_input.endswith(".md") and FileUtil.has_content(args_input, 10):
-            params.prompt = "次の資料を参考にしてください。\n" + FileUtil.read_md_recursive(args_input)
+            md_content = MapReduce.reduce_if_oversized(FileUtil.read_md_recursive(args_input))
+            params.prompt = "次の資料を参考にしてください。\n" + md_content
             return
         # mdファイル以外ならpromptとして採用
         params.prompt = args_input
@@ -272,10 +328,13 @@ def show_args(args: argparse.Namespace):
             log(f"args.{arg}={value}")
 
 
-def process_markdown_file(params: ZoltraakParams) -> MagicInfo:
+def process_markdown_file(
+    params: ZoltraakParams, target_filter: set[str] | None = None, *, is_stream_result: bool = False
+) -> MagicInfo:
     """
     Markdownファイルを処理する
     前提： canonical_name で処理対象のmarkdownファイルが指定される
+    target_filter: 指定時はこのターゲットだけを生成する(watchモード用)
     """
     output_dir_abs = os.path.abspath(params.output_dir)
 
@@ -312,6 +371,7 @@ def process_markdown_file(params: ZoltraakParams) -> MagicInfo:
     magic_info.error_message = ""  # 後で設定する
     magic_info.language = params.language
     magic_info.is_debug = False
+    magic_info.is_dry_run = params.dry_run
 
     # prompt_inputを保存する
     FileUtil.write_file(magic_info.file_info.prompt_file_path, magic_info.prompt_input)
@@ -330,6 +390,8 @@ def process_markdown_file(params: ZoltraakParams) -> MagicInfo:
             f.write("")
 
     magic_workflow = MagicWorkflow(magic_info)
+    magic_workflow.target_filter = target_filter
+    magic_workflow.is_stream_result = is_stream_result
 
     new_file_path = magic_workflow.run_loop()
     log("new_file_path: %s", new_file_path)
@@ -1,16 +1,22 @@
 import math
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import ClassVar
 
 from zoltraak import settings
+from zoltraak.core.context_packer import ContextPacker
 from zoltraak.core.prompt_manager import PromptEnum, PromptManager
-from zoltraak.eval.eval import get_score
+from zoltraak.eval.eval_policy import get_policy_score
+from zoltraak.eval.eval_queue import BackgroundEvaluator, EvalTask
+from zoltraak.eval.match_rate import MatchRateEstimator
 from zoltraak.gencode import TargetCodeGenerator
 from zoltraak.llms.litellm_api import LitellmApi, LitellmMetadata, LitellmParams
 from zoltraak.schema.schema import EMPTY_CONTEXT_FILE, MagicInfo, MagicLayer, SourceTargetSet
 from zoltraak.utils.diff_util import DiffUtil
 from zoltraak.utils.file_util import FileUtil
 from zoltraak.utils.log_util import log, log_change, log_e, log_head, log_inout
+from zoltraak.utils.md_section import MdSection, MdSectionMap, MdSectionUtil
+from zoltraak.utils.patch_engine import PatchEngine, PatchResult
 from zoltraak.utils.rich_console import generate_response_with_spinner
 
 
@@ -161,12 +167,7 @@ class BaseConverter:
         log_head("ソースファイルの差分", source_diff, 300)
 
         # source差分比率を計算
-        source_diff_ratio = 1.0
-        if len(new_source_content) > 0:
-            source_diff_ratio = len(source_diff) / len(new_source_content)
-            log("source_diff_ratio=%f", source_diff_ratio)
-        else:
-            log_e("source_diff_ratioの計算失敗： len(new_source_lines)=%d", len(new_source_content))
+        source_diff_ratio = BaseConverter.get_source_diff_ratio(new_source_content, source_diff)
 
         # source_diffを加味したプロンプト(prompt_diff)を作成
         if source_diff_ratio > BaseConverter.SOURCE_DIFF_RATIO_THRESHOLD:
@@ -177,6 +178,16 @@ class BaseConverter:
 
         return False
 
+    @staticmethod
+    def get_source_diff_ratio(new_source_content: str, source_diff: str) -> float:
+        source_diff_ratio = 1.0
+        if len(new_source_content) > 0:
+            source_diff_ratio = len(source_diff) / len(new_source_content)
+            log("source_diff_ratio=%f", source_diff_ratio)
+        else:
+            log_e("source_diff_ratioの計算失敗： len(new_source_lines)=%d", len(new_source_content))
+        return source_diff_ratio
+
     @log_inout
     def update_target_file_from_source_diff(self) -> float:
         """ターゲットファイルをソースファイルの差分から更新する処理
@@ -193,11 +204,28 @@ class BaseConverter:
 
         if self.is_need_handle_new_target_file(old_source_content, new_source_content, source_diff):
             # 新規で再作成が必要な場合
-            return self.handle_new_target_file_with_old_context(old_target_content)
+            return self.rewrite_target_file(old_source_content, new_source_content, old_target_content)
+
+        # mdターゲットは影響するセクションだけを再生成する
+        if (
+            settings.is_section_update
+            and file_info.target_file_path.endswith(".md")
+            and self.update_target_file_by_section(old_source_content, new_source_content)
+        ):
+            return self.get_score_from_target_content()
 
         # 前回ターゲットと今回ソースの適合度判定
-        prompt_final = PromptEnum.FINAL.get_current_prompt(self.magic_info)
-        match_rate = self.get_match_rate_source_and_target_file(old_target_content, new_source_content, prompt_final)
+        # 明らかなケースはローカルで判定して、判断が難しい場合だけLLMに問い合わせる
+        source_diff_ratio = BaseConverter.get_source_diff_ratio(new_source_content, source_diff)
+        estimate = MatchRateEstimator.estimate(
+            old_source_content, new_source_content, old_target_content, source_diff_ratio
+        )
+        match_rate = estimate.match_rate
+        if match_rate is None:
+            prompt_final = PromptEnum.FINAL.get_current_prompt(self.magic_info)
+            match_rate = self.get_match_rate_source_and_target_file(
+                old_target_content, new_source_content, prompt_final
+            )
         # このブロックは無効化： 適合度が高くても処理不要とは限らないため
         # if match_rate >= BaseConverter.MATCH_RATE_THRESHOLD_OK:
         #     # 処理不要につきスキップ
@@ -208,24 +236,167 @@ class BaseConverter:
             # match_rateが低すぎる
             log("MATCH_RATE_THRESHOLD_NG に満たないためターゲットファイルを再作成します。")
             self.magic_info.history_info += f" ->再作成(match_rate不適合={match_rate})"
-            return self.handle_new_target_file_with_old_context(old_target_content)
+            return self.rewrite_target_file(old_source_content, new_source_content, old_target_content)
         # match_rateがMATCH_RATE_THRESHOLD_NG ～ MATCH_RATE_THRESHOLD_OK の場合は処理継続(差分適用モード)
 
         # source_diffを加味したプロンプト(prompt_diff)を作成
-        prompt_diff_order = "\n<<最新の作業指示>>\n" + new_source_content
-        prompt_diff_order += "\n\n<<(注意)重要な変化点(注意)>>\n"
-        prompt_diff_order += source_diff
+        prompt_diff_order = BaseConverter.get_prompt_diff_order(new_source_content, source_diff)
 
         # プロンプトサイズ制限
         if len(prompt_diff_order) > BaseConverter.DEF_MAX_PROMPT_SIZE_FOR_DIFF:
             log("prompt_diff_orderが大きすぎるため、target_fileを再作成します。")
             self.magic_info.history_info += " ->再作成(prompt_diff_order過大)"
-            return self.handle_new_target_file_with_old_context(old_target_content)
+            return self.rewrite_target_file(old_source_content, new_source_content, old_target_content)
 
         self.magic_info.prompt_diff_order = prompt_diff_order
 
         return self.update_target_file_from_target_and_prompt(file_info.target_file_path, prompt_diff_order)
 
+    @staticmethod
+    def get_prompt_diff_order(new_source_content: str, source_diff: str) -> str:
+        prompt_diff_order = "\n<<最新の作業指示>>\n" + new_source_content
+        prompt_diff_order += "\n\n<<(注意)重要な変化点(注意)>>\n"
+        prompt_diff_order += source_diff
+        return prompt_diff_order
+
+    @staticmethod
+    def is_target_over_budget(target_content: str) -> bool:
+        """ターゲットが全文書き換えできる上限を超えているか(超えたら中略せずに部分更新する)"""
+        return ContextPacker.estimate_tokens(target_content) > settings.max_tokens_rewrite_target
+
+    @log_inout
+    def rewrite_target_file(self, old_source_content: str, new_source_content: str, old_target_content: str) -> float:
+        """ターゲットファイルを再作成する(大きすぎる場合は中略して書き換えずにセクション/編集で部分更新する)"""
+        if not BaseConverter.is_target_over_budget(old_target_content):
+            return self.handle_new_target_file_with_old_context(old_target_content)
+
+        file_info = self.magic_info.file_info
+        log("ターゲットが大きすぎるため、再作成せずに部分更新します: %s", file_info.target_file_path)
+        self.magic_info.history_info += " ->部分更新(ターゲット過大)"
+        if file_info.target_file_path.endswith(".md") and self.update_target_file_by_section(
+            old_source_content, new_source_content
+        ):
+            return self.get_score_from_target_content()
+
+        source_diff = DiffUtil.diff0_ignore_space(old_source_content, new_source_content)
+        prompt_diff_order = BaseConverter.get_prompt_diff_order(new_source_content, source_diff)
+        self.magic_info.prompt_diff_order = prompt_diff_order
+        return self.update_target_file_by_edit(file_info.target_file_path, prompt_diff_order)
+
+    @log_inout
+    def update_target_file_by_section(self, old_source_content: str, new_source_content: str) -> bool:
+        """
+        ソースとターゲットを見出し単位に分割して、変更されたソースセクションに対応するターゲットセクションだけを
+        並列に再生成して差し替える関数(それ以外のセクションはバイト単位でそのまま残す)
+
+        Returns:
+            bool: セクション単位で更新した場合はTrue(Falseなら呼び出し元で通常の更新を行う)
+        """
+        target_file_path = self.magic_info.file_info.target_file_path
+        target_sections = MdSectionUtil.split(FileUtil.read_file(target_file_path))
+        if len(target_sections) < 2:  # noqa: PLR2004
+            log("見出しが不足しているためセクション更新しません: %s", target_file_path)
+            return False
+
+        old_source_sections = MdSectionUtil.split(old_source_content)
+        new_source_sections = MdSectionUtil.split(new_source_content)
+        changed_keys = MdSectionUtil.get_changed_keys(old_source_sections, new_source_sections)
+        if not changed_keys:
+            return False
+
+        # 変更されたソースセクション => 影響するターゲットセクション
+        source_text_map = {section.key: section.text for section in old_source_sections}
+        source_text_map.update({section.key: section.text for section in new_source_sections})
+        section_map = MdSectionMap(target_file_path)
+        affected_keys: list[str] = []
+        for source_key in changed_keys:
+            target_keys = section_map.get_target_keys(source_key, source_text_map[source_key], target_sections)
+            if not target_keys:
+                log("対応するターゲットセクションが見つからないためセクション更新しません: %s", source_key)
+                return False
+            affected_keys += [key for key in target_keys if key not in affected_keys]
+
+        affected_ratio = len(affected_keys) / len(target_sections)
+        if affected_ratio > settings.section_update_ratio_threshold:
+            log("影響するセクションが多いためセクション更新しません: ratio=%f", affected_ratio)
+            return False
+
+        # 影響するターゲットセクションを並列に再生成
+        prompt_map = {}
+        for target_section in target_sections:
+            if target_section.key in affected_keys:
+                prompt_map[target_section.key] = self.get_section_update_prompt(
+                    target_section, changed_keys, old_source_sections, new_source_sections
+                )
+        self.save_prompt("\n\n".join(prompt_map.values()), PromptEnum.APPLY)
+        with ThreadPoolExecutor(max_workers=settings.section_update_max_workers) as executor:
+            response_map = dict(
+                zip(prompt_map, executor.map(self.generate_section_response, prompt_map.values()), strict=True)
+            )
+
+        # 再生成したセクションだけを差し替え
+        new_target_sections = []
+        for target_section in target_sections:
+            response = response_map.get(target_section.key, "").strip()
+            if not response:
+                new_target_sections.append(target_section)
+                continue
+            tail = target_section.text[len(target_section.text.rstrip()) :]  # 末尾の改行などは元のまま残す
+            new_target_sections.append(MdSection(target_section.key, target_section.level, response + tail))
+        FileUtil.write_file(target_file_path, MdSectionUtil.join(new_target_sections))
+        section_map.save()
+
+        log(f"{target_file_path}をセクション単位で更新しました。sections={list(response_map)}")
+        self.magic_info.history_info += f" ->セクション更新({len(response_map)}/{len(target_sections)})"
+        return True
+
+    @staticmethod
+    def get_section_update_prompt(
+        target_section: MdSection,
+        changed_keys: list[str],
+        old_source_sections: list[MdSection],
+        new_source_sections: list[MdSection],
+    ) -> str:
+        old_source_map = {section.key: section.text for section in old_source_sections}
+        new_source_map = {section.key: section.text for section in new_source_sections}
+        source_diff = ""
+        for source_key in changed_keys:
+            source_diff += DiffUtil.diff0_ignore_space(
+                old_source_map.get(source_key, ""), new_source_map.get(source_key, "")
+            )
+            source_diff += "\n"
+
+        return f"""
+以下の指示に従って、ターゲットファイルの1セクションを更新してください。
+手順
+　1. 現在のセクションの内容を確認してください。
+  2. ソースファイルの変更内容を確認してください。
+  3. 基本的に現在の内容を尊重して、変更内容に関係する部分だけを修正してください。
+  4. 更新後のセクションの内容のみを、同じ見出し行から出力してください。他の出力は一切不要です。
+
+現在のセクションの内容:
+{target_section.text}
+
+ソースファイルの変更内容:
+{source_diff}
+
+出力内容指示(再掲):
+更新後のセクションの内容のみを、同じ見出し行から出力してください。他の出力は一切不要です。
+        """
+
+    def generate_section_response(self, prompt: str) -> str:
+        """セクション再生成用のLLM呼び出し(並列実行するためmagic_infoは更新しない)"""
+        litellm_metadata = LitellmMetadata.new(generation_name=PromptEnum.APPLY.name)
+        litellm_metadata["magic_layer"] = self.magic_info.magic_layer
+        litellm_params = LitellmParams.new(
+            prompt=prompt,
+            model=settings.model_name_lite,
+            max_tokens=settings.max_tokens_apply_diff,
+            temperature=settings.temperature_apply_diff,
+            metadata=litellm_metadata,
+        )
+        return self.litellm_api.generate_response(litellm_params)
+
     def get_match_rate_source_and_target_file(self, old_target_lines: str, new_source_lines: str, prompt: str) -> int:
         """
         最新のソースファイルと前回のターゲットファイルの適合性を[0-100]のスコアで返します。100が完全適合です。
@@ -306,6 +477,9 @@ class BaseConverter:
         """
         # プロンプトにターゲットファイルの内容を変数として追加
         current_target_code = FileUtil.read_file(target_file_path)
+        if settings.update_mode == "edit" or BaseConverter.is_target_over_budget(current_target_code):
+            # 編集箇所だけをLLMに出力させてローカルで適用する
+            return self.update_target_file_by_edit(target_file_path, prompt_diff_order)
 
         prompt_apply = f"""
 以下の指示に従って、最終的なターゲットファイルの内容のみを出力してください。
@@ -331,26 +505,112 @@ class BaseConverter:
             temperature=settings.max_tokens_generate_code_fix,
             model_name=settings.model_name_lite,
         )
-        target_diff = response.strip()
-        # ターゲットファイルの差分を表示
-        log_head("ターゲットファイルの差分", target_diff)
+        new_target_content = response.strip()
+        log_head("ターゲットファイルの新しい内容", new_target_content)
 
-        # ユーザーに適用方法を尋ねる
-        log("差分をどのように適用しますか?")
-        log("1. AIで適用する")
-        choice = "1"
+        # 出力は最終的なターゲットファイルの全文なので、差分として解釈せずにそのまま書き込む
+        # (編集形式を説明するドキュメントの例をhunkとして部分適用しないため)
+        FileUtil.write_file(target_file_path, new_target_content)
+        log(f"{target_file_path}を更新しました。")
 
-        while True:
-            if choice == "1":
-                # 差分をターゲットファイルに自動で適用
-                self.apply_diff_to_target_file(target_file_path, target_diff)
-                log(f"{target_file_path}に差分を自動で適用しました。")
-                break
-            log_e("論理異常： choice=%d", choice)
-            choice = "1"
+        return self.get_score_from_target_content()
+
+    @log_inout
+    def update_target_file_by_edit(self, target_file_path: str, prompt_diff_order: str) -> float:
+        """
+        ターゲットファイルの編集箇所(SEARCH/REPLACEブロック)だけをLLMに出力させて、PatchEngineで適用する関数
+        適用できなかったブロックだけをLLMに再提示し、それでも失敗した場合は全文適用(apply_diff_to_target_file)に戻す
+
+        Args:
+            target_file_path (str): 現在のターゲットファイルのパス
+            prompt_diff_order (str): ソースファイルの差分などターゲットファイルに適用するべき作業指示を含むprompt
+        """
+        current_target_code = FileUtil.read_file(target_file_path)
+
+        prompt_diff = f"""
+以下の指示に従って、ターゲットファイルの変更箇所だけを出力してください。
+手順
+　1. 現在のターゲットファイルの内容を確認してください。
+  2. 変更内容(依頼内容)を確認してください。
+  3. 基本的に現在の内容を尊重して情報を追加する方向で検討してください。
+  4. 変更が必要な箇所だけを下記の出力形式で出力してください。ファイル全体の再出力は不要です。
+
+現在のターゲットファイルの内容:
+{current_target_code}
+
+変更内容(依頼内容):
+{prompt_diff_order}
 
+{PatchEngine.FORMAT_INSTRUCTION}
+        """
+        response = self.generate_response(
+            prompt_enum=PromptEnum.DIFF,
+            prompt=prompt_diff,
+            max_tokens=settings.max_tokens_propose_diff,
+            temperature=settings.temperature_propose_diff,
+            model_name=settings.model_name_lite,
+        )
+        target_diff = response.strip()
+        log_head("ターゲットファイルの編集", target_diff)
+
+        hunks = PatchEngine.parse(target_diff)
+        if not hunks:
+            log("編集が出力されなかったため変更なしとします。")
+            self.magic_info.history_info += " ->編集なし"
+            return self.get_score_from_target_content()
+
+        patch_result = PatchEngine.apply(current_target_code, hunks)
+        if patch_result.failed_hunks:
+            # 失敗したブロックだけをLLMに修正させて再適用
+            patch_result = self.retry_failed_hunks(patch_result)
+
+        is_valid = PatchEngine.validate(patch_result.content, target_file_path)
+        if patch_result.failed_hunks or not is_valid:
+            log("編集の適用に失敗したため、LLMで全文に適用します。")
+            self.magic_info.history_info += " ->編集失敗(全文適用)"
+            remaining_diff = target_diff  # 検証NGなら元の内容に全ての編集をLLMで適用
+            if is_valid:
+                # 適用できた分は残して、失敗した分だけLLMで適用
+                FileUtil.write_file(target_file_path, patch_result.content)
+                remaining_diff = "\n\n".join(hunk.to_search_replace() for hunk in patch_result.failed_hunks)
+            self.apply_diff_to_target_file(target_file_path, remaining_diff)
+            return self.get_score_from_target_content()
+
+        FileUtil.write_file(target_file_path, patch_result.content)
+        log(f"{target_file_path}に編集を適用しました。件数={len(patch_result.applied_hunks)}")
+        self.magic_info.history_info += f" ->編集適用({len(patch_result.applied_hunks)}件)"
         return self.get_score_from_target_content()
 
+    @log_inout
+    def retry_failed_hunks(self, patch_result: PatchResult) -> PatchResult:
+        """適用できなかったSEARCH/REPLACEブロックだけをLLMに修正させて再適用する"""
+        failed_blocks = "\n\n".join(hunk.to_search_replace() for hunk in patch_result.failed_hunks)
+        prompt_retry = f"""
+以下の編集ブロックは、SEARCHの内容が現在のターゲットファイル内に見つからなかったため適用できませんでした。
+現在のターゲットファイルの内容から該当箇所を正確にコピーしてSEARCHを修正し、同じ形式で出力してください。
+
+現在のターゲットファイルの内容:
+{patch_result.content}
+
+適用できなかった編集ブロック:
+{failed_blocks}
+
+{PatchEngine.FORMAT_INSTRUCTION}
+        """
+        response = self.generate_response(
+            prompt_enum=PromptEnum.DIFF,
+            prompt=prompt_retry,
+            max_tokens=settings.max_tokens_propose_diff,
+            temperature=settings.temperature_propose_diff,
+            model_name=settings.model_name_lite,
+        )
+        retry_hunks = PatchEngine.parse(response)
+        if not retry_hunks:
+            return patch_result
+        retry_result = PatchEngine.apply(patch_result.content, retry_hunks)
+        retry_result.applied_hunks = patch_result.applied_hunks + retry_result.applied_hunks
+        return retry_result
+
     def update_target_file_propose_and_apply(self, target_file_path: str, prompt_diff_order: str) -> float:
         """
         NOTE: 一気に最終outputを出力する方針としたため本関数は廃止する
@@ -404,6 +664,10 @@ class BaseConverter:
         # ターゲットファイルの差分を表示
         log_head("ターゲットファイルの差分", target_diff)
 
+        # 出力はunified diffなので、読み取れる場合はローカルで適用する(LLM呼び出しなし)
+        if self.apply_patch_locally(target_file_path, target_diff):
+            return self.get_score_from_target_content()
+
         # ユーザーに適用方法を尋ねる
         log("差分をどのように適用しますか?")
         log("1. AIで適用する")
@@ -420,6 +684,19 @@ class BaseConverter:
 
         return self.get_score_from_target_content()
 
+    def apply_patch_locally(self, target_file_path: str, target_diff: str) -> bool:
+        """差分(hunk形式)をローカルで適用する(差分であることが分かっている出力にだけ使う)"""
+        target_diff = target_diff.strip("\n")  # 末尾の改行を空行のコンテキストとみなさない
+        hunks = PatchEngine.parse(target_diff)
+        if not hunks:
+            return False
+        patch_result = PatchEngine.apply(FileUtil.read_file(target_file_path), hunks)
+        if not patch_result.is_success or not PatchEngine.validate(patch_result.content, target_file_path):
+            return False
+        FileUtil.write_file(target_file_path, patch_result.content)
+        log(f"{target_file_path}に差分をローカルで適用しました。")
+        return True
+
     @log_inout
     def apply_diff_to_target_file(self, target_file_path: str, target_diff: str) -> str:
         """
@@ -490,7 +767,7 @@ class BaseConverter:
         return self.get_score_from_target_content()
 
     @log_inout
-    def handle_new_target_file_with_old_context(self, old_target_content: str) -> float:  # noqa: ARG002
+    def handle_new_target_file_with_old_context(self, old_target_content: str) -> float:
         """旧ソース全体を付与してターゲットファイル(md_fileまたはpy_file)を新規作成する"""
         file_info = self.magic_info.file_info
         log_change(
@@ -510,13 +787,30 @@ class BaseConverter:
         score_org = self.handle_new_target_file()
         new_target_content = FileUtil.read_file(file_info.target_file_path)
 
-        # llmによるスコア算出
+        if settings.is_background_eval:
+            # 評価は待たずに進めて、スコアが低い場合はバックグラウンド評価の完了時にold_target_contentに戻す
+            source_content = FileUtil.read_file(file_info.source_file_path)
+            return self.submit_background_eval(
+                [
+                    (source_content, new_target_content, BaseConverter.DEF_SCORE_RELATION),
+                    (old_target_content, new_target_content, "input vs output"),
+                ],
+                rollback_content=old_target_content,
+            )
+
+        # 評価ポリシーに従ってスコア算出
+        score = score_org
         if not math.isclose(score_org, BaseConverter.NO_CHECK_SCORE, rel_tol=1e-9):
-            score = get_score(old_target_content, new_target_content)
+            score = get_policy_score(
+                old_target_content,
+                new_target_content,
+                magic_layer=self.magic_info.magic_layer,
+                target_file_path=file_info.target_file_path,
+            )
             log(f"スコア: {score}")
 
         # スコアが低い場合はold_target_contentに戻す
-        min_score_threshold = 0.5
+        min_score_threshold = settings.eval_rollback_threshold
         if score_org < min_score_threshold or score < min_score_threshold:
             log("スコアが低いため、old_target_contentに戻します。score_org=%s, score=%s", score_org, score)
             FileUtil.write_file(file_info.target_file_path, old_target_content)
@@ -645,13 +939,37 @@ class BaseConverter:
         print()
         log(f"\033[32m魔法術式を構築しました: {output_file_path}\033[0m")  # 要件定義書の生成完了メッセージを緑色で表示
 
-    def get_score_from_target_content(
-        self, relation="The input and output of automatic program generation system"
-    ) -> float:
+    DEF_SCORE_RELATION = "The input and output of automatic program generation system"
+
+    def get_score_from_target_content(self, relation=DEF_SCORE_RELATION) -> float:
         file_info = self.magic_info.file_info
         source_content = FileUtil.read_file(file_info.source_file_path)
         target_content = FileUtil.read_file(file_info.target_file_path)
-        return get_score(source_content, target_content, relation)
+        if settings.is_background_eval:
+            return self.submit_background_eval([(source_content, target_content, relation)])
+        return get_policy_score(
+            source_content,
+            target_content,
+            relation,
+            magic_layer=self.magic_info.magic_layer,
+            target_file_path=file_info.target_file_path,
+        )
+
+    def submit_background_eval(self, checks: list[tuple[str, str, str]], rollback_content: str = "") -> float:
+        """評価をバックグラウンドに依頼して、評価なし扱いのスコアを返す"""
+        file_info = self.magic_info.file_info
+        eval_task = EvalTask(
+            target_file_path=file_info.target_file_path,
+            magic_layer=str(self.magic_info.magic_layer),
+            checks=checks,
+            dst_content=FileUtil.read_file(file_info.target_file_path),
+            rollback_content=rollback_content,
+            past_source_file_path=file_info.past_source_file_path,
+            past_target_file_path=file_info.past_target_file_path,
+        )
+        BackgroundEvaluator.get_instance().submit(eval_task)
+        self.magic_info.history_info += " ->評価予約"
+        return BaseConverter.NO_CHECK_SCORE
 
     def __str__(self) -> str:
         return f"{self.name}({self.magic_info.magic_layer})"
@@ -0,0 +1,125 @@
+import hashlib
+import re
+from dataclasses import dataclass
+
+from zoltraak import settings
+from zoltraak.utils.log_util import log
+
+
+@dataclass
+class ContextSection:
+    """プロンプトに詰め込む1セクション"""
+
+    name: str = ""
+    content: str = ""
+    priority: int = 0  # 小さいほど優先(重複ブロックは優先度の高いセクションに残す)
+    max_tokens: int = 0  # セクション単体の上限(0: 無制限)
+    is_fixed: bool = False  # Trueなら重複除去も中略もしない(全文書き換えの元になるターゲットなど)
+
+
+class ContextPacker:
+    """プロンプトに詰め込むコンテキストを重複排除し、トークン予算内に収めるクラス
+
+    処理:
+      1. 優先度順にセクションを段落(空行区切り)に分け、正規化した内容のハッシュで重複段落を除去
+      2. セクション毎のmax_tokensを超える場合は先頭と末尾を残して中略
+      3. 合計がmax_tokensを超える場合は優先度の低いセクションから中略
+    is_fixedのセクションは1～3の対象外(全文をそのまま残す)
+    要約はLLM呼び出しが必要になるため行わない(中略のみ)。
+    """
+
+    BLOCK_SEPARATOR_PATTERN = re.compile(r"\n\s*\n")
+    MIN_DEDUP_BLOCK_CHARS = 40  # 見出しや区切り線などの短い段落は重複扱いしない
+    MIN_KEEP_TOKENS = 200  # 合計予算で中略する場合も最低限残すトークン数
+    HEAD_RATIO = 2 / 3  # 中略時に先頭に残す割合
+
+    def __init__(self, max_tokens: int = 0):
+        self.max_tokens = max_tokens or settings.max_tokens_context_pack
+        self.report: dict = {}
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """トークン数の概算(英数字は4文字で1トークン、日本語などは1文字1トークン)"""
+        ascii_count = sum(1 for c in text if c.isascii())
+        return ascii_count // 4 + (len(text) - ascii_count)
+
+    @staticmethod
+    def get_block_digest(block: str) -> str:
+        lines = [line.strip() for line in block.strip().split("\n")]
+        normalized = "\n".join(line for line in lines if line)
+        if len(normalized) < ContextPacker.MIN_DEDUP_BLOCK_CHARS:
+            return ""
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def truncate(content: str, max_tokens: int) -> str:
+        tokens = ContextPacker.estimate_tokens(content)
+        if max_tokens <= 0 or tokens <= max_tokens:
+            return content
+        omitted_tokens = tokens - max_tokens
+        marker = f"\n...(中略: 約{omitted_tokens}トークン)...\n"
+        keep_tokens = max(0, max_tokens - ContextPacker.estimate_tokens(marker))  # 中略の表記も予算に含める
+        keep_chars = int(len(content) * keep_tokens / tokens)
+        while True:
+            head_chars = int(keep_chars * ContextPacker.HEAD_RATIO)
+            tail_chars = keep_chars - head_chars
+            truncated = content[:head_chars] + marker + (content[-tail_chars:] if tail_chars > 0 else "")
+            # 英数字と日本語の混在で概算がずれた分を詰める
+            overflow_tokens = ContextPacker.estimate_tokens(truncated) - max_tokens
+            if overflow_tokens <= 0 or keep_chars == 0:
+                return truncated
+            keep_chars = max(0, keep_chars - overflow_tokens)
+
+    def pack(self, sections: list[ContextSection]) -> dict[str, str]:
+        """セクション名 => 詰め込み後の内容 を返す(結果はself.reportにも記録)"""
+        packed_map: dict[str, str] = {}
+        section_report: dict[str, dict] = {}
+        seen_digests: set[str] = set()
+        sorted_sections = sorted(sections, key=lambda section: section.priority)
+
+        # 1. 重複除去 + 2. セクション毎の上限
+        for section in sorted_sections:
+            blocks = ContextPacker.BLOCK_SEPARATOR_PATTERN.split(section.content)
+            kept_blocks = []
+            dedup_blocks = 0
+            for block in blocks:
+                digest = ContextPacker.get_block_digest(block)
+                if digest and digest in seen_digests and not section.is_fixed:
+                    dedup_blocks += 1
+                    continue
+                if digest:
+                    seen_digests.add(digest)
+                kept_blocks.append(block)
+            content = "\n\n".join(kept_blocks) if dedup_blocks > 0 else section.content
+            content_truncated = content if section.is_fixed else ContextPacker.truncate(content, section.max_tokens)
+
+            packed_map[section.name] = content_truncated
+            section_report[section.name] = {
+                "priority": section.priority,
+                "tokens_in": ContextPacker.estimate_tokens(section.content),
+                "tokens_out": ContextPacker.estimate_tokens(content_truncated),
+                "dedup_blocks": dedup_blocks,
+                "truncated": content_truncated != content,
+            }
+
+        # 3. 合計の上限(優先度の低いセクションから中略)
+        tokens_total = sum(report["tokens_out"] for report in section_report.values())
+        for section in reversed(sorted_sections):
+            excess_tokens = tokens_total - self.max_tokens
+            if excess_tokens <= 0:
+                break
+            if section.is_fixed:
+                continue
+            report = section_report[section.name]
+            max_tokens = max(ContextPacker.MIN_KEEP_TOKENS, report["tokens_out"] - excess_tokens)
+            if max_tokens >= report["tokens_out"]:
+                continue
+            packed_map[section.name] = ContextPacker.truncate(packed_map[section.name], max_tokens)
+            tokens_out = ContextPacker.estimate_tokens(packed_map[section.name])
+            tokens_total -= report["tokens_out"] - tokens_out
+            report["tokens_out"] = tokens_out
+            report["truncated"] = True
+
+        self.report = {"max_tokens": self.max_tokens, "tokens_total": tokens_total, "sections": section_report}
+        log("context_pack report=%s", self.report)
+        return packed_map
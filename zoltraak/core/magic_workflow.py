@@ -11,14 +11,23 @@ from zoltraak import settings
 from zoltraak.converter.base_converter import BaseConverter
 from zoltraak.converter.converter import MarkdownToPythonConverter
 from zoltraak.converter.md_converter import MarkdownToMarkdownConverter
+from zoltraak.core.context_packer import ContextPacker, ContextSection
+from zoltraak.core.map_reduce import MapReduce
 from zoltraak.core.prompt_manager import PromptManager
+from zoltraak.core.target_lineage import TargetLineage
+from zoltraak.eval.eval_queue import BackgroundEvaluator, EvalResult
+from zoltraak.eval.match_rate import MatchRateEstimator
 from zoltraak.generator.file_analyzer import FileAnalyzer
 from zoltraak.generator.file_remover import FileRemover
 from zoltraak.generator.gencode import CodeGenerator
 from zoltraak.generator.gencodebase import CodeBaseGenerator
+from zoltraak.llms.fix_session import FixSession
+from zoltraak.llms.litellm_api import LitellmApi, LitellmParams
 from zoltraak.schema.schema import FileInfo, MagicInfo, MagicLayer, MagicMode, MagicWorkflowInfo, SourceTargetSet
+from zoltraak.utils.code_validator import CodeValidator
 from zoltraak.utils.diff_util import DiffUtil
 from zoltraak.utils.file_util import FileUtil
+from zoltraak.utils.grimoire_search import GrimoireIndex
 from zoltraak.utils.grimoires_util import GrimoireUtil
 from zoltraak.utils.log_util import log, log_change, log_head_diff, log_i, log_inout, log_progress
 from zoltraak.utils.rich_console import (
@@ -39,8 +48,13 @@ class MagicWorkflow:
         self.magic_info: MagicInfo = magic_info
         self.file_info: FileInfo = magic_info.file_info
         self.prompt_manager: PromptManager = PromptManager()
+        self.litellm_api = LitellmApi()  # ワークフロー内のLLM呼び出し(map-reduceなど)で共有する
+        self.grimoire_index: GrimoireIndex | None = None  # グリモア検索用(SEARCH_GRIMOIREで初回に作成)
         self.converters: list[BaseConverter] = []
         self.workflow_history = []
+        self.lineage = TargetLineage(self.file_info.canonical_name)  # ソース => ターゲットの対応(watchモード用)
+        self.target_filter: set[str] | None = None  # 指定時はこのターゲットだけを生成する(絶対パス)
+        self.is_stream_result = False  # ターゲット単位の結果を完了した順にコンソールに出す
         self.create_converters(self.magic_info, self.prompt_manager)
 
     @log_inout
@@ -84,6 +98,9 @@ class MagicWorkflow:
             log(self.get_log(f"magic_mode set {self.magic_info.magic_mode} => {MagicMode.GRIMOIRE_ONLY}"))
             self.magic_info.magic_mode = MagicMode.GRIMOIRE_ONLY
 
+        # 残りのバックグラウンド評価を反映(低スコアはロールバックして再生成)
+        self.wait_evaluations()
+
         # ループの最後のoutput_file_pathをfinalとして設定して返す
         self.magic_info.file_info.final_output_file_path = self.magic_info.file_info.output_file_path
 
@@ -91,6 +108,40 @@ class MagicWorkflow:
 
         return self.magic_info.file_info.final_output_file_path
 
+    def wait_evaluations(self, file_paths: list[str] | None = None) -> None:
+        """バックグラウンド評価(file_pathsの指定時はそのファイルだけ)の完了を待つ
+
+        - 低スコアでロールバックしたターゲットは、この実行中に生成したレイヤで再生成する(eval_requeue_max回まで)
+        - 上限を超えた場合はロールバックしたままにする(前回ソースを消しているので次回実行で再生成される)
+        """
+        evaluator = BackgroundEvaluator.get_instance()
+        for requeue_count in range(settings.eval_requeue_max + 1):
+            rolled_back_results = [result for result in evaluator.drain(file_paths) if result.is_rolled_back]
+            for result in rolled_back_results:
+                self.workflow_history.append(
+                    f"    {result.magic_layer}(target: {result.target_file_path} ->ロールバック)"
+                )
+            if not rolled_back_results or requeue_count >= settings.eval_requeue_max:
+                return
+            self.requeue_targets(rolled_back_results)
+
+    def requeue_targets(self, eval_results: list[EvalResult]) -> None:
+        """ロールバックしたターゲットだけを生成したレイヤで再生成する"""
+        layer_targets_map: dict[MagicLayer, set[str]] = {}
+        for result in eval_results:
+            layer = MagicLayer.new(result.magic_layer)
+            layer_targets_map.setdefault(layer, set()).add(os.path.abspath(result.target_file_path))
+
+        current_layer, current_filter = self.magic_info.magic_layer, self.target_filter
+        try:
+            for layer, target_file_paths in layer_targets_map.items():
+                log_i(self.get_log(f"低スコアのため再生成します: {layer}, {sorted(target_file_paths)}"))
+                self.magic_info.magic_layer = layer
+                self.target_filter = target_file_paths
+                self.run_converters(layer)
+        finally:
+            self.magic_info.magic_layer, self.target_filter = current_layer, current_filter
+
     @log_inout
     def run_converters(self, layer: MagicLayer) -> tuple[bool, list[float]]:
         log(self.get_log("check layer = " + str(layer)))
@@ -110,12 +161,18 @@ class MagicWorkflow:
         is_gen = False
         if hasattr(converter, "prepare_generation") and callable(converter.prepare_generation):
             # ジェネレータ
-            source_target_set_list = converter.prepare_generation()
+            source_target_set_list = self.filter_source_target_sets(converter.prepare_generation())
             if not source_target_set_list:
                 log("source_target_set_list empty")
                 self.workflow_history.append(self.magic_info.magic_layer + "(source_target_set_list empty)")
                 return True, -1.0
 
+            # このレイヤが読むファイルの評価だけを待つ(他のファイルの評価は並行して進める)
+            self.wait_evaluations(
+                [source_target_set.source_file_path for source_target_set in source_target_set_list]
+                + [source_target_set.context_file_path for source_target_set in source_target_set_list]
+            )
+
             # 非同期用の設定に変更
             self.magic_info.is_async = True
 
@@ -133,6 +190,11 @@ class MagicWorkflow:
 
             progress_bar.close()
 
+            # 生成したpyファイルをレイヤー単位で一括して静的検証(importは生成済みの全ファイルで解決)
+            self.validate_generated_files(
+                [source_target_set.target_file_path for source_target_set in source_target_set_list]
+            )
+
             # 非同期処理の結果を集約
             for magic_info in self.magic_workflow_info.magic_info_list:
                 self.workflow_history.append(magic_info.history_info)
@@ -143,10 +205,53 @@ class MagicWorkflow:
             is_gen = True
         else:
             # コンバーター
+            if not self.is_target_in_filter(self.file_info.target_file_path):
+                log(self.get_log(f"対象外のためスキップします target_file_path = {self.file_info.target_file_path}"))
+                return False, -1.0
+            self.wait_evaluations([self.file_info.source_file_path, self.file_info.context_file_path])
             log(self.get_log(f"run Converter target_file_path = {self.file_info.target_file_path}"))
             score = self.run(converter.convert, self.magic_info)
+            if self.is_stream_result:
+                log_i(f"{self.magic_info.magic_layer} 生成完了: {self.file_info.target_file_path} (score={score})")
         return is_gen, score
 
+    @log_inout
+    def validate_generated_files(self, file_paths: list[str]) -> None:
+        """生成したpyファイルを一括で静的検証して、ローカルで修復できなかった指摘はファイル毎にLLMで修正する
+        生成時(TargetCodeGenerator)はimportを確認しないので、未解決のimportもここで修正する
+        """
+        fix_session_map: dict[str, FixSession] = {}
+        result_map = CodeValidator.validate_batch(file_paths)
+        max_try_count = 3
+        for i in range(max_try_count):
+            invalid_result_map = {file_path: result for file_path, result in result_map.items() if not result.is_valid}
+            if not invalid_result_map:
+                return
+            for file_path, result in invalid_result_map.items():
+                log(self.get_log(f"静的検証でエラーが見つかりました。修正を試みます。try{i}: {file_path}"))
+                fix_session = fix_session_map.setdefault(file_path, FixSession(file_path, self.litellm_api))
+                FileUtil.write_file(file_path, fix_session.fix(result.code, result.get_error_message()))
+            result_map = CodeValidator.validate_batch(file_paths)
+
+        for file_path, result in result_map.items():
+            if not result.is_valid:
+                self.workflow_history.append(f"    {self.magic_info.magic_layer}(静的検証NG: {file_path})")
+
+    def is_target_in_filter(self, target_file_path: str) -> bool:
+        return self.target_filter is None or os.path.abspath(target_file_path) in self.target_filter
+
+    def filter_source_target_sets(self, source_target_set_list: list[SourceTargetSet]) -> list[SourceTargetSet]:
+        """target_filterが指定されている場合は対象のターゲットだけに絞る"""
+        if self.target_filter is None:
+            return source_target_set_list
+        filtered_list = [
+            source_target_set
+            for source_target_set in source_target_set_list
+            if self.is_target_in_filter(source_target_set.target_file_path)
+        ]
+        log(self.get_log(f"target_filterで絞り込みました: {len(source_target_set_list)} => {len(filtered_list)}"))
+        return filtered_list
+
     async def process_source_target_sets(
         self, converter: BaseConverter, source_target_set_list: list[SourceTargetSet], progress_bar: tqdm
     ):
@@ -161,6 +266,7 @@ class MagicWorkflow:
                 target_source_map[target].append(source)
             else:
                 target_source_map[target] = [source]
+            self.lineage.add(source, target, self.magic_info.magic_layer)  # マージ前のソースも記録
             target_context_map[target] = context  # コンテキストファイルは最後のものを使う
 
         # マージしたソースファイルをSourceTargetSetに戻す
@@ -174,6 +280,13 @@ class MagicWorkflow:
                     source_file_content_all += f"<<<{source_file_path}>>>\n"
                     source_file_content_all += FileUtil.read_file(source_file_path)
                     source_file_content_all += "\n\n"
+                # コンテキストに入りきらない場合は分割して縮約する
+                source_file_content_all = await anyio.to_thread.run_sync(
+                    MapReduce.reduce_if_oversized,
+                    source_file_content_all,
+                    f"{os.path.basename(target)}の作成",
+                    self.litellm_api,
+                )
 
                 split_ext = os.path.splitext(source[0])
                 source_file_path_merged = split_ext[0] + "_merged" + split_ext[1]
@@ -215,8 +328,10 @@ class MagicWorkflow:
         )
         file_info_copy.update_hash()
         log(self.get_log(f"run Generator source_target_set = {source_target_set}"))
-        await anyio.to_thread.run_sync(self.run, converter_copy.convert, magic_info_copy)
+        score = await anyio.to_thread.run_sync(self.run, converter_copy.convert, magic_info_copy)
         progress_bar.update(1)
+        if self.is_stream_result:
+            log_i(f"{magic_info_copy.magic_layer} 生成完了: {source_target_set.target_file_path} (score={score})")
 
     # async def async_run(self, convert_method: callable, magic_info: MagicInfo):
     #     # convert_method が非同期の場合
@@ -250,13 +365,14 @@ class MagicWorkflow:
         # ソースファイルをprompt_goalに詰め込み
         prompt_goal = magic_info.prompt_input
         source_file_path = file_info.source_file_path
+        sections = [ContextSection(name="prompt_input", content=prompt_goal, priority=0)]
 
         if FileUtil.has_content(source_file_path):
             source_content = FileUtil.read_file(source_file_path)
             # prompt_inputがsource_content由来の場合に備えて同一チェック
             if not DiffUtil.is_contain_ignore_space(prompt_goal, source_content):
                 log(self.get_log(f"ソースファイル読込:  {file_info.source_file_path}"))
-                prompt_goal += f"\n\n<<追加情報>>\n{source_content}"
+                sections.append(ContextSection(name="source_content", content=source_content, priority=1))
         else:
             # ソースファイルを保存(設計では初回のprompt_file_pathにだけ保存する)
             log(self.get_log(f"ソースファイル更新(前レイヤ処理済？):  {source_file_path}"))
@@ -267,7 +383,17 @@ class MagicWorkflow:
         if FileUtil.has_content(context_file_path):
             context_content = FileUtil.read_file(context_file_path)
             log(self.get_log(f"コンテキストファイル読込:  {context_file_path}"))
-            prompt_goal += f"\n\n<<背景情報>>\n{context_content}"
+            sections.append(ContextSection(name="context_content", content=context_content, priority=2))
+
+        # 重複したブロックを除いてトークン予算内に詰め込む
+        context_packer = ContextPacker()
+        packed_map = context_packer.pack(sections)
+        prompt_goal = packed_map["prompt_input"]
+        if packed_map.get("source_content", "").strip():
+            prompt_goal += f"\n\n<<追加情報>>\n{packed_map['source_content']}"
+        if packed_map.get("context_content", "").strip():
+            prompt_goal += f"\n\n<<背景情報>>\n{packed_map['context_content']}"
+        magic_info.context_pack_report["prompt_goal"] = context_packer.report
 
         # prompt_goalを更新
         magic_info.prompt_goal = prompt_goal
@@ -291,6 +417,7 @@ class MagicWorkflow:
 
         # 過去のファイルを保存
         self.copy_past_files(magic_info)
+        self.lineage.add(file_info.source_file_path, file_info.target_file_path, magic_info.magic_layer)
 
         # history_infoを更新 例: layer_5_code_gen(main.md ->スキップ(既存＆input変更なし))
         magic_info.history_info = (
@@ -354,12 +481,15 @@ class MagicWorkflow:
             if not magic_info.prompt_input:
                 log(self.get_log("プロンプトが未設定のため、一般的なプロンプトを使用します。"))
                 prompt_input_new = FileUtil.read_file(default_compiler_path)
-        else:
-            # SEARCH_GRIMOIRE or ZOLTRAAK_LEGACY(ノーケア、別のところで処理すること！)
-            log(self.get_log("(SEARCH_GRIMOIRE)一般的なプロンプトを使用します。"))
-            if not os.path.isfile(compiler_path):
-                compiler_path_new = default_compiler_path
-                prompt_input_new = FileUtil.read_file(default_compiler_path)
+        elif magic_info.magic_mode is MagicMode.SEARCH_GRIMOIRE and not os.path.isfile(compiler_path):
+            # グリモア検索(プロンプトに最も近いコンパイラを選ぶ)
+            compiler_path_new, prompt_input_new = self.search_compiler_and_prompt(
+                magic_info.prompt_input, default_compiler_path
+            )
+        elif not os.path.isfile(compiler_path):
+            # ZOLTRAAK_LEGACY(ノーケア、別のところで処理すること！)
+            compiler_path_new = default_compiler_path
+            prompt_input_new = FileUtil.read_file(default_compiler_path)
 
         # prompt_inputを更新
         log_head_diff("prompt_input更新", magic_info.prompt_input, prompt_input_new)
@@ -372,6 +502,44 @@ class MagicWorkflow:
         # prompt_finalを更新
         self.prompt_manager.prepare_prompt_final(magic_info)
 
+    def search_compiler_and_prompt(self, prompt_input: str, default_compiler_path: str) -> tuple[str, str]:
+        """(SEARCH_GRIMOIRE)検索したコンパイラとprompt_inputを返す(見つからなければ一般的なプロンプト)"""
+        compiler_path = self.search_compiler(prompt_input)
+        if compiler_path:
+            return compiler_path, prompt_input
+        log(self.get_log("(SEARCH_GRIMOIRE)一般的なプロンプトを使用します。"))
+        return default_compiler_path, prompt_input or FileUtil.read_file(default_compiler_path)
+
+    @log_inout
+    def search_compiler(self, prompt: str) -> str:
+        """BM25インデックスでプロンプトに最も適したコンパイラを探す(見つからなければ空文字)"""
+        if not prompt:
+            return ""
+        if self.grimoire_index is None:
+            self.grimoire_index = GrimoireIndex()
+        self.grimoire_index.update()  # 変更があったグリモアだけ再作成
+        results = self.grimoire_index.search(
+            prompt, categories=("compiler", "developer"), top_k=settings.grimoire_search_top_k
+        )
+        log(self.get_log(f"グリモア検索結果: {[(os.path.basename(r.file_path), round(r.score, 2)) for r in results]}"))
+        if not results:
+            return ""
+
+        if settings.is_grimoire_search_rerank:
+            # 上位候補だけをLLMで再ランキング
+            def generate_response_fn(rerank_prompt: str) -> str:
+                litellm_params = LitellmParams.new(
+                    prompt=rerank_prompt,
+                    model=settings.model_name_lite,
+                    max_tokens=settings.max_tokens_any,
+                    temperature=settings.temperature_any,
+                )
+                return self.litellm_api.generate_response(litellm_params)
+
+            results = GrimoireIndex.rerank(prompt, results, generate_response_fn)
+        log(self.get_log(f"コンパイラを選択しました: {results[0].file_path}"))
+        return results[0].file_path
+
     @log_inout
     def copy_output_to_target(self, magic_info: MagicInfo) -> str:
         file_info = magic_info.file_info
@@ -431,6 +599,10 @@ class MagicWorkflow:
         log(self.get_log("ワークフローを終了します"))
 
         display_magic_info_final(magic_info)
+        BackgroundEvaluator.get_instance().show_summary()
+        MatchRateEstimator.show_stats()
+        self.prompt_manager.finalize()
+        self.lineage.save()
         log_i("プロセス履歴=\n%s", "\n".join(self.workflow_history))
         log(self.get_log(f"display_magic_info_final called({self.magic_info.magic_layer})"))
 
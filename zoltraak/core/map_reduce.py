@@ -0,0 +1,181 @@
+import hashlib
+import os
+import pathlib
+import re
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from zoltraak import settings
+from zoltraak.core.context_packer import ContextPacker
+from zoltraak.llms.litellm_api import LitellmApi, LitellmParams
+from zoltraak.utils.grimoire_registry import GrimoireRegistry
+from zoltraak.utils.log_util import log, log_inout
+
+
+class MapReduce:
+    """コンテキストに入りきらない大きなソースを分割して要約(map)し、段階的に統合(reduce)するクラス
+
+    設計:
+      - チャンクは見出し位置で区切る(編集しても後続チャンクの境界がずれにくい)
+      - チャンクの処理はグリモア(map_chunk.md)で並列に行う
+      - 部分結果はトークン予算内のグループごとに統合(reduce_chunk.md)し、1つになるまで繰り返す
+      - LLMの結果はプロンプトのハッシュでキャッシュする(小さな編集では該当チャンクだけ再計算)
+      - 縮約結果は要約なので元ソースの細部は失われる(コンテキストに入りきらない場合だけ使う)
+    """
+
+    MAP_GRIMOIRE_PATH = os.path.join(settings.internal_dir, "map_chunk.md")
+    REDUCE_GRIMOIRE_PATH = os.path.join(settings.internal_dir, "reduce_chunk.md")
+    HEADING_PATTERN = re.compile(r"^#{1,6}\s|^<<<.*>>>$")  # 見出し、またはマージしたソースの区切り
+    SOFT_LIMIT_RATIO = 0.5  # チャンクがこの割合を超えたら次の見出しで区切る
+
+    def __init__(
+        self,
+        purpose: str = "",
+        generate_response_fn: Callable[[str], str] | None = None,
+        chunk_tokens: int = 0,
+        model_name: str = settings.model_name_lite,
+        litellm_api: LitellmApi | None = None,
+    ):
+        self.purpose = purpose
+        self.generate_response_fn = generate_response_fn or self.generate_response
+        self.chunk_tokens = chunk_tokens or settings.map_reduce_chunk_tokens
+        self.model_name = model_name
+        self.litellm_api = litellm_api or LitellmApi()  # 呼び出し元のインスタンスを使い回す
+        self.cache_dir = os.path.join(settings.cache_dir, "map_reduce")
+        self.report = {"chunks": 0, "levels": 0, "calls": 0, "cache_hits": 0}
+        self._report_lock = threading.Lock()  # generate_cachedはワーカースレッドから呼ばれる
+
+    @staticmethod
+    def is_oversized(content: str) -> bool:
+        return ContextPacker.estimate_tokens(content) > settings.max_tokens_map_reduce_source
+
+    @staticmethod
+    def reduce_if_oversized(content: str, purpose: str = "", litellm_api: LitellmApi | None = None) -> str:
+        """大きすぎる場合だけmap-reduceで縮約した内容を返す"""
+        if not MapReduce.is_oversized(content):
+            return content
+        map_reduce = MapReduce(purpose=purpose, litellm_api=litellm_api)
+        reduced = map_reduce.run(content)
+        log("map-reduceで縮約しました: %d => %d文字, report=%s", len(content), len(reduced), map_reduce.report)
+        return reduced
+
+    @staticmethod
+    def split_chunks(content: str, chunk_tokens: int) -> list[str]:
+        """見出し位置を優先してトークン数の上限内のチャンクに分割する"""
+        soft_limit = int(chunk_tokens * MapReduce.SOFT_LIMIT_RATIO)
+        chunks: list[str] = []
+        current = ""
+        current_tokens = 0
+        for line in MapReduce.split_long_lines(content, chunk_tokens):
+            line_tokens = ContextPacker.estimate_tokens(line)
+            is_heading = bool(MapReduce.HEADING_PATTERN.match(line))
+            is_boundary = is_heading and current_tokens >= soft_limit
+            if current and (is_boundary or current_tokens + line_tokens > chunk_tokens):
+                chunks.append(current)
+                current = ""
+                current_tokens = 0
+            current += line
+            current_tokens += line_tokens
+        if current:
+            chunks.append(current)
+        return chunks
+
+    @staticmethod
+    def split_long_lines(content: str, chunk_tokens: int) -> list[str]:
+        """1行で上限を超える行は文字数で分割する"""
+        lines = []
+        for line in content.splitlines(keepends=True):
+            if ContextPacker.estimate_tokens(line) <= chunk_tokens:
+                lines.append(line)
+                continue
+            # 1文字1トークン(最悪ケース)とみなして分割
+            lines += [line[i : i + chunk_tokens] for i in range(0, len(line), chunk_tokens)]
+        return lines
+
+    @log_inout
+    def run(self, content: str) -> str:
+        chunks = MapReduce.split_chunks(content, self.chunk_tokens)
+        self.report["chunks"] = len(chunks)
+        prompts = [
+            GrimoireRegistry.render(MapReduce.MAP_GRIMOIRE_PATH, self.get_replace_map(chunk=chunk)) for chunk in chunks
+        ]
+        partials = self.generate_all(prompts)
+        return self.reduce(partials)
+
+    def reduce(self, partials: list[str]) -> str:
+        """部分結果がトークン予算内に収まるグループごとに統合して、1つになるまで繰り返す"""
+        while len(partials) > 1:
+            self.report["levels"] += 1
+            groups: list[list[str]] = [[]]
+            group_tokens = 0
+            for partial in partials:
+                partial_tokens = ContextPacker.estimate_tokens(partial)
+                # 統合が進むように1グループに最低2つは入れる
+                if len(groups[-1]) >= 2 and group_tokens + partial_tokens > self.chunk_tokens:  # noqa: PLR2004
+                    groups.append([])
+                    group_tokens = 0
+                groups[-1].append(partial)
+                group_tokens += partial_tokens
+
+            prompts = []
+            for group in groups:
+                if len(group) == 1:
+                    prompts.append("")  # 1つだけのグループは統合不要
+                    continue
+                partials_text = "\n\n".join(f"### 部分{i + 1}\n{partial}" for i, partial in enumerate(group))
+                prompts.append(
+                    GrimoireRegistry.render(
+                        MapReduce.REDUCE_GRIMOIRE_PATH, self.get_replace_map(partials=partials_text)
+                    )
+                )
+            reduced = self.generate_all(prompts)
+            partials = [
+                result if prompt else group[0] for prompt, result, group in zip(prompts, reduced, groups, strict=True)
+            ]
+        return partials[0] if partials else ""
+
+    def get_replace_map(self, **kwargs: str) -> dict[str, str]:
+        return {"purpose": self.purpose or "ソースファイルとしての利用", **kwargs}
+
+    def generate_all(self, prompts: list[str]) -> list[str]:
+        """キャッシュにないプロンプトだけを並列に実行する(空のプロンプトは空の結果)"""
+        with ThreadPoolExecutor(max_workers=settings.map_reduce_max_workers) as executor:
+            return list(executor.map(self.generate_cached, prompts))
+
+    def generate_cached(self, prompt: str) -> str:
+        if not prompt:
+            return ""
+        digest = hashlib.sha256((self.model_name + "\n" + prompt).encode("utf-8")).hexdigest()
+        cache_path = pathlib.Path(self.cache_dir) / digest[:2] / f"{digest}.md"
+        if cache_path.is_file():
+            self.count_report("cache_hits")
+            return cache_path.read_text(encoding="utf-8")
+
+        self.count_report("calls")
+        response = self.generate_response_fn(prompt).strip()
+        if response:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(response, encoding="utf-8")
+            tmp_path.replace(cache_path)
+        return response
+
+    def count_report(self, name: str) -> None:
+        with self._report_lock:
+            self.report[name] += 1
+
+    def generate_response(self, prompt: str) -> str:
+        litellm_params = LitellmParams.new(
+            prompt=prompt,
+            model=self.model_name,
+            max_tokens=settings.max_tokens_generate_md,
+            temperature=settings.temperature_generate_md,
+        )
+        return self.litellm_api.generate_response(litellm_params)
+
+    def __str__(self) -> str:
+        return f"MapReduce({self.purpose}, chunk_tokens={self.chunk_tokens})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,133 @@
+import gzip
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+from dataclasses import asdict, dataclass
+
+from zoltraak.utils.diff_util import DiffUtil
+from zoltraak.utils.file_util import FileUtil
+from zoltraak.utils.log_util import log, log_w
+
+
+@dataclass
+class PromptRef:
+    """ターゲット毎のプロンプト参照(実体はblobストアに保存)"""
+
+    digest: str = ""  # 本文のsha256
+    normalized_digest: str = ""  # 空白・空行を無視した本文のsha256(同一判定用)
+    size: int = 0  # 本文の文字数
+
+
+class PromptArchive:
+    """プロンプトをコンテンツアドレスで重複排除して保存するクラス
+
+    構成:
+      prompt_dir/.blobs/ab/abcdef....gz  <= 本文(gzip圧縮、同じ内容は1つだけ)
+      prompt_dir/<layer>/<target>_final.prompt.ref  <= PromptRefのJSON(数百バイト)
+
+    旧形式の<target>_final.promptが残っている場合は読み込み時のフォールバックとして使う。
+    """
+
+    BLOB_DIR_NAME = ".blobs"
+    BLOB_EXT = ".gz"
+    REF_EXT = ".ref"
+
+    def __init__(self, prompt_dir: str):
+        self.prompt_dir = os.path.abspath(prompt_dir)
+        self.blob_dir = os.path.join(self.prompt_dir, PromptArchive.BLOB_DIR_NAME)
+
+    @staticmethod
+    def get_digest(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def get_ref_path(prompt_path: str) -> str:
+        return prompt_path + PromptArchive.REF_EXT
+
+    def get_blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest + PromptArchive.BLOB_EXT)
+
+    def put_blob(self, content: str) -> str:
+        """本文をblobとして保存してdigestを返す(既に存在する場合は書き込まない)"""
+        digest = PromptArchive.get_digest(content)
+        blob_path = self.get_blob_path(digest)
+        if os.path.isfile(blob_path):
+            return digest
+
+        # 並列実行時に壊れたblobが見えないように一時ファイル経由で置き換える
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(gzip.compress(content.encode("utf-8")))
+            pathlib.Path(temp_path).replace(blob_path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        log("blobを保存しました: %s", blob_path)
+        return digest
+
+    def get_blob(self, digest: str) -> str:
+        blob_path = self.get_blob_path(digest)
+        if not os.path.isfile(blob_path):
+            log_w("blobが見つかりません: %s", blob_path)
+            return ""
+        with open(blob_path, "rb") as blob_file:
+            return gzip.decompress(blob_file.read()).decode("utf-8")
+
+    def read_ref(self, prompt_path: str) -> PromptRef | None:
+        ref_path = PromptArchive.get_ref_path(prompt_path)
+        if os.path.isfile(ref_path):
+            try:
+                with open(ref_path, encoding="utf-8") as ref_file:
+                    return PromptRef(**json.load(ref_file))
+            except (OSError, TypeError, json.JSONDecodeError) as e:
+                log_w("refの読み込みに失敗しました: %s, %s", ref_path, e)
+                return None
+
+        # 旧形式(.promptの実ファイル)
+        if os.path.isfile(prompt_path):
+            content = FileUtil.read_file(prompt_path)
+            return PromptRef(
+                digest=PromptArchive.get_digest(content),
+                normalized_digest=DiffUtil.get_normalized_digest(content),
+                size=len(content),
+            )
+        return None
+
+    def read_prompt(self, prompt_path: str) -> str:
+        ref_path = PromptArchive.get_ref_path(prompt_path)
+        if os.path.isfile(ref_path):
+            prompt_ref = self.read_ref(prompt_path)
+            if prompt_ref:
+                return self.get_blob(prompt_ref.digest)
+        return FileUtil.read_file(prompt_path)
+
+    def write_prompt(self, content: str, prompt_path: str) -> PromptRef:
+        """本文をblobに保存してrefを書き込む(内容が前回と同じならrefも書き換えない)"""
+        digest = PromptArchive.get_digest(content)
+        ref_path = PromptArchive.get_ref_path(prompt_path)
+        prompt_ref_pre = self.read_ref(prompt_path) if os.path.isfile(ref_path) else None
+        if prompt_ref_pre and prompt_ref_pre.digest == digest and os.path.isfile(self.get_blob_path(digest)):
+            log("プロンプトに変更がないため書き込みをスキップします: %s", ref_path)
+            return prompt_ref_pre
+
+        self.put_blob(content)
+        prompt_ref = PromptRef(
+            digest=digest, normalized_digest=DiffUtil.get_normalized_digest(content), size=len(content)
+        )
+        FileUtil.write_file(ref_path, json.dumps(asdict(prompt_ref)))
+
+        # 旧形式のファイルは内容が古くなるので削除する
+        if os.path.isfile(prompt_path):
+            os.remove(prompt_path)
+        return prompt_ref
+
+    def __str__(self) -> str:
+        return f"PromptArchive({self.prompt_dir})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,138 @@
+import csv
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+from zoltraak.utils.log_util import log, log_w
+
+
+def create_run_id() -> str:
+    """実行単位を識別するID(例: 20241101_123456_12345)"""
+    local_tz = datetime.now().astimezone().tzinfo
+    return datetime.now(tz=local_tz).strftime("%Y%m%d_%H%M%S") + f"_{os.getpid()}"
+
+
+@dataclass
+class PromptRecord:
+    """プロンプト保存履歴の1レコード(旧prompt.csvの1行に相当)"""
+
+    prompt_len: int = 0
+    score: float = 0.0
+    is_same_prompt: bool = True
+    prompt_layer_name: str = ""
+    prompt_output_filename: str = ""
+    prompt_output_path: str = ""
+    prompt_head: str = ""
+    prompt_tail: str = ""
+    prompt_diff: str = "None"
+    run_id: str = ""
+    extra: dict = field(default_factory=dict)
+
+
+class PromptLedger:
+    """プロンプト保存履歴を追記専用のJSONLファイルに記録するクラス
+
+    設計:
+      - append()はメモリ上のバッファに追加するだけ(ロック内はO(1))
+      - バッファがflush_batch_size件たまったらまとめてJSONLに追記する
+      - 非同期実行(スレッド並列)から同時に呼ばれるためロックで保護する
+      - prompt.csvは実行終了時にexport_csv()で必要な場合だけ出力する
+    """
+
+    DEF_LEDGER_FILE_NAME = "prompt_ledger.jsonl"
+    DEF_FLUSH_BATCH_SIZE = 32
+
+    # prompt.csvの列(互換性のため旧DataFrameと同じ並び)
+    CSV_COLUMNS = (
+        "prompt_len",
+        "score",
+        "is_same_prompt",
+        "prompt_layer_name",
+        "prompt_output_filename",
+        "prompt_output_path",
+        "prompt_head",
+        "prompt_tail",
+        "prompt_diff",
+    )
+
+    def __init__(self, ledger_file_path: str = "", flush_batch_size: int = DEF_FLUSH_BATCH_SIZE):
+        self.ledger_file_path = ledger_file_path
+        self.flush_batch_size = flush_batch_size
+        self.run_id = create_run_id()
+        self._buffer: list[PromptRecord] = []
+        self._lock = threading.Lock()
+
+    def set_ledger_file_path(self, ledger_file_path: str) -> None:
+        """保存先を設定する(変更時は旧保存先にバッファを書き出してから切り替える)"""
+        ledger_file_path = os.path.abspath(ledger_file_path)
+        with self._lock:
+            if ledger_file_path == self.ledger_file_path:
+                return
+            self._flush_locked()
+            self.ledger_file_path = ledger_file_path
+
+    def append(self, record: PromptRecord) -> None:
+        with self._lock:
+            record.run_id = self.run_id
+            self._buffer.append(record)
+            if len(self._buffer) >= self.flush_batch_size:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        if not self.ledger_file_path:
+            log_w("ledger_file_pathが未設定のためプロンプト履歴を破棄します。件数=%d", len(self._buffer))
+            self._buffer.clear()
+            return
+
+        os.makedirs(os.path.dirname(self.ledger_file_path), exist_ok=True)
+        lines = [json.dumps(asdict(record), ensure_ascii=False) + "\n" for record in self._buffer]
+        with open(self.ledger_file_path, "a", encoding="utf-8") as ledger_file:
+            ledger_file.writelines(lines)
+        log("プロンプト履歴を追記しました: %s (%d件)", self.ledger_file_path, len(lines))
+        self._buffer.clear()
+
+    def read_records(self, run_id: str = "") -> list[dict]:
+        """保存済みのレコードを読み込む(run_id指定時はその実行分だけ)"""
+        self.flush()
+        if not os.path.isfile(self.ledger_file_path):
+            return []
+
+        records = []
+        with open(self.ledger_file_path, encoding="utf-8") as ledger_file:
+            for line in ledger_file:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    log_w("壊れたレコードをスキップします: %s", line[:100])
+                    continue
+                if run_id and record.get("run_id") != run_id:
+                    continue
+                records.append(record)
+        return records
+
+    def export_csv(self, csv_file_path: str = "prompt.csv") -> str:
+        """今回の実行分のレコードをprompt.csvとして出力する"""
+        records = self.read_records(self.run_id)
+        with open(csv_file_path, "w", encoding="utf-8", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["", *PromptLedger.CSV_COLUMNS])
+            for i, record in enumerate(records):
+                writer.writerow([i, *[record.get(column, "") for column in PromptLedger.CSV_COLUMNS]])
+        log("prompt.csvを出力しました: %s (%d件)", csv_file_path, len(records))
+        return csv_file_path
+
+    def __str__(self) -> str:
+        return f"PromptLedger({self.ledger_file_path})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -4,11 +4,14 @@ import re
 from dataclasses import dataclass
 from enum import Enum
 
-import pandas as pd
-
+from zoltraak import settings
+from zoltraak.core.context_packer import ContextPacker, ContextSection
+from zoltraak.core.prompt_archive import PromptArchive
+from zoltraak.core.prompt_ledger import PromptLedger, PromptRecord
 from zoltraak.schema.schema import MagicInfo, MagicLayer, MagicMode
 from zoltraak.utils.diff_util import DiffUtil
 from zoltraak.utils.file_util import FileUtil
+from zoltraak.utils.grimoire_registry import GrimoireRegistry
 from zoltraak.utils.log_util import log, log_e, log_inout
 
 
@@ -31,6 +34,7 @@ class PromptParams:
     context_content: str = ""
     requirements_content: str = ""
     destiny_file_path: str = ""
+    destiny_content: str = ""
 
     def __init__(self, magic_info: MagicInfo):
         file_info = magic_info.file_info
@@ -52,6 +56,7 @@ class PromptParams:
         self.context_content = FileUtil.read_file(file_info.context_file_path)
         self.requirements_content = FileUtil.read_file(file_info.md_file_path)  # 要求仕様書
         self.destiny_file_path = magic_info.file_info.destiny_file_path
+        self.destiny_content = FileUtil.read_file(file_info.destiny_file_path)
 
     def to_replace_map(self):
         """PromptParamsのフィールドを辞書に変換する
@@ -93,17 +98,26 @@ class PromptEnum(str, Enum):
 
 
 class PromptManager:
+    # prompt_finalに展開されるセクションの優先度とトークン上限(0: 無制限)
+    # target_contentは全文書き換えの元になるので中略しない(大きすぎる場合はconverter側で部分更新に切り替える)
+    CONTEXT_SECTIONS = (
+        ContextSection(name="prompt", priority=0),
+        ContextSection(name="source_content", priority=1),
+        ContextSection(name="requirements_content", priority=2),
+        ContextSection(name="context_content", priority=3, max_tokens=16000),
+        ContextSection(name="target_content", priority=4, is_fixed=True),
+        ContextSection(name="destiny_content", priority=5, max_tokens=4000),
+    )
+
     def __init__(self):
-        self.df = pd.DataFrame()
-        self.prompt_len_list = []
-        self.score_list = []
-        self.is_same_prompt_list = []
-        self.prompt_layer_name_list = []
-        self.prompt_output_filename_list = []
-        self.prompt_output_path_list = []
-        self.prompt_head_list = []
-        self.prompt_tail_list = []
-        self.prompt_diff_list = []
+        self.ledger = PromptLedger()
+        self.archive_map: dict[str, PromptArchive] = {}  # prompt_dir => PromptArchive
+
+    def get_archive(self, magic_info: MagicInfo) -> PromptArchive:
+        prompt_dir = magic_info.file_info.prompt_dir
+        if prompt_dir not in self.archive_map:
+            self.archive_map[prompt_dir] = PromptArchive(prompt_dir)
+        return self.archive_map[prompt_dir]
 
     @log_inout
     def save_prompts(self, magic_info: MagicInfo) -> None:
@@ -119,23 +133,25 @@ class PromptManager:
         self, magic_info: MagicInfo, prompt: str, target_file_path_rel: str, prompt_enum: PromptEnum = PromptEnum.INPUT
     ) -> None:
         prompt_output_path = prompt_enum.get_prompt_file_path(target_file_path_rel, magic_info)
+        archive = self.get_archive(magic_info)
 
-        # フォルダがない場合は作成
-        os.makedirs(os.path.dirname(prompt_output_path), exist_ok=True)
-
-        # 既存のpromptと差分有無を確認
+        # 既存のpromptと差分有無を確認(digest比較、異なる場合だけ本文を読んでdiffを取る)
         is_same_prompt = True
         prompt_diff = "None"
-        prompt_pre = FileUtil.read_file(prompt_output_path)
-        prompt_pre = prompt_pre.strip()
         prompt = prompt.strip()
-        if self.is_same_prompt_str(prompt_pre, prompt):
+        prompt_ref_pre = archive.read_ref(prompt_output_path)
+        normalized_digest_pre = (
+            prompt_ref_pre.normalized_digest if prompt_ref_pre else DiffUtil.get_normalized_digest("")
+        )
+        if DiffUtil.get_normalized_digest(prompt) != normalized_digest_pre:
             is_same_prompt = False
+            prompt_pre = archive.read_prompt(prompt_output_path).strip()
             prompt_diff = "".join(difflib.unified_diff(prompt_pre.splitlines(), prompt.splitlines()))
 
-        # プロンプトを保存
-        FileUtil.write_prompt(prompt, prompt_output_path)
-        log("プロンプトを保存しました↓ %s:\n%s", prompt_enum, prompt_output_path)
+        # プロンプトを保存(空のプロンプトは保存しない)
+        if prompt:
+            archive.write_prompt(prompt, prompt_output_path)
+            log("プロンプトを保存しました↓ %s:\n%s", prompt_enum, prompt_output_path)
 
         # prompt_output_filename
         prompt_output_filename = os.path.basename(prompt_output_path)
@@ -143,63 +159,70 @@ class PromptManager:
         # prompt_layer_name(prompt_output_pathからlayer_xxxxの部分を取得)
         prompt_layer_name = re.search(r"layer_[\d_]+", prompt_output_path).group(0)
 
-        # csvに保存
-        prompt_str = str(prompt).strip()
-        prompt_len = len(prompt_str)
+        # 履歴(ledger)に追記
+        prompt_len = len(prompt)
         if prompt_len > 0:
-            self.prompt_len_list.append(prompt_len)
-            self.score_list.append(magic_info.score)
-            self.is_same_prompt_list.append(is_same_prompt)
-            self.prompt_layer_name_list.append(prompt_layer_name)
-            self.prompt_output_filename_list.append(prompt_output_filename)
-            self.prompt_output_path_list.append(prompt_output_path)
-            self.prompt_head_list.append(prompt_str[:100])
-            self.prompt_tail_list.append(prompt_str[-100:])
-            self.prompt_diff_list.append(prompt_diff)
-            self.df = pd.DataFrame(
-                data={
-                    "prompt_len": self.prompt_len_list,
-                    "score": self.score_list,
-                    "is_same_prompt": self.is_same_prompt_list,
-                    "prompt_layer_name": self.prompt_layer_name_list,
-                    "prompt_output_filename": self.prompt_output_filename_list,
-                    "prompt_output_path": self.prompt_output_path_list,
-                    "prompt_head": self.prompt_head_list,
-                    "prompt_tail": self.prompt_tail_list,
-                    "prompt_diff": self.prompt_diff_list,
-                }
+            self.ledger.set_ledger_file_path(
+                os.path.join(magic_info.file_info.prompt_dir, PromptLedger.DEF_LEDGER_FILE_NAME)
+            )
+            self.ledger.append(
+                PromptRecord(
+                    prompt_len=prompt_len,
+                    score=magic_info.score,
+                    is_same_prompt=is_same_prompt,
+                    prompt_layer_name=prompt_layer_name,
+                    prompt_output_filename=prompt_output_filename,
+                    prompt_output_path=prompt_output_path,
+                    prompt_head=prompt[:100],
+                    prompt_tail=prompt[-100:],
+                    prompt_diff=prompt_diff,
+                    extra=self.get_ledger_extra(magic_info, prompt_enum),
+                )
             )
-            self.df.to_csv("prompt.csv")
+
+    def get_ledger_extra(self, magic_info: MagicInfo, prompt_enum: PromptEnum) -> dict:
+        """履歴に残す追加情報(prompt_goal/prompt_finalはContextPackerの詰め込み結果)"""
+        if prompt_enum is PromptEnum.GOAL and "prompt_goal" in magic_info.context_pack_report:
+            return {"context_pack": magic_info.context_pack_report["prompt_goal"]}
+        if prompt_enum is PromptEnum.FINAL and "prompt_final" in magic_info.context_pack_report:
+            return {"context_pack": magic_info.context_pack_report["prompt_final"]}
+        return {}
+
+    @log_inout
+    def finalize(self) -> None:
+        """実行終了時の処理(履歴の書き出しと、必要ならprompt.csvの出力)"""
+        self.ledger.flush()
+        if settings.is_export_prompt_csv:
+            self.ledger.export_csv("prompt.csv")
 
     @log_inout
     def load_prompt(self, magic_info: MagicInfo, prompt_enum: PromptEnum = PromptEnum.INPUT) -> str:
         # work_dirからの相対パス取得
         target_file_path_rel = os.path.relpath(magic_info.file_info.target_file_path, magic_info.file_info.work_dir)
         prompt_output_path = prompt_enum.get_prompt_file_path(target_file_path_rel, magic_info)
-        return FileUtil.read_file(prompt_output_path)
+        return self.get_archive(magic_info).read_prompt(prompt_output_path)
 
     @log_inout
     def is_same_prompt(self, magic_info: MagicInfo, prompt_enum: PromptEnum = PromptEnum.INPUT) -> bool:
         # work_dirからの相対パス取得
+        target_file_path_rel = os.path.relpath(magic_info.file_info.target_file_path, magic_info.file_info.work_dir)
+        prompt_output_path = prompt_enum.get_prompt_file_path(target_file_path_rel, magic_info)
         current_prompt = prompt_enum.get_current_prompt(magic_info)
-        past_prompt = self.load_prompt(magic_info, prompt_enum)
+        prompt_ref = self.get_archive(magic_info).read_ref(prompt_output_path)
 
-        log("PromptEnum=" + prompt_enum + " current_prompt(末尾100文字)=\n%s", current_prompt[-100:])
-        log("PromptEnum=" + prompt_enum + " past_prompt(末尾100文字)=\n%s", past_prompt[-100:])
-        diff_content = DiffUtil.diff0_ignore_space(current_prompt, past_prompt)
+        # 本文同士のdiffではなく、空白を無視したdigestで比較する
+        current_digest = DiffUtil.get_normalized_digest(current_prompt)
+        past_digest = prompt_ref.normalized_digest if prompt_ref else DiffUtil.get_normalized_digest("")
+        log("PromptEnum=" + prompt_enum + " current_digest=%s, past_digest=%s", current_digest, past_digest)
 
-        if self.is_same_prompt_str(current_prompt, past_prompt):
+        if current_digest == past_digest:
             log("PromptEnum=" + prompt_enum + " プロンプトが同じです")
             return True
-        log("PromptEnum=" + prompt_enum + " プロンプトが異なります diff=\n%s", diff_content)
+        log("PromptEnum=" + prompt_enum + " プロンプトが異なります")
         return False
 
     def is_same_prompt_str(self, prompt1: str, prompt2: str) -> bool:
-        diff_content = DiffUtil.diff0_ignore_space(prompt1, prompt2)
-
-        if diff_content.strip() == "":
-            return True
-        return False
+        return DiffUtil.get_normalized_digest(prompt1) == DiffUtil.get_normalized_digest(prompt2)
 
     @log_inout
     def show_diff_prompt(self, magic_info: MagicInfo, prompt_enum: PromptEnum = PromptEnum.INPUT) -> None:
@@ -224,14 +247,46 @@ class PromptManager:
         prompt_params = PromptParams(magic_info=magic_info)
         if magic_info.magic_layer == MagicLayer.LAYER_5_CODE_GEN and magic_info.magic_mode == MagicMode.ZOLTRAAK_LEGACY:
             # コード生成時はarchitectを利用する
+            report = self.pack_prompt_params(prompt_params, prompt_params.architect_path, "source_content")
             prompt_final = self.create_prompt_architect(prompt_params)
         else:
             # 通常はcompilerを利用する
+            report = self.pack_prompt_params(prompt_params, prompt_params.compiler_path, "prompt")
             prompt_final = self.create_prompt(prompt_params)
+        magic_info.context_pack_report["prompt_final"] = report
         log("prompt_final=\n%s\n...\n%s", prompt_final[:50], prompt_final[-5:])
         magic_info.prompt_final = prompt_final
         return prompt_final
 
+    @log_inout
+    def pack_prompt_params(self, params: PromptParams, grimoire_path: str, default_placeholder: str) -> dict:
+        """prompt_finalに展開されるセクションだけを対象に、重複ブロックを除いてトークン予算内に詰め込む
+
+        例: prompt(=prompt_goal)に<<追加情報>>として含まれるソースは、
+            グリモアの{source_content}側では重複として除かれる
+        """
+        if os.path.isfile(grimoire_path):
+            placeholders = set(GrimoireRegistry.load(grimoire_path).placeholders)
+        else:
+            placeholders = {default_placeholder}
+        placeholders.add("destiny_content")  # destinyは常に先頭に付与される
+
+        sections = [
+            ContextSection(
+                name=section.name,
+                content=getattr(params, section.name),
+                priority=section.priority,
+                max_tokens=section.max_tokens,
+                is_fixed=section.is_fixed,
+            )
+            for section in PromptManager.CONTEXT_SECTIONS
+            if section.name in placeholders
+        ]
+        context_packer = ContextPacker()
+        for name, content in context_packer.pack(sections).items():
+            setattr(params, name, content)
+        return context_packer.report
+
     @log_inout
     def create_prompt(self, params: PromptParams):
         """
@@ -250,10 +305,9 @@ class PromptManager:
             prompt_final = self.apply_fomatter(prompt_final, params.formatter_path, params.language)
 
         # destiny_content
-        destiny_content = FileUtil.read_file(params.destiny_file_path)
         prompt_final = (
             "#### 前提コンテキスト(この内容は重要ではないですが、緩く全体的な判断に活用してください) ####\n"
-            + destiny_content
+            + params.destiny_content
             + "\n#### 前提コンテキスト終了 ####\n\n"
             + prompt_final
         )
@@ -277,10 +331,9 @@ class PromptManager:
             prompt_final += "\n\n"
 
         # destiny_content
-        destiny_content = FileUtil.read_file(params.destiny_file_path)
         prompt_final = (
             "#### 前提コンテキスト(この内容は重要ではないですが、緩く全体的な判断に活用してください) ####\n"
-            + destiny_content
+            + params.destiny_content
             + "\n#### 前提コンテキスト終了 ####\n\n"
             + prompt_final
         )
@@ -352,25 +405,8 @@ class PromptManager:
         file_path: str,
         replace_map: dict[str, str] | None = None,
     ) -> str:
-        # グリモアを読み込む
-        content = FileUtil.read_file(file_path)
-
-        # パターンを準備する
-        def replacement(match):
-            # マッチした3つのグループのうち、None以外のものを使用
-            key = next(group for group in match.groups() if group is not None)
-            return replace_map.get(key, match.group(0))
-
-        # 一度の`re.sub`で全ての置換を行う
-        # 各パターンを()でグループ化し、変数名も()でグループ化
-        pattern = r"{{(\w+)}}|{(\w+)}|$$(\w+)$$"
-        content = re.sub(pattern, replacement, content)
-
-        # if replace_map:
-        #     for key, value in replace_map.items():
-        #         content = content.replace("{{" + key + "}}", value)
-        #         content = content.replace("{" + key + "}", value)
-        #         content = content.replace(f"[{key}]", value)
+        # グリモアを読み込む(パース済みのテンプレートをキャッシュから取得して1回のjoinで置換)
+        content = GrimoireRegistry.render(file_path, replace_map)
         log(f"read_grimoire content[:100]:\n {content[:100]}")
         return content
 
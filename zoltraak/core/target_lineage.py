@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+from zoltraak import settings
+from zoltraak.schema.schema import MAGIC_LAYER_ORDER, MagicLayer
+from zoltraak.utils.log_util import log_w
+
+
+class TargetLineage:
+    """ソースファイル => ターゲットファイルの対応をレイヤ付きで記録するクラス
+
+    - MagicWorkflowが変換のたびに記録し、終了時にcache_dir/lineage/<canonical_name>.jsonに保存する
+    - watchモードで変更されたファイルから再生成が必要なターゲットを求めるのに使う
+      (ターゲットが次のレイヤのソースになる場合も辿る)
+    """
+
+    def __init__(self, canonical_name: str, cache_dir: str = ""):
+        self.lineage_file_path = (
+            Path(cache_dir or settings.cache_dir) / "lineage" / f"{canonical_name or 'zoltraak'}.json"
+        )
+        self.source_map: dict[str, dict[str, str]] = {}  # ソース => {ターゲット: レイヤ}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self) -> None:
+        if not self.lineage_file_path.is_file():
+            return
+        try:
+            self.source_map = json.loads(self.lineage_file_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            log_w("ターゲットの対応の読み込みに失敗しました: %s, %s", self.lineage_file_path, e)
+            self.source_map = {}
+
+    def save(self) -> None:
+        self.lineage_file_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            content = json.dumps(self.source_map, ensure_ascii=False, indent=2)
+        self.lineage_file_path.write_text(content, encoding="utf-8")
+
+    def add(self, source_file_path: str, target_file_path: str, magic_layer: MagicLayer) -> None:
+        if not source_file_path or not target_file_path:
+            return
+        source_file_path = os.path.abspath(source_file_path)
+        target_file_path = os.path.abspath(target_file_path)
+        if source_file_path == target_file_path:
+            return
+        with self._lock:
+            self.source_map.setdefault(source_file_path, {})[target_file_path] = MagicLayer(magic_layer).value
+
+    def get_sources(self) -> set[str]:
+        with self._lock:
+            return set(self.source_map)
+
+    def get_affected_targets(self, changed_files: set[str]) -> dict[str, MagicLayer]:
+        """変更ファイルから再生成が必要なターゲット => そのターゲットを作るレイヤ"""
+        affected_targets: dict[str, MagicLayer] = {}
+        queue = [os.path.abspath(file_path) for file_path in changed_files]
+        with self._lock:
+            while queue:
+                source_file_path = queue.pop()
+                for target_file_path, layer_value in self.source_map.get(source_file_path, {}).items():
+                    if target_file_path in affected_targets:
+                        continue
+                    affected_targets[target_file_path] = MagicLayer(layer_value)
+                    queue.append(target_file_path)
+        return affected_targets
+
+    @staticmethod
+    def get_first_layer(layers: list[MagicLayer]) -> MagicLayer | None:
+        if not layers:
+            return None
+        return min(layers, key=MAGIC_LAYER_ORDER.index)
+
+    def __str__(self) -> str:
+        return f"TargetLineage({self.lineage_file_path}, sources={len(self.source_map)})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,127 @@
+import os
+from collections.abc import Callable
+
+from zoltraak.core.target_lineage import TargetLineage
+from zoltraak.schema.schema import MAGIC_LAYER_ORDER, FileInfo, MagicLayer, MagicMode, ZoltraakParams
+from zoltraak.utils.file_watcher import FileWatcher
+from zoltraak.utils.log_util import log, log_i
+
+
+class WatchRunner:
+    """watchモード: ソースの変更を監視して、影響するターゲットだけを残りのレイヤで再生成するクラス
+
+    - 監視対象は入力のmd、ファイル構造定義書、これまでの変換で使われた全てのソース
+    - 入力のmdが変わった場合は最初のレイヤから全体を再実行する
+    - ファイル構造定義書が変わった場合は構造を読むレイヤ(4)から全体を再実行する
+    - それ以外はTargetLineageで影響するターゲットを辿り、そのターゲットだけを生成する
+    - 自分の生成で書き換えたファイルはハッシュで判定して変更とみなさない
+    """
+
+    def __init__(
+        self,
+        load_params_fn: Callable[[], ZoltraakParams],
+        run_workflow_fn: Callable[[ZoltraakParams, set[str] | None], object],
+        input_file_path: str = "",
+        watcher: FileWatcher | None = None,
+    ):
+        self.load_params_fn = load_params_fn
+        self.run_workflow_fn = run_workflow_fn
+        self.input_file_path = os.path.abspath(input_file_path) if input_file_path.endswith(".md") else ""
+        self.params = load_params_fn()
+        self.file_info = FileInfo()
+        self.file_info.update_work_dir()
+        self.file_info.update(self.params.canonical_name)
+        self.lineage = TargetLineage(self.params.canonical_name)
+        self.watcher = watcher or FileWatcher([])
+        self.file_hashes: dict[str, str] = {}
+
+    def run(self, *, is_initial_run: bool = True) -> None:
+        if is_initial_run:
+            self.run_workflow(self.params, None)
+        self.refresh()
+        log_i("ファイルの変更を監視します(Ctrl+Cで終了): %s", self.watcher)
+        try:
+            while True:
+                self.run_once()
+        except KeyboardInterrupt:
+            log_i("watchモードを終了します")
+        finally:
+            self.watcher.close()
+
+    def run_once(self, timeout_sec: float | None = None) -> bool:
+        """変更を1回待って再生成する(再生成したらTrue)"""
+        changed_files = self.get_changed_files(self.watcher.wait_changes(timeout_sec))
+        if not changed_files:
+            return False
+        for changed_file in sorted(changed_files):
+            log_i("変更を検知しました: %s", changed_file)
+
+        plan = self.plan(changed_files)
+        if plan is None:
+            log_i("再生成が必要なターゲットはありません")
+            self.refresh()
+            return False
+        params, target_filter = plan
+        self.run_workflow(params, target_filter)
+        self.refresh()
+        return True
+
+    def plan(self, changed_files: set[str]) -> tuple[ZoltraakParams, set[str] | None] | None:
+        """変更ファイルから(実行するパラメータ, 対象ターゲット(Noneは全て))を決める"""
+        start_layer = MagicLayer.new(self.params.magic_layer)
+        end_layer = MagicLayer.new(self.params.magic_layer_end)
+        if self.input_file_path in changed_files:
+            self.params = self.load_params_fn()  # 入力のmdからpromptを作り直す
+            return self.params, None
+
+        if self.file_info.structure_file_path in changed_files:
+            layer = max(start_layer, MagicLayer.LAYER_4_REQUIREMENT_GEN, key=MAGIC_LAYER_ORDER.index)
+            target_filter = None
+        else:
+            affected_targets = self.lineage.get_affected_targets(changed_files)
+            layer = TargetLineage.get_first_layer(list(affected_targets.values()))
+            target_filter = set(affected_targets)
+            log("影響するターゲット: %s", sorted(target_filter))
+        if layer is None or MAGIC_LAYER_ORDER.index(layer) > MAGIC_LAYER_ORDER.index(end_layer):
+            return None
+
+        update = {"magic_layer": layer.value}
+        if layer != start_layer:
+            update["magic_mode"] = MagicMode.GRIMOIRE_ONLY  # 途中のレイヤからはprompt_inputを渡さない
+        return self.params.model_copy(update=update), target_filter
+
+    def run_workflow(self, params: ZoltraakParams, target_filter: set[str] | None) -> None:
+        target_info = "全て" if target_filter is None else f"{len(target_filter)}件"
+        log_i("再生成を開始します: layer=%s, target=%s", params.magic_layer, target_info)
+        self.run_workflow_fn(params, target_filter)
+        log_i("再生成が完了しました: layer=%s, target=%s", params.magic_layer, target_info)
+
+    def get_watch_files(self) -> set[str]:
+        watch_files = self.lineage.get_sources() | {self.file_info.structure_file_path}
+        if self.input_file_path:
+            watch_files.add(self.input_file_path)
+        return watch_files
+
+    def get_changed_files(self, file_paths: set[str]) -> set[str]:
+        """内容が変わったファイルだけを返す(mtimeだけの変更や自分の書き込みを除く)"""
+        changed_files = set()
+        for file_path in file_paths:
+            file_hash = FileInfo.calculate_file_hash(file_path)
+            if file_hash != self.file_hashes.get(file_path):
+                self.file_hashes[file_path] = file_hash
+                changed_files.add(file_path)
+        return changed_files
+
+    def refresh(self) -> None:
+        """生成結果を反映して監視対象とハッシュを更新する"""
+        self.lineage.load()
+        watch_files = self.get_watch_files()
+        self.file_hashes = {file_path: FileInfo.calculate_file_hash(file_path) for file_path in watch_files}
+        self.watcher.set_file_paths(watch_files)
+        log("監視対象を更新しました: %s", self.watcher)
+
+    def __str__(self) -> str:
+        return f"WatchRunner({self.params.canonical_name}, {self.watcher})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
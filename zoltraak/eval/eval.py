@@ -1,3 +1,6 @@
+import queue
+import threading
+
 from deepeval.metrics import AnswerRelevancyMetric
 from deepeval.models import DeepEvalBaseLLM
 from deepeval.test_case import (
@@ -7,6 +10,8 @@ from pydantic import BaseModel
 
 import zoltraak.llms.litellm_api as litellm
 import zoltraak.settings
+from zoltraak.eval.score_cache import ScoreCache
+from zoltraak.utils.log_util import log
 
 
 class SchemaStatements(BaseModel):
@@ -35,7 +40,15 @@ class CustomLitellmDeepEval(DeepEvalBaseLLM):
         return resp
 
     async def a_generate(self, prompt: str, schema: type[BaseModel] = SchemaStatements) -> str:  # noqa: W0221
-        return self.generate(prompt, schema)
+        resp = await litellm.generate_response_raw_async(
+            model=self.model_name,
+            prompt=prompt,
+            api_key=self.gemini_api_key,
+            response_format=schema,
+        )
+        if schema and hasattr(schema, "model_validate_json") and callable(schema.model_validate_json):
+            return schema.model_validate_json(resp)
+        return resp
 
     def get_model_name(self) -> str:  # noqa: W0221
         return self.model_name
@@ -64,28 +77,104 @@ class CustomAnswerRelevancyMetric(AnswerRelevancyMetric):
         self.using_native_model = False
 
 
-def get_score(src_content: str, dst_content: str, relation="input vs output") -> float:
-    deep_eval = CustomLitellmDeepEval()
-    eval_input = f"""Please judge src_contents vs dst_content(=output).
+class ScoreEvaluator:
+    """get_scoreの評価器
+
+    - 評価モデル(CustomLitellmDeepEval)は1つを使い回す
+    - metricは評価中の状態を持つため、プールしてスレッドごとに貸し出す
+    - 同じ(src, dst, relation, 評価モデル)の評価結果はScoreCacheから返す
+    """
+
+    _instance: "ScoreEvaluator | None" = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.deep_eval = CustomLitellmDeepEval()
+        self.score_cache = ScoreCache()
+        self._metric_pool: queue.SimpleQueue[AnswerRelevancyMetric] = queue.SimpleQueue()
+
+    @staticmethod
+    def get_instance() -> "ScoreEvaluator":
+        with ScoreEvaluator._instance_lock:
+            if ScoreEvaluator._instance is None:
+                ScoreEvaluator._instance = ScoreEvaluator()
+            return ScoreEvaluator._instance
+
+    def acquire_metric(self) -> AnswerRelevancyMetric:
+        try:
+            return self._metric_pool.get_nowait()
+        except queue.Empty:
+            return AnswerRelevancyMetric(model=self.deep_eval)
+
+    def release_metric(self, metric: AnswerRelevancyMetric) -> None:
+        self._metric_pool.put(metric)
+
+    def get_cache_key(self, src_content: str, dst_content: str, relation: str) -> str:
+        return ScoreCache.get_key(src_content, dst_content, relation, self.deep_eval.get_model_name())
+
+    @staticmethod
+    def create_test_case(src_content: str, dst_content: str, relation: str) -> LLMTestCase:
+        eval_input = f"""Please judge src_contents vs dst_content(=output).
 The relation of src_content and dst_content is "{relation}".
 
 src_content:
 {src_content}
 """
-    test_case = LLMTestCase(input=eval_input, actual_output=dst_content)
-    metric = AnswerRelevancyMetric(model=deep_eval)
-    ret = metric.measure(test_case)
-    print("ret=", ret)
-    if ret is None:
-        if "The score is" in metric.reason:
-            score_str = metric.reason.split("The score is")[1].strip()  # "The score is"以降の文字列を取得
-            score_str = score_str.split(" ")[0]  # Get the string up to the space
-            score_str = "".join(filter(lambda c: c.isdigit() or c in ".-", score_str))
-            ret = float(score_str)
-            print("get score from metric.reason=", metric.reason)
-            return ret
-        ret = -1.0
-    return ret
+        return LLMTestCase(input=eval_input, actual_output=dst_content)
+
+    @staticmethod
+    def get_score_from_metric(metric: AnswerRelevancyMetric, ret: float | None) -> float:
+        print("ret=", ret)
+        if ret is None:
+            if "The score is" in metric.reason:
+                score_str = metric.reason.split("The score is")[1].strip()  # "The score is"以降の文字列を取得
+                score_str = score_str.split(" ")[0]  # Get the string up to the space
+                score_str = "".join(filter(lambda c: c.isdigit() or c in ".-", score_str))
+                ret = float(score_str)
+                print("get score from metric.reason=", metric.reason)
+                return ret
+            ret = -1.0
+        return ret
+
+    def get_score(self, src_content: str, dst_content: str, relation: str) -> float:
+        key = self.get_cache_key(src_content, dst_content, relation)
+        score = self.score_cache.get(key)
+        if score is not None:
+            return score
+
+        metric = self.acquire_metric()
+        try:
+            ret = metric.measure(self.create_test_case(src_content, dst_content, relation))
+            score = self.get_score_from_metric(metric, ret)
+        finally:
+            self.release_metric(metric)
+        self.score_cache.set(key, score)
+        log("score=%s, %s", score, self.score_cache)
+        return score
+
+    async def a_get_score(self, src_content: str, dst_content: str, relation: str) -> float:
+        key = self.get_cache_key(src_content, dst_content, relation)
+        score = self.score_cache.get(key)
+        if score is not None:
+            return score
+
+        metric = self.acquire_metric()
+        try:
+            ret = await metric.a_measure(self.create_test_case(src_content, dst_content, relation))
+            score = self.get_score_from_metric(metric, ret)
+        finally:
+            self.release_metric(metric)
+        self.score_cache.set(key, score)
+        log("score=%s, %s", score, self.score_cache)
+        return score
+
+
+def get_score(src_content: str, dst_content: str, relation="input vs output") -> float:
+    return ScoreEvaluator.get_instance().get_score(src_content, dst_content, relation)
+
+
+async def get_score_async(src_content: str, dst_content: str, relation="input vs output") -> float:
+    return await ScoreEvaluator.get_instance().a_get_score(src_content, dst_content, relation)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+import hashlib
+from enum import Enum
+
+from zoltraak import settings
+from zoltraak.eval.eval import get_score
+from zoltraak.eval.local_scorer import LocalScorer
+from zoltraak.utils.log_util import log
+
+
+class EvalPolicy(str, Enum):
+    OFF = "off"  # 評価しない(常にNO_CHECK_SCOREを返す)
+    SAMPLED = "sampled"  # ローカル評価 + 一定割合だけLLM評価
+    TIERED = "tiered"  # ローカル評価 + 判断が難しい場合だけLLM評価
+    ALL = "all"  # 常にLLM評価
+
+    @staticmethod
+    def get(magic_layer: str = "") -> "EvalPolicy":
+        """レイヤー別の指定(ZOLTRAAK_EVAL_POLICY_LAYERS)があれば優先する"""
+        layer = str(magic_layer).removeprefix("layer_")
+        policy_str = EvalPolicy.get_layer_policy_map().get(layer, settings.eval_policy)
+        try:
+            return EvalPolicy(policy_str)
+        except ValueError:
+            log("不正な評価ポリシーのためtieredを使います: %s", policy_str)
+            return EvalPolicy.TIERED
+
+    @staticmethod
+    def get_layer_policy_map() -> dict[str, str]:
+        """例: "5_code_gen:all,11_clean_up:off" => {"5_code_gen": "all", "11_clean_up": "off"}"""
+        layer_policy_map = {}
+        for item in settings.eval_policy_layers.split(","):
+            if ":" in item:
+                layer, policy_str = item.split(":", 1)
+                layer_policy_map[layer.strip().removeprefix("layer_")] = policy_str.strip().lower()
+        return layer_policy_map
+
+
+NO_CHECK_SCORE = 1.0  # 評価なしの場合のスコア(BaseConverter.NO_CHECK_SCOREと同じ)
+
+
+def is_sampled(target_file_path: str, target_content: str) -> bool:
+    """同じ内容なら毎回同じ結果になるようにハッシュでサンプリングする"""
+    digest = hashlib.sha256((target_file_path + "\n" + target_content).encode("utf-8")).hexdigest()
+    return int(digest[:8], 16) / 0xFFFFFFFF < settings.eval_sample_rate
+
+
+def get_policy_score(
+    src_content: str,
+    dst_content: str,
+    relation: str = "input vs output",
+    magic_layer: str = "",
+    target_file_path: str = "",
+) -> float:
+    """評価ポリシーに従ってローカル評価とLLM評価(get_score)を使い分けてスコアを返す"""
+    policy = EvalPolicy.get(magic_layer)
+    if policy == EvalPolicy.OFF:
+        return NO_CHECK_SCORE
+    if policy == EvalPolicy.ALL:
+        return get_score(src_content, dst_content, relation)
+
+    local_score = LocalScorer.score(src_content, dst_content, target_file_path)
+    log("local_score=%s, policy=%s, layer=%s", local_score, policy.value, magic_layer)
+    is_need_llm = local_score.is_ambiguous
+    if policy == EvalPolicy.SAMPLED:
+        is_need_llm = is_sampled(target_file_path, dst_content)
+    if is_need_llm:
+        return get_score(src_content, dst_content, relation)
+    return local_score.score
@@ -0,0 +1,139 @@
+import os
+import threading
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from zoltraak import settings
+from zoltraak.eval.eval_policy import get_policy_score
+from zoltraak.utils.file_util import FileUtil
+from zoltraak.utils.log_util import log, log_i, log_w
+
+
+@dataclass
+class EvalTask:
+    """バックグラウンド評価の依頼(checksは(src, dst, relation)のリストで、最小スコアを採用する)"""
+
+    target_file_path: str = ""
+    magic_layer: str = ""
+    checks: list[tuple[str, str, str]] = field(default_factory=list)
+    dst_content: str = ""  # 評価対象の内容(ロールバック前に書き換えられていないことを確認する)
+    rollback_content: str = ""  # スコアが低い場合に戻す内容(空ならロールバックしない)
+    past_source_file_path: str = ""
+    past_target_file_path: str = ""
+
+
+@dataclass
+class EvalResult:
+    target_file_path: str = ""
+    magic_layer: str = ""
+    score: float = -1.0
+    is_rolled_back: bool = False
+
+
+class BackgroundEvaluator:
+    """生成結果の評価をバックグラウンドで並列実行するクラス
+
+    - submit()はすぐに戻るので、評価を待たずに次のファイルの生成に進める
+    - drain()で評価の完了を待ち、スコアがしきい値未満の出力をロールバックする
+      (ロールバックしたファイルは前回ソースを消して、再生成の対象にする)
+    - drain(target_file_paths)では、後続のレイヤが読むファイルの評価だけを待つ
+    - 同じターゲットの評価を再依頼した場合、未着手の古い依頼は取り消す
+    """
+
+    _instance: "BackgroundEvaluator | None" = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_workers: int = 0):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.eval_queue_max_workers, thread_name_prefix="eval"
+        )
+        self.pending: list[tuple[EvalTask, Future]] = []
+        self.results: list[EvalResult] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_instance() -> "BackgroundEvaluator":
+        with BackgroundEvaluator._instance_lock:
+            if BackgroundEvaluator._instance is None:
+                BackgroundEvaluator._instance = BackgroundEvaluator()
+            return BackgroundEvaluator._instance
+
+    def submit(self, task: EvalTask) -> None:
+        with self._lock:
+            for pending_task, future in list(self.pending):
+                if pending_task.target_file_path == task.target_file_path and future.cancel():
+                    self.pending.remove((pending_task, future))
+            self.pending.append((task, self.executor.submit(self.evaluate, task)))
+        log("評価を予約しました: %s (待ち=%d)", task.target_file_path, len(self.pending))
+
+    @staticmethod
+    def evaluate(task: EvalTask) -> float:
+        scores = [
+            get_policy_score(src, dst, relation, magic_layer=task.magic_layer, target_file_path=task.target_file_path)
+            for src, dst, relation in task.checks
+        ]
+        return min(scores, default=-1.0)
+
+    def drain(self, target_file_paths: Iterable[str] | None = None) -> list[EvalResult]:
+        """予約済みの評価(target_file_pathsの指定時はそのファイルだけ)の完了を待って結果を返す
+
+        スコアが低い出力はロールバックする
+        """
+        with self._lock:
+            if target_file_paths is None:
+                pending, self.pending = self.pending, []
+            else:
+                abs_paths = {os.path.abspath(file_path) for file_path in target_file_paths}
+                pending = [item for item in self.pending if os.path.abspath(item[0].target_file_path) in abs_paths]
+                self.pending = [item for item in self.pending if item not in pending]
+
+        drained_results = []
+        for task, future in pending:
+            try:
+                score = future.result()
+            except Exception as e:  # noqa: BLE001
+                log_w("評価に失敗しました: %s, %s", task.target_file_path, e)
+                score = -1.0
+            result = EvalResult(task.target_file_path, task.magic_layer, score)
+            if 0 <= score < settings.eval_rollback_threshold:
+                result.is_rolled_back = BackgroundEvaluator.rollback(task, score)
+            drained_results.append(result)
+
+        with self._lock:
+            self.results += drained_results
+        return drained_results
+
+    @staticmethod
+    def rollback(task: EvalTask, score: float) -> bool:
+        if not task.rollback_content:
+            return False
+        if FileUtil.read_file(task.target_file_path) != task.dst_content:
+            log_w("評価後に更新されているためロールバックしません: %s", task.target_file_path)
+            return False
+
+        log("スコアが低いため、前回の内容に戻します。score=%s, %s", score, task.target_file_path)
+        FileUtil.write_file(task.target_file_path, task.rollback_content)
+        if task.past_target_file_path:
+            FileUtil.write_file(task.past_target_file_path, task.rollback_content)
+        if os.path.isfile(task.past_source_file_path):
+            # ソース変更ありと判定させて再生成する
+            os.remove(task.past_source_file_path)
+        return True
+
+    def show_summary(self) -> None:
+        self.drain()
+        if not self.results:
+            return
+        lines = [
+            f"  {result.magic_layer}: {result.target_file_path} score={result.score:.3f}"
+            + (" ->ロールバック" if result.is_rolled_back else "")
+            for result in self.results
+        ]
+        log_i("評価結果(バックグラウンド)=\n%s", "\n".join(lines))
+
+    def __str__(self) -> str:
+        return f"BackgroundEvaluator(pending={len(self.pending)}, results={len(self.results)})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,103 @@
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+
+from zoltraak.utils.grimoire_search import GrimoireIndex
+from zoltraak.utils.patch_engine import PatchEngine
+
+
+@dataclass
+class LocalScore:
+    """ローカル評価の結果(checksは各観点のスコア[0-1])"""
+
+    score: float = 0.0
+    checks: dict[str, float] = field(default_factory=dict)
+    is_ambiguous: bool = False
+
+
+class LocalScorer:
+    """LLMを使わずにsource => targetの変換結果を概算評価するクラス(評価の1段目)
+
+    - 構造: pyはコンパイル可否、mdは見出しの有無、差分マーカーの残存
+    - キーワード網羅率: ソースの頻出語がターゲットに含まれる割合
+    - 長さ比率: ソースに対してターゲットが極端に短くないか/長くないか
+    """
+
+    CODE_EXTENSIONS = (".py", ".js", ".ts", ".cs", ".java", ".go", ".rs")
+    # 行全体が差分マーカーの場合だけ残存とみなす(コード例の```diffや@@ -は正常な内容)
+    LEFTOVER_MARKER_PATTERN = re.compile(
+        rf"^(?:{re.escape(PatchEngine.SEARCH_MARKER)}|{re.escape(PatchEngine.REPLACE_MARKER)})[ \t]*$", re.MULTILINE
+    )
+    KEY_TERM_COUNT = 30  # 網羅率を見るソースの頻出語の数
+    MIN_LENGTH_RATIO = 0.1
+    MAX_LENGTH_RATIO = 10.0
+    WEIGHTS: dict[str, float] = {"structure": 0.3, "coverage": 0.5, "length": 0.2}  # noqa: RUF012
+
+    # この範囲のスコアは判断が難しいのでLLMで評価する
+    AMBIGUOUS_LOW = 0.4
+    AMBIGUOUS_HIGH = 0.7
+
+    @staticmethod
+    def score(source_content: str, target_content: str, target_file_path: str = "") -> LocalScore:
+        checks = {
+            "structure": LocalScorer.get_structure_score(target_content, target_file_path),
+            "coverage": LocalScorer.get_coverage_score(source_content, target_content, target_file_path),
+            "length": LocalScorer.get_length_score(source_content, target_content),
+        }
+        if checks["structure"] == 0.0:
+            # 壊れている場合は他の観点によらず0点(LLM評価も不要)
+            return LocalScore(score=0.0, checks=checks, is_ambiguous=False)
+
+        score = sum(checks[name] * weight for name, weight in LocalScorer.WEIGHTS.items())
+        is_ambiguous = LocalScorer.AMBIGUOUS_LOW <= score < LocalScorer.AMBIGUOUS_HIGH
+        return LocalScore(score=round(score, 3), checks=checks, is_ambiguous=is_ambiguous)
+
+    @staticmethod
+    def is_code(target_file_path: str) -> bool:
+        return target_file_path.endswith(LocalScorer.CODE_EXTENSIONS)
+
+    @staticmethod
+    def get_structure_score(target_content: str, target_file_path: str) -> float:
+        if not target_content.strip():
+            return 0.0
+        if LocalScorer.LEFTOVER_MARKER_PATTERN.search(target_content):
+            return 0.0
+        if target_file_path.endswith(".py"):
+            try:
+                compile(target_content, target_file_path, "exec")
+            except (SyntaxError, ValueError):
+                return 0.0
+            return 1.0
+        if target_file_path.endswith(".md"):
+            has_heading = any(line.startswith("#") for line in target_content.splitlines())
+            return 1.0 if has_heading else 0.5
+        return 1.0
+
+    @staticmethod
+    def get_key_terms(content: str, is_code: bool) -> list[str]:  # noqa: FBT001
+        """ソースの頻出語(コードが対象の場合は識別子になりうる英数字の語だけ)"""
+        tokens = GrimoireIndex.tokenize(content)
+        if is_code:
+            tokens = [token for token in tokens if token.isascii() and len(token) >= 3]  # noqa: PLR2004
+        else:
+            tokens = [token for token in tokens if len(token) >= 2]  # noqa: PLR2004
+        return [term for term, _ in Counter(tokens).most_common(LocalScorer.KEY_TERM_COUNT)]
+
+    @staticmethod
+    def get_coverage_score(source_content: str, target_content: str, target_file_path: str) -> float:
+        key_terms = LocalScorer.get_key_terms(source_content, LocalScorer.is_code(target_file_path))
+        if not key_terms:
+            return 0.5  # 判断材料なし
+        target_tokens = set(GrimoireIndex.tokenize(target_content))
+        return sum(1 for term in key_terms if term in target_tokens) / len(key_terms)
+
+    @staticmethod
+    def get_length_score(source_content: str, target_content: str) -> float:
+        if not source_content.strip():
+            return 0.5  # 判断材料なし
+        ratio = len(target_content) / len(source_content)
+        if ratio < LocalScorer.MIN_LENGTH_RATIO:
+            return ratio / LocalScorer.MIN_LENGTH_RATIO
+        if ratio > LocalScorer.MAX_LENGTH_RATIO:
+            return LocalScorer.MAX_LENGTH_RATIO / ratio
+        return 1.0
@@ -0,0 +1,93 @@
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+
+from zoltraak.eval.local_scorer import LocalScorer
+from zoltraak.utils.line_diff import LineDiff
+from zoltraak.utils.log_util import log, log_i
+from zoltraak.utils.md_section import MdSectionUtil
+
+
+@dataclass
+class MatchRateEstimate:
+    """ローカルでの適合度の推定結果(match_rateがNoneならLLMで判定する)"""
+
+    decision: str = "ambiguous"  # patch, rebuild, ambiguous
+    match_rate: int | None = None
+    checks: dict[str, float] = field(default_factory=dict)
+
+
+class MatchRateEstimator:
+    """LLMに適合度(match_rate)を問い合わせる前に、明らかなケースをローカルで判定するクラス
+
+    - line_overlap: 前回ソースと今回ソースの正規化した行の一致率
+    - section_alignment: 今回ソースの見出しのうち前回ソースにもある割合
+    - source_diff_ratio: ソース差分の比率(is_need_handle_new_target_fileと同じ計算)
+    """
+
+    PATCH_MATCH_RATE = 80  # MATCH_RATE_THRESHOLD_NG以上 => 差分適用
+    REBUILD_MATCH_RATE = 20  # MATCH_RATE_THRESHOLD_NG未満 => 再作成
+
+    PATCH_MAX_DIFF_RATIO = 0.1
+    PATCH_MIN_OVERLAP = 0.8
+    REBUILD_MAX_OVERLAP = 0.3
+
+    _path_counter: Counter = Counter()  # noqa: RUF012
+    _lock = threading.Lock()
+
+    @staticmethod
+    def estimate(
+        old_source_content: str, new_source_content: str, old_target_content: str, source_diff_ratio: float
+    ) -> MatchRateEstimate:
+        checks = {
+            "line_overlap": MatchRateEstimator.get_line_overlap(old_source_content, new_source_content),
+            "section_alignment": MatchRateEstimator.get_section_alignment(old_source_content, new_source_content),
+            "source_diff_ratio": source_diff_ratio,
+            "target_structure": LocalScorer.get_structure_score(old_target_content, ""),
+        }
+        min_overlap = min(checks["line_overlap"], checks["section_alignment"])
+        if checks["target_structure"] == 0.0 or min_overlap < MatchRateEstimator.REBUILD_MAX_OVERLAP:
+            estimate = MatchRateEstimate("rebuild", MatchRateEstimator.REBUILD_MATCH_RATE, checks)
+        elif (
+            source_diff_ratio <= MatchRateEstimator.PATCH_MAX_DIFF_RATIO
+            and min_overlap >= MatchRateEstimator.PATCH_MIN_OVERLAP
+        ):
+            estimate = MatchRateEstimate("patch", MatchRateEstimator.PATCH_MATCH_RATE, checks)
+        else:
+            estimate = MatchRateEstimate("ambiguous", None, checks)
+
+        with MatchRateEstimator._lock:
+            path = "llm" if estimate.match_rate is None else f"local_{estimate.decision}"
+            MatchRateEstimator._path_counter[path] += 1
+            path_counter = dict(MatchRateEstimator._path_counter)
+        log("match_rateのローカル判定: %s, checks=%s, 累計=%s", estimate.decision, checks, path_counter)
+        return estimate
+
+    @staticmethod
+    def get_line_overlap(old_content: str, new_content: str) -> float:
+        old_lines = LineDiff.normalize_lines(old_content)
+        new_lines = LineDiff.normalize_lines(new_content)
+        if not old_lines or not new_lines:
+            return 0.0
+        old_ids, new_ids = LineDiff.to_ids(old_lines, new_lines)
+        matched = sum(size for _, _, size in LineDiff.get_matching_blocks(old_ids, new_ids))
+        return matched / max(len(old_lines), len(new_lines))
+
+    @staticmethod
+    def get_section_alignment(old_content: str, new_content: str) -> float:
+        new_keys = [section.key for section in MdSectionUtil.split(new_content) if section.key]
+        if not new_keys:
+            return 1.0  # 見出しがない場合は判断材料にしない
+        old_keys = {section.key for section in MdSectionUtil.split(old_content)}
+        return sum(1 for key in new_keys if key in old_keys) / len(new_keys)
+
+    @staticmethod
+    def get_path_counter() -> dict[str, int]:
+        with MatchRateEstimator._lock:
+            return dict(MatchRateEstimator._path_counter)
+
+    @staticmethod
+    def show_stats() -> None:
+        path_counter = MatchRateEstimator.get_path_counter()
+        if path_counter:
+            log_i("match_rateの判定経路: %s", path_counter)
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import pathlib
+import threading
+
+from zoltraak import settings
+from zoltraak.utils.log_util import log, log_w
+
+
+class ScoreCache:
+    """get_scoreの結果を(src hash, dst hash, relation, 評価モデル)をキーにしてキャッシュするクラス
+
+    - メモリ上のdictと、cache_dir/score/以下の1キー1ファイルの2段構成
+    - 評価に失敗したスコア(負の値)はキャッシュしない
+    """
+
+    def __init__(self, cache_dir: str = ""):
+        self.cache_dir = pathlib.Path(cache_dir or settings.cache_dir) / "score"
+        self._score_map: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.hit_count = 0
+        self.miss_count = 0
+
+    @staticmethod
+    def get_key(src_content: str, dst_content: str, relation: str, model_name: str) -> str:
+        src_digest = hashlib.sha256(src_content.encode("utf-8")).hexdigest()
+        dst_digest = hashlib.sha256(dst_content.encode("utf-8")).hexdigest()
+        key_src = f"{src_digest}\n{dst_digest}\n{relation}\n{model_name}"
+        return hashlib.sha256(key_src.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> float | None:
+        with self._lock:
+            if key in self._score_map:
+                self.hit_count += 1
+                return self._score_map[key]
+
+        score = None
+        cache_path = self.cache_dir / f"{key}.json"
+        if cache_path.is_file():
+            try:
+                score = float(json.loads(cache_path.read_text(encoding="utf-8"))["score"])
+            except (OSError, ValueError, KeyError) as e:
+                log_w("スコアキャッシュの読み込みに失敗しました: %s, %s", cache_path, e)
+
+        with self._lock:
+            if score is None:
+                self.miss_count += 1
+                return None
+            self.hit_count += 1
+            self._score_map[key] = score
+        log("スコアキャッシュを使用します: score=%s", score)
+        return score
+
+    def set(self, key: str, score: float) -> None:
+        if score < 0:
+            return
+        with self._lock:
+            self._score_map[key] = score
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_path = self.cache_dir / f"{key}.json"
+        tmp_path = cache_path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps({"score": score}), encoding="utf-8")
+        tmp_path.replace(cache_path)
+
+    def __str__(self) -> str:
+        return f"ScoreCache({self.cache_dir}, hit={self.hit_count}, miss={self.miss_count})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
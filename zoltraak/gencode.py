@@ -1,8 +1,7 @@
-from instant_prompt_box import InstantPromptBox
-
-from zoltraak import settings
-from zoltraak.llms.litellm_api import LitellmApi, LitellmParams
+from zoltraak.llms.fix_session import FixSession
+from zoltraak.llms.litellm_api import LitellmApi
 from zoltraak.schema.schema import MagicInfo
+from zoltraak.utils.code_validator import CodeValidator
 from zoltraak.utils.file_util import FileUtil
 from zoltraak.utils.log_util import log, log_inout
 from zoltraak.utils.subprocess_util import SubprocessUtil
@@ -16,6 +15,7 @@ class TargetCodeGenerator:
         self.last_code = ""
         self.last_exception = None
         self.litellm_api = litellm_api
+        self.fix_session = FixSession(self.file_info.target_file_path, litellm_api)
 
     def process_generated_code(self, code) -> str:
         """
@@ -86,20 +86,38 @@ class TargetCodeGenerator:
 
         コメント: 最終的に修正したファイルを再書き込みしている。
         """
+        code = self.validate_generated_code(code)
         max_try_count = 3
         for i in range(max_try_count):
             if self.try_execute_generated_code_one(code):
                 log(f"コード実行に成功しました。try{i}")
                 return True
 
-            fix_code_prompt = InstantPromptBox.zoltraak.zoltraak_prompt_fix_code(
-                code=code, error_message=str(self.last_exception)
-            )
-            code = self.get_fixed_code(code, fix_code_prompt)
+            code = self.fix_session.fix(code, str(self.last_exception))
             log(f"修正したコードを再実行します。try{i}")
         log(f"{max_try_count}回トライしましたが、エラーが解消できませんでした。スマート推論を試みます。")
         return self.try_execute_generated_code_smart(code)
 
+    @log_inout
+    def validate_generated_code(self, code: str) -> str:
+        """実行前に静的検証して、ローカルで修復できなかった指摘だけをLLMで修正するメソッド
+        importの解決は生成中の他ファイルに依存するため、ここでは確認せずレイヤー単位の一括検証
+        (MagicWorkflow.validate_generated_files)で確認して修正する
+        """
+        validator = CodeValidator()
+        max_try_count = 3
+        for i in range(max_try_count):
+            result = validator.validate(code)
+            if result.repairs:
+                log(f"ローカルで修復しました: {result.repairs}")
+            code = result.code
+            if result.is_valid:
+                return code
+
+            log(f"静的検証でエラーが見つかりました。修正を試みます。try{i}\n{result.get_error_message()}")
+            code = self.fix_session.fix(code, result.get_error_message())
+        return validator.validate(code).code
+
     @log_inout
     def try_execute_generated_code_smart(self, code) -> bool:
         """エラー解消が難航したときに、エラーの原因を特定して修正するメソッド
@@ -107,11 +125,8 @@ class TargetCodeGenerator:
         """
         max_try_count = 3
         for i in range(max_try_count):
-            error_reason = self.get_error_reason(code)
-            fix_code_prompt = InstantPromptBox.zoltraak.zoltraak_prompt_fix_code_smart(
-                code=code, error_message=str(self.last_exception), error_reason=error_reason
-            )
-            code = self.get_fixed_code(code, fix_code_prompt)
+            # 同じ会話の中で原因分析と修正を行う(コード全体を送り直さない)
+            code = self.fix_session.fix(code, str(self.last_exception), is_smart=True)
             log(f"修正したコードを再実行します(スマート推論)。retry{i}")
 
             if self.try_execute_generated_code_one(code):
@@ -119,53 +134,12 @@ class TargetCodeGenerator:
                 return True
 
         log(
-            f"{max_try_count}回のスマート推論でもエラーが解消できませんでした。コードを確認してください。 %s",
+            f"{max_try_count}回のスマート推論でもエラーが解消できませんでした。コードを確認してください。 %s, %s",
             self.file_info.target_file_path,
+            self.fix_session,
         )
         return False
 
-    @log_inout
-    def get_fixed_code(self, code: str, fix_code_prompt: str) -> str:
-        """コードエラーを解消する処理"""
-        # litellm_params
-        litellm_params = LitellmParams.new(
-            prompt=fix_code_prompt,
-            model=settings.model_name,
-            max_tokens=settings.max_tokens_generate_code_fix,
-            temperature=settings.temperature_generate_code_fix,
-        )
-
-        code = self.litellm_api.generate_response(
-            litellm_params=litellm_params,
-        )
-        code = code.replace("```python", "").replace("```", "")
-        log("コードを修正しました。len(code)=%s", len(code))
-        return code
-
-    @log_inout
-    def get_error_reason(self, code):
-        """エラー解消が難航したときに、エラーの原因を推定する"""
-        error_reason_prompt = f"""
-        以下のPythonコードにエラーがあります。
-        コード: {code}
-        エラーメッセージ: {self.last_exception!s}
-        考えられるエラーの原因と解決方法を教えてください。
-        推論が発散しないように、簡潔な説明をお願いします。
-        プログラムコードを回答する場合は関数単位やブロック単位で完全なコードを記載してください。
-        """
-        # litellm_params
-        litellm_params = LitellmParams.new(
-            prompt=error_reason_prompt,
-            model=settings.model_name,
-            max_tokens=settings.max_tokens_generate_error_reason,
-            temperature=settings.temperature_generate_error_reason,
-        )
-        error_reason = self.litellm_api.generate_response(
-            litellm_params=litellm_params,
-        )
-        log("error_reason=%s", error_reason)
-        return error_reason
-
     def open_target_file_in_vscode(self):
         """
         ターゲットファイルをVS Codeで開くメソッド
@@ -1,8 +1,12 @@
 import os
 import sys
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
 
 from tqdm import tqdm
 
+from zoltraak import settings
 from zoltraak.converter.base_converter import BaseConverter
 from zoltraak.core.prompt_manager import PromptManager
 from zoltraak.schema.schema import MagicInfo, MagicLayer, SourceTargetSet
@@ -36,29 +40,57 @@ class FileAnalyzer(BaseConverter):
         self.source_target_set_list = []
         file_info = self.magic_info.file_info
 
+        # 要求定義書(全体)はレイヤで1回だけ読み込む
+        request_file_content = FileUtil.read_file(file_info.request_file_path)
+
         # affected_file_list
         affected_file_list = FileUtil.read_affected_file_list_content(
-            file_info.request_file_path, file_info.target_dir, file_info.canonical_name
+            file_info.request_file_path, file_info.target_dir, file_info.canonical_name, request_file_content
         )
 
-        for code_file_path in tqdm(affected_file_list, unit="files", file=sys.stdout, desc="prepare_analyze"):
-            source_target_set = self.prepare_generation_file(code_file_path)
-            if source_target_set:
-                self.source_target_set_list.append(source_target_set)
-                log("append source_target_set= %s", source_target_set)
+        # ファイル単位の準備はファイルの読み書きを伴うので並列に実行する
+        self.source_target_set_list = self.prepare_generation_parallel(
+            affected_file_list,
+            lambda code_file_path: self.prepare_generation_file(code_file_path, request_file_content),
+            desc="prepare_analyze",
+        )
 
         return self.source_target_set_list
 
+    def prepare_generation_parallel(
+        self, items: list[Any], prepare_fn: Callable[[Any], SourceTargetSet | None], desc: str = ""
+    ) -> list[SourceTargetSet]:
+        """prepare_fnをitemsに並列に適用して、Noneを除いた結果をitemsの順に返す
+
+        prepare_fnはmagic_infoなどの共有状態を書き換えないこと
+        """
+        with ThreadPoolExecutor(max_workers=settings.prepare_generation_max_workers) as executor:
+            results = list(
+                tqdm(
+                    executor.map(prepare_fn, items),
+                    total=len(items),
+                    unit="files",
+                    file=sys.stdout,
+                    desc=desc or self.magic_info.magic_layer + "(prepare_generation)",
+                )
+            )
+        source_target_set_list = [source_target_set for source_target_set in results if source_target_set]
+        for source_target_set in source_target_set_list:
+            log("append source_target_set= %s", source_target_set)
+        return source_target_set_list
+
     @log_inout
-    def prepare_generation_file(self, code_file_path: str) -> SourceTargetSet | None:
+    def prepare_generation_file(
+        self, code_file_path: str, request_file_content: str | None = None
+    ) -> SourceTargetSet | None:
         # code_file_path: structure_file由来の最終的に生成するべきファイルパス(拡張子はpy or mdを想定)
 
         # requirement_file_path: ソースファイルに対する変更要求のファイルパス
         requirement_file_path = os.path.splitext(code_file_path)[0] + "_requirement.md"
 
-        # file_info.request_file_path: 要求定義書（全体）
-        request_file_path = self.magic_info.file_info.request_file_path
-        request_file_content = FileUtil.read_file(request_file_path)
+        # file_info.request_file_path: 要求定義書（全体）(指定がなければ読み込む)
+        if request_file_content is None:
+            request_file_content = FileUtil.read_file(self.magic_info.file_info.request_file_path)
 
         # requirement_file_content: 個々の詳細設計書に対応する情報構造体のファイルパス
         requirement_file_content = FileUtil.read_file(requirement_file_path)
@@ -69,9 +101,9 @@ class FileAnalyzer(BaseConverter):
         merged_requirement_file_content += "\n\n＜ファイル単位の要求定義書＞\n"
         merged_requirement_file_content += requirement_file_content
 
-        # merged_requirement_file_path に保存
+        # merged_requirement_file_path に保存(内容が同じなら書き込まない)
         merged_requirement_file_path = os.path.splitext(code_file_path)[0] + "_merged_requirement.md"
-        FileUtil.write_file(merged_requirement_file_path, merged_requirement_file_content)
+        FileUtil.write_file_if_changed(merged_requirement_file_path, merged_requirement_file_content)
 
         if self.magic_info.magic_layer is MagicLayer.LAYER_2_1_AFFECTED_FILE_LIST_GEN:
             # MagicLayer.LAYER_2_1_AFFECTED_FILE_LIST_GEN
@@ -1,13 +1,35 @@
 import os
-import sys
-
-from tqdm import tqdm
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 
+from zoltraak import settings
 from zoltraak.converter.base_converter import BaseConverter
 from zoltraak.core.prompt_manager import PromptManager
 from zoltraak.schema.schema import MagicInfo, MagicLayer, SourceTargetSet
 from zoltraak.utils.file_util import FileUtil
-from zoltraak.utils.log_util import log, log_inout
+from zoltraak.utils.log_util import log, log_i, log_inout, log_w
+from zoltraak.utils.structure_manifest import StructureManifest
+
+
+class CodeFileIndex:
+    """コードファイルの拡張子を除いたパス(stem)の索引
+
+    ファイルパスの先頭がいずれかのstemと一致するかを、stemの長さごとにhashで引いて判定する
+    (ファイル数 x stemの長さの種類数で済むので、ファイル数 x コードファイル数の部分一致より速い)
+    """
+
+    def __init__(self, code_file_path_list: list[str]):
+        self.stem_set = {os.path.splitext(code_file_path)[0] for code_file_path in code_file_path_list}
+        self.stem_lengths = sorted({len(stem) for stem in self.stem_set})
+
+    def has_prefix_of(self, file_path: str) -> bool:
+        return any(file_path[:length] in self.stem_set for length in self.stem_lengths if length <= len(file_path))
+
+    def __str__(self) -> str:
+        return f"CodeFileIndex(stems={len(self.stem_set)}, lengths={len(self.stem_lengths)})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
 
 
 class FileRemover(BaseConverter):
@@ -18,6 +40,9 @@ class FileRemover(BaseConverter):
         structure_file_path: ファイル構造定義書
     """
 
+    REMOVE_BATCH_SIZE = 256  # 並列に削除する1バッチのファイル数
+    MAX_REPORT_LINES = 50  # dry-runで表示する削除対象の数(全件はファイルに書き出す)
+
     def __init__(self, magic_info: MagicInfo, prompt_manager: PromptManager):
         super().__init__(magic_info, prompt_manager)
         self.magic_info = magic_info
@@ -35,12 +60,17 @@ class FileRemover(BaseConverter):
         # step1: ファイル構造定義書を取得
         self.source_target_set_list = []
         file_info = self.magic_info.file_info
-        code_file_path_list = FileUtil.read_structure_file_content(
-            file_info.structure_file_path, file_info.target_dir, file_info.canonical_name
-        )
-        code_file_path_final_list = FileUtil.read_structure_file_content(
-            file_info.structure_file_path, file_info.final_dir, file_info.canonical_name
-        )
+        manifest = StructureManifest.load(file_info.structure_file_path)
+        if not manifest.rel_paths:
+            # ファイル構造定義書が読めない場合に全ファイルを消さないようにする
+            log_w(
+                "ファイル構造定義書にファイルがないためクリーンアップをスキップします: %s",
+                file_info.structure_file_path,
+            )
+            self.magic_info.history_info += " ->クリーンアップ(構造定義なしでスキップ)"
+            return []
+        code_file_path_list = manifest.get_file_paths(file_info.target_dir, file_info.canonical_name)
+        code_file_path_final_list = manifest.get_file_paths(file_info.final_dir, file_info.canonical_name)
 
         # step2: ファイルリストとファイル構造定義書を比較して、不要ファイルを削除
         removed_file_paths_set = self.remove_dirs(file_info.target_dir, code_file_path_list)
@@ -49,40 +79,106 @@ class FileRemover(BaseConverter):
 
     @log_inout
     def remove_dirs(self, root_dir: str, code_file_path_list: list[str]) -> list[str]:
-        """指定フォルダ配下をルールに従って削除する"""
-
-        # ファイル,フォルダリストを取得
-        file_paths, dir_paths = FileUtil.find_files(root_dir, "")  # 拡張子が空文字列の場合は全ファイルを取得
-
-        # ファイルリストとファイル構造定義書を比較して、不要ファイルを削除
-        self.magic_info.history_info += " ->クリーンアップ(対象なしでスキップ)"
-        remove_count = 0
+        """指定フォルダ配下をルールに従って削除する(dry_runの場合は削除対象を報告するだけ)"""
+
+        # ファイルを走査しながらファイル構造定義書と比較して、不要ファイルを集める
+        code_file_index = CodeFileIndex(code_file_path_list)
+        dir_paths: list[str] = []
+        remove_file_paths = [
+            file_path
+            for file_path in FileRemover.iter_files(root_dir, dir_paths)
+            if FileRemover.should_remove_file(file_path, code_file_index)
+        ]
+        log("クリーンアップ対象: %s 削除=%d, %s", root_dir, len(remove_file_paths), code_file_index)
+        if not remove_file_paths:
+            self.magic_info.history_info += " ->クリーンアップ(対象なしでスキップ)"
+        elif self.magic_info.is_dry_run:
+            self.report_dry_run(root_dir, remove_file_paths)
+            self.magic_info.history_info += f" ->クリーンアップ(dry-run: 削除対象ファイル数: {len(remove_file_paths)})"
+            return []
+        else:
+            remove_count = FileRemover.remove_files(remove_file_paths)
+            self.magic_info.history_info += f" ->クリーンアップ(削除ファイル数: {remove_count})"
+
+        # 無駄な処理が発生するので削除したファイルをSourceTargetSetとして返さない
         removed_file_paths_set = []
-        for file_path in tqdm(file_paths, file=sys.stdout):
-            log("check file_path= %s", file_path)
-            if FileRemover.should_remove_file(file_path, code_file_path_list):
-                log("remove file_path= %s", file_path)
-                os.remove(file_path)
-                remove_count += 1
-                self.magic_info.history_info = f"クリーンアップ(削除ファイル数: {remove_count})"
-
-                # 無駄な処理が発生するので追加しない
-                # removed_file_paths_set.append(SourceTargetSet(source_file_path=file_path, target_file_path=file_path))
 
         # step4: フォルダリストから空フォルダを削除
+        if self.magic_info.is_dry_run:
+            return removed_file_paths_set
         for dir_path in sorted(dir_paths, reverse=True):  # 末端から削除するためソート
             if not os.listdir(dir_path):
                 log("remove dir_path= %s", dir_path)
-                os.rmdir(dir_path)  # noqa: PTH106, TH106
+                os.rmdir(dir_path)  # noqa: PTH106
 
         return removed_file_paths_set
 
     @staticmethod
-    def should_remove_file(file_path: str, code_file_path_list: list[str]):
+    def iter_files(root_dir: str, dir_paths: list[str]) -> Iterator[str]:
+        """root_dir配下のファイルを順に返す(見つけたフォルダはdir_pathsに追加、シンボリックリンク先はたどらない)"""
+        if not os.path.isdir(root_dir):
+            return
+        stack = [os.path.abspath(root_dir)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            dir_paths.append(entry.path)
+                            stack.append(entry.path)
+                        else:
+                            yield entry.path
+            except OSError as e:
+                log_w("フォルダを読み込めません: %s", e)
+
+    @staticmethod
+    def remove_files(file_paths: list[str]) -> int:
+        """ファイルをバッチに分けて並列に削除する(削除できたファイル数を返す)"""
+        batches = [
+            file_paths[i : i + FileRemover.REMOVE_BATCH_SIZE]
+            for i in range(0, len(file_paths), FileRemover.REMOVE_BATCH_SIZE)
+        ]
+        with ThreadPoolExecutor(max_workers=settings.file_remover_max_workers) as executor:
+            remove_count = sum(executor.map(FileRemover._remove_batch, batches))
+        log("ファイルを削除しました: %d/%d件", remove_count, len(file_paths))
+        return remove_count
+
+    @staticmethod
+    def _remove_batch(file_paths: list[str]) -> int:
+        remove_count = 0
+        for file_path in file_paths:
+            try:
+                os.remove(file_path)
+                remove_count += 1
+            except OSError as e:
+                log_w("ファイルを削除できません: %s", e)
+        return remove_count
+
+    def report_dry_run(self, root_dir: str, remove_file_paths: list[str]) -> str:
+        """削除対象の一覧をファイルに書き出して、先頭だけ表示する(dry-run)"""
+        report_file_path = os.path.join(
+            settings.cache_dir, "file_remover", f"dry_run_{self.magic_info.file_info.canonical_name}.txt"
+        )
+        rel_paths = sorted(os.path.relpath(file_path, root_dir) for file_path in remove_file_paths)
+        FileUtil.write_file(report_file_path, "\n".join(rel_paths) + "\n")
+        shown_paths = "\n".join(f"  {rel_path}" for rel_path in rel_paths[: FileRemover.MAX_REPORT_LINES])
+        if len(rel_paths) > FileRemover.MAX_REPORT_LINES:
+            shown_paths += f"\n  ...(他{len(rel_paths) - FileRemover.MAX_REPORT_LINES}件)"
+        log_i(
+            "[dry-run] %sで%d件のファイルが削除対象です(一覧: %s)\n%s",
+            root_dir,
+            len(rel_paths),
+            report_file_path,
+            shown_paths,
+        )
+        return report_file_path
+
+    @staticmethod
+    def should_remove_file(file_path: str, code_file_path_list: "list[str] | CodeFileIndex"):
         """削除対象かどうかを判定する
 
         条件： どのコードファイルにも対応していないファイルは削除対象
-        対応とはコードファイルの拡張子を除いた文字列が含まれること
+        対応とはコードファイルの拡張子を除いた文字列でファイルパスが始まること
 
         例：code_file_path_list=["./src/main.py", "./src/utils/file_util.py"]
         file_path="./src/__init__.py" は削除対象
@@ -98,11 +194,9 @@ class FileRemover(BaseConverter):
                 return False
 
         # 削除判定メイン処理
-        for code_file_path in code_file_path_list:  # noqa: SIM110
-            code_file_path_without_ext = os.path.splitext(code_file_path)[0]
-            if code_file_path_without_ext in file_path:
-                return False
-        return True
+        if not isinstance(code_file_path_list, CodeFileIndex):
+            code_file_path_list = CodeFileIndex(code_file_path_list)
+        return not code_file_path_list.has_prefix_of(file_path)
 
     @log_inout
     def convert(self) -> str:
@@ -1,13 +1,9 @@
-import os
-import sys
-
-from tqdm import tqdm
-
 from zoltraak.converter.base_converter import BaseConverter
 from zoltraak.core.prompt_manager import PromptManager
 from zoltraak.schema.schema import MagicInfo, MagicLayer, SourceTargetSet
 from zoltraak.utils.file_util import FileUtil
 from zoltraak.utils.log_util import log, log_inout
+from zoltraak.utils.structure_manifest import StructureEntry, StructureManifest, StructurePathKind
 
 
 class CodeGenerator(BaseConverter):
@@ -36,24 +32,22 @@ class CodeGenerator(BaseConverter):
         # step1: ファイル情報を更新
         self.source_target_set_list = []
         file_info = self.magic_info.file_info
-        code_file_path_list = FileUtil.read_structure_file_content(
-            file_info.structure_file_path, file_info.target_dir, file_info.canonical_name
-        )
-        print("code_file_path_list=", len(code_file_path_list))
-
-        for code_file_path in tqdm(
-            code_file_path_list,
-            unit="files",
-            file=sys.stdout,
-            desc=self.magic_info.magic_layer + "(prepare_generation)",
-        ):
-            source_target_set = self.prepare_generation_code_file(code_file_path)
+        manifest = StructureManifest.load(file_info.structure_file_path)
+        structure_entries = [
+            structure_entry
+            for structure_entry in manifest.resolve(file_info.target_dir, file_info.canonical_name)
+            if structure_entry.kind is not StructurePathKind.NO_EXT  # 拡張子なしのファイルはスキップ
+        ]
+        log("manifest=%s", manifest)
+
+        # ファイル単位の準備(パスの計算だけなので逐次で十分)、グリモアは最後のファイルに合わせる
+        for structure_entry in structure_entries:
+            source_target_set = self.prepare_generation_code_file(structure_entry)
             if source_target_set:
-                file_extension = os.path.splitext(source_target_set.target_file_path)[1]
-                if file_extension != "":
-                    # 拡張子なしのファイルはスキップ
-                    self.source_target_set_list.append(source_target_set)
-                    log("append source_target_set= %s", source_target_set)
+                self.source_target_set_list.append(source_target_set)
+                log("append source_target_set= %s", source_target_set)
+        if structure_entries:
+            self.magic_info.grimoire_compiler = self.get_grimoire_compiler(structure_entries[-1])
 
         # コンテキストには
         # step2: グリモア更新
@@ -65,22 +59,11 @@ class CodeGenerator(BaseConverter):
         return self.source_target_set_list
 
     @log_inout
-    def prepare_generation_code_file(self, code_file_path: str) -> SourceTargetSet | None:
-        # code_file_path: structure_file由来の最終的に生成するべきファイルパス(拡張子はpy or mdを想定)
-
-        # code_base_file_path: 生成済の個々のソースファイルに対応する詳細設計書のファイルパス
-        code_base_file_path = os.path.splitext(code_file_path)[0] + ".md"  # .mdに変更
-        if code_base_file_path == code_file_path:
-            code_base_file_path += ".md"  # もともと.mdだった場合は.md.mdになる
-
-        # requirement_file_path: ソースファイルに対する変更要求のファイルパス
-        requirement_file_path = os.path.splitext(code_file_path)[0] + "_requirement.md"
-
-        # info_structure_file_path: 個々の詳細設計書に対応する情報構造体のファイルパス
-        info_structure_file_path = os.path.splitext(code_file_path)[0] + "_info_structure.md"
-        # info_structure_file_path_merged: ディレクトリ単位で集約した情報構造体のファイルパス
-        info_structure_file_path_merged = os.path.join(os.path.dirname(code_file_path), "info_structure.md")
-        log("info_structure_file_path_merged=%s", info_structure_file_path_merged)
+    def prepare_generation_code_file(self, structure_entry: StructureEntry) -> SourceTargetSet | None:
+        # structure_entry.file_path: structure_file由来の最終的に生成するべきファイルパス(拡張子はpy or mdを想定)
+        code_file_path = structure_entry.file_path
+        requirement_file_path = structure_entry.requirement_file_path  # ソースファイルに対する変更要求
+        info_structure_file_path = structure_entry.info_structure_file_path  # 個々の詳細設計書に対応する情報構造体
 
         context_file_path = ""
         if self.magic_info.magic_layer is MagicLayer.LAYER_4_REQUIREMENT_GEN:
@@ -89,18 +72,12 @@ class CodeGenerator(BaseConverter):
             source_file_path = self.magic_info.file_info.md_file_path
             target_file_path = requirement_file_path
             context_file_path = ""
-            self.magic_info.grimoire_compiler = "dev_request_python.md"
         elif self.magic_info.magic_layer is MagicLayer.LAYER_5_CODE_GEN:
             # MagicLayer.LAYER_5_CODE_GEN
             # 詳細設計書 => ソースファイル
             source_file_path = requirement_file_path
             target_file_path = code_file_path
             context_file_path = info_structure_file_path
-            if target_file_path.endswith(".py"):
-                self.magic_info.grimoire_compiler = "dev_code_python.md"
-            else:
-                # mdの場合を想定（README.mdなど）
-                self.magic_info.grimoire_compiler = "general_md.md"
         else:
             # 呼ばれないはず
             source_file_path = ""
@@ -111,6 +88,13 @@ class CodeGenerator(BaseConverter):
             source_file_path=source_file_path, target_file_path=target_file_path, context_file_path=context_file_path
         )
 
+    def get_grimoire_compiler(self, structure_entry: StructureEntry) -> str:
+        if self.magic_info.magic_layer is MagicLayer.LAYER_4_REQUIREMENT_GEN:
+            return "dev_request_python.md"
+        if structure_entry.kind is StructurePathKind.PYTHON:
+            return "dev_code_python.md"
+        return "general_md.md"  # mdの場合を想定（README.mdなど）
+
     def convert(self) -> float:
         """詳細設計書 => ソースファイル"""
         return self.convert_one()
@@ -1,13 +1,11 @@
 import os
-import sys
-
-from tqdm import tqdm
 
 from zoltraak.converter.base_converter import BaseConverter
 from zoltraak.core.prompt_manager import PromptManager
 from zoltraak.schema.schema import MagicInfo, MagicLayer, SourceTargetSet
 from zoltraak.utils.file_util import FileUtil
 from zoltraak.utils.log_util import log, log_inout
+from zoltraak.utils.structure_manifest import StructureEntry, StructureManifest, StructurePathKind
 
 
 class CodeBaseGenerator(BaseConverter):
@@ -39,21 +37,22 @@ class CodeBaseGenerator(BaseConverter):
         # step1: ファイル情報を更新
         self.source_target_set_list = []
         file_info = self.magic_info.file_info
-        code_file_path_list = FileUtil.read_structure_file_content(
-            file_info.structure_file_path, file_info.target_dir, file_info.canonical_name
-        )
+        manifest = StructureManifest.load(file_info.structure_file_path)
+        structure_entries = [
+            structure_entry
+            for structure_entry in manifest.resolve(file_info.target_dir, file_info.canonical_name)
+            if os.path.isfile(structure_entry.file_path)
+        ]
+        log("manifest=%s", manifest)
 
-        for code_file_path in tqdm(
-            code_file_path_list,
-            unit="files",
-            file=sys.stdout,
-            desc=self.magic_info.magic_layer + "(prepare_generation)",
-        ):
-            if os.path.isfile(code_file_path):
-                source_target_set = self.prepare_generation_code_file(code_file_path)
-                if source_target_set:
-                    self.source_target_set_list.append(source_target_set)
-                    log("append source_target_set= %s", source_target_set)
+        # ファイル単位の準備(パスの計算だけなので逐次で十分)、グリモアはレイヤで決める
+        for structure_entry in structure_entries:
+            source_target_set = self.prepare_generation_code_file(structure_entry)
+            if source_target_set:
+                self.source_target_set_list.append(source_target_set)
+                log("append source_target_set= %s", source_target_set)
+        if self.source_target_set_list:
+            self.magic_info.grimoire_compiler = self.get_grimoire_compiler()
 
         # コンテキストには
         # step2: グリモア更新
@@ -65,18 +64,12 @@ class CodeBaseGenerator(BaseConverter):
         return self.source_target_set_list
 
     @log_inout
-    def prepare_generation_code_file(self, code_file_path: str) -> SourceTargetSet | None:
-        # code_file_path: structure_file由来の最終的に生成するべきファイルパス(拡張子はpy or mdを想定)
-
-        # code_base_file_path: 生成済の個々のソースファイルに対応する詳細設計書のファイルパス
-        code_base_file_path = os.path.splitext(code_file_path)[0] + ".md"  # .mdに変更
-        if code_base_file_path == code_file_path:
-            code_base_file_path += ".md"  # もともと.mdだった場合は.md.mdになる
-
-        # info_structure_file_path: 個々の詳細設計書に対応する情報構造体のファイルパス
-        info_structure_file_path = os.path.splitext(code_file_path)[0] + "_info_structure.md"
-        # info_structure_file_path_merged: ディレクトリ単位で集約した情報構造体のファイルパス
-        info_structure_file_path_merged = os.path.join(os.path.dirname(code_file_path), "info_structure.md")
+    def prepare_generation_code_file(self, structure_entry: StructureEntry) -> SourceTargetSet | None:
+        # structure_entry.file_path: structure_file由来の最終的に生成するべきファイルパス(拡張子はpy or mdを想定)
+        code_file_path = structure_entry.file_path
+        code_base_file_path = structure_entry.code_base_file_path  # 個々のソースファイルに対応する詳細設計書
+        info_structure_file_path = structure_entry.info_structure_file_path  # 個々の詳細設計書に対応する情報構造体
+        info_structure_file_path_merged = structure_entry.info_structure_file_path_merged  # ディレクトリ単位で集約
 
         context_file_path = ""
         if self.magic_info.magic_layer is MagicLayer.LAYER_6_CODEBASE_GEN:
@@ -85,21 +78,18 @@ class CodeBaseGenerator(BaseConverter):
             source_file_path = code_file_path
             target_file_path = code_base_file_path
             # context_file_path = self.magic_info.file_info.request_file_path
-            self.magic_info.grimoire_compiler = "dev_obj_file.md"
         elif self.magic_info.magic_layer is MagicLayer.LAYER_7_INFO_STRUCTURE_GEN:
             # MagicLayer.LAYER_7_INFO_STRUCTURE_GEN
             # 詳細設計書 => 情報構造体要素
             source_file_path = code_base_file_path
             target_file_path = info_structure_file_path
             # context_file_path = self.magic_info.file_info.request_file_path
-            self.magic_info.grimoire_compiler = "dev_info_structure.md"
         elif self.magic_info.magic_layer is MagicLayer.LAYER_8_INFO_STRUCTURE_GEN:
             # MagicLayer.LAYER_8_INFO_STRUCTURE_GEN
             # 情報構造体要素 => 情報構造体
             source_file_path = info_structure_file_path
             target_file_path = info_structure_file_path_merged
             # context_file_path = self.magic_info.file_info.request_file_path
-            self.magic_info.grimoire_compiler = "dev_info_structure_final.md"
         elif self.magic_info.magic_layer is MagicLayer.LAYER_9_CODE_GEN_FINAL:
             # MagicLayer.LAYER_9_CODE_GEN_FINAL
             # 情報構造体 => 最終コード（再作成）
@@ -108,9 +98,7 @@ class CodeBaseGenerator(BaseConverter):
             source_file_path = code_base_file_path
             target_file_path = code_file_path_final
             context_file_path = info_structure_file_path_merged
-            if code_file_path.endswith(".py"):
-                self.magic_info.grimoire_compiler = "dev_obj_final.md"
-            else:
+            if structure_entry.kind is not StructurePathKind.PYTHON:
                 return None
         elif self.magic_info.magic_layer is MagicLayer.LAYER_10_MD_GEN_FINAL:
             # MagicLayer.LAYER_10_MD_GEN_FINAL
@@ -120,9 +108,7 @@ class CodeBaseGenerator(BaseConverter):
             source_file_path = code_base_file_path
             target_file_path = code_file_path_final
             context_file_path = info_structure_file_path
-            if code_file_path.endswith(".md"):
-                self.magic_info.grimoire_compiler = "dev_markdown.md"
-            else:
+            if structure_entry.kind is not StructurePathKind.MARKDOWN:
                 return None
         else:
             # 呼ばれないはず
@@ -134,6 +120,16 @@ class CodeBaseGenerator(BaseConverter):
             source_file_path=source_file_path, target_file_path=target_file_path, context_file_path=context_file_path
         )
 
+    def get_grimoire_compiler(self) -> str:
+        grimoire_compiler_map = {
+            MagicLayer.LAYER_6_CODEBASE_GEN: "dev_obj_file.md",
+            MagicLayer.LAYER_7_INFO_STRUCTURE_GEN: "dev_info_structure.md",
+            MagicLayer.LAYER_8_INFO_STRUCTURE_GEN: "dev_info_structure_final.md",
+            MagicLayer.LAYER_9_CODE_GEN_FINAL: "dev_obj_final.md",
+            MagicLayer.LAYER_10_MD_GEN_FINAL: "dev_markdown.md",
+        }
+        return grimoire_compiler_map.get(self.magic_info.magic_layer, self.magic_info.grimoire_compiler)
+
     def convert(self) -> float:
         """コード => コードベース"""
         return self.convert_one()
@@ -0,0 +1,137 @@
+import contextlib
+import hashlib
+import os
+import pathlib
+import threading
+import time
+import uuid
+import weakref
+from typing import ClassVar
+
+from zoltraak import settings
+from zoltraak.utils.log_util import log, log_w
+
+
+class ContinuationUtil:
+    """max_tokensで途中終了した出力を続きのリクエストでつなげるためのユーティリティ"""
+
+    LENGTH_FINISH_REASONS = ("length", "max_tokens")
+    MIN_OVERLAP_CHARS = 10  # これ未満の一致は偶然とみなして重複除去しない
+    MAX_OVERLAP_CHARS = 1000
+    FENCE = "```"
+    CONTINUATION_ORDER = (
+        "出力がmax_tokensで途中終了しました。直前の出力の末尾の続きから出力してください。\n"
+        "・既に出力した内容は繰り返さないでください。\n"
+        "・前置きや説明、コードブロックの開始記号などは付けずに、続きの内容のみを出力してください。"
+    )
+
+    @staticmethod
+    def is_length_cut(finish_reason: str | None) -> bool:
+        return finish_reason in ContinuationUtil.LENGTH_FINISH_REASONS
+
+    @staticmethod
+    def create_continuation_messages(messages: list[dict], text: str) -> list[dict]:
+        """元の依頼 + これまでの出力の末尾(assistant) + 続きの依頼 のメッセージを作成する"""
+        tail = text[-settings.continuation_tail_chars :]
+        return [
+            *messages,
+            {"role": "assistant", "content": tail},
+            {"role": "user", "content": ContinuationUtil.CONTINUATION_ORDER},
+        ]
+
+    @staticmethod
+    def stitch(text: str, part: str) -> str:
+        """続きの出力をつなげる(末尾と先頭の重複やコードブロックの開き直しを除去)"""
+        if text.count(ContinuationUtil.FENCE) % 2 == 1 and part.lstrip().startswith(ContinuationUtil.FENCE):
+            # コードブロックの途中なのに開き直している場合は1行目を捨てる
+            part = part.lstrip().split("\n", 1)[1] if "\n" in part.lstrip() else ""
+
+        max_overlap = min(len(text), len(part), ContinuationUtil.MAX_OVERLAP_CHARS)
+        for overlap in range(max_overlap, ContinuationUtil.MIN_OVERLAP_CHARS - 1, -1):
+            if text.endswith(part[:overlap]):
+                log("続きの出力の重複を除去しました。overlap=%d", overlap)
+                return text + part[overlap:]
+        return text + part
+
+
+class ContinuationStore:
+    """途中までの出力を逐次ディスクに書き出しておき、中断後の再実行では続きから再開できるようにする
+
+    - .partファイルは呼び出しごとのgeneration_id(pid_乱数)付きで書く(同じプロンプトの同時実行で混ざらない)
+    - 再開するのは書き込んだ呼び出しが終了済みで、continuation_part_ttl_sec以内に更新された.partだけ
+    - 再開する.partはrenameで引き取る(1つの.partを複数の呼び出しが再開しない)、期限切れの.partは削除する
+    """
+
+    _active_stores: ClassVar[weakref.WeakValueDictionary] = weakref.WeakValueDictionary()  # 実行中の呼び出し
+    _lock = threading.Lock()
+
+    def __init__(self, model: str, messages: list[dict], generation_id: str = ""):
+        key_src = model + "\n" + "\n".join(str(message.get("content", "")) for message in messages)
+        self.key = hashlib.sha256(key_src.encode("utf-8")).hexdigest()[:16]
+        self.generation_id = generation_id or f"{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        self.part_dir = os.path.join(settings.cache_dir, "continuation")
+        self.part_file_path = os.path.join(self.part_dir, f"{self.key}.{self.generation_id}.part")
+        with ContinuationStore._lock:
+            ContinuationStore._active_stores[self.generation_id] = self
+
+    def load(self) -> str:
+        """同じプロンプトで中断した出力があれば引き取って返す"""
+        for part_path in sorted(pathlib.Path(self.part_dir).glob(f"{self.key}.*.part")):
+            part_file_path = str(part_path)
+            if part_file_path == self.part_file_path or not self.is_resumable(part_file_path):
+                continue
+            try:
+                os.replace(part_file_path, self.part_file_path)
+            except OSError:
+                continue  # 他の呼び出しが先に引き取った
+            with open(self.part_file_path, encoding="utf-8") as part_file:
+                text = part_file.read()
+            if text:
+                log_w("前回中断した出力の続きから再開します: %s (%d文字)", part_file_path, len(text))
+                return text
+        return ""
+
+    def is_resumable(self, part_file_path: str) -> bool:
+        try:
+            elapsed_sec = time.time() - os.path.getmtime(part_file_path)
+        except OSError:
+            return False
+        if elapsed_sec > settings.continuation_part_ttl_sec:
+            with contextlib.suppress(OSError):
+                os.remove(part_file_path)
+            log("期限切れの中断した出力を削除しました: %s", part_file_path)
+            return False
+
+        generation_id = os.path.basename(part_file_path)[len(self.key) + 1 : -len(".part")]
+        pid = generation_id.split("_", 1)[0]
+        if pid == str(os.getpid()):
+            with ContinuationStore._lock:
+                return generation_id not in ContinuationStore._active_stores
+        return pid.isdigit() and not ContinuationStore.is_process_alive(int(pid))
+
+    @staticmethod
+    def is_process_alive(pid: int) -> bool:
+        if os.name != "posix":
+            return True  # 生存確認できない場合は書き込み中とみなす(期限切れで削除される)
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def append(self, part: str) -> None:
+        os.makedirs(self.part_dir, exist_ok=True)
+        with open(self.part_file_path, "a", encoding="utf-8") as part_file:
+            part_file.write(part)
+
+    def clear(self) -> None:
+        if os.path.isfile(self.part_file_path):
+            os.remove(self.part_file_path)
+
+    def __str__(self) -> str:
+        return f"ContinuationStore({self.part_file_path})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
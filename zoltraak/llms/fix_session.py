@@ -0,0 +1,145 @@
+from zoltraak import settings
+from zoltraak.core.context_packer import ContextPacker
+from zoltraak.llms.litellm_api import LitellmApi, LitellmMetadata, LitellmParams
+from zoltraak.utils.code_validator import CodeValidator
+from zoltraak.utils.diff_util import DiffUtil
+from zoltraak.utils.log_util import log, log_w
+from zoltraak.utils.patch_engine import PatchEngine
+
+
+class FixSession:
+    """1ファイルのコード修正を1つの会話として続けるクラス
+
+    - 1ターン目だけコード全体を送り、2ターン目以降は新しいエラーと(LLMが知らない)コードの差分だけを送る
+    - LLMには修正箇所だけ(SEARCH/REPLACE)を出力させてPatchEngineでローカル適用する
+    - 会話の先頭(コード全体)はプレフィックスキャッシュの対象にする(anthropicはcache_controlで明示)
+    - 会話のトークン数が上限を超えたら、現在のコードで会話をやり直す
+    """
+
+    PROMPT_CACHE_MODEL_KEYWORDS = ("claude", "anthropic")  # cache_controlの明示が必要なモデル
+
+    def __init__(
+        self,
+        file_path: str,
+        litellm_api: LitellmApi | None = None,
+        model_name: str = settings.model_name,
+        max_tokens_budget: int = 0,
+    ):
+        self.file_path = file_path
+        self.litellm_api = litellm_api or LitellmApi()
+        self.model_name = model_name
+        self.max_tokens_budget = max_tokens_budget or settings.max_tokens_fix_session
+        self.messages: list[dict] = []
+        self.known_code = ""  # LLMが把握しているコード
+        self.turn_count = 0
+        self.reset_count = 0
+
+    def is_prompt_cache_model(self) -> bool:
+        return any(keyword in self.model_name.lower() for keyword in FixSession.PROMPT_CACHE_MODEL_KEYWORDS)
+
+    def get_session_tokens(self) -> int:
+        return sum(ContextPacker.estimate_tokens(FixSession.get_text(message)) for message in self.messages)
+
+    @staticmethod
+    def get_text(message: dict) -> str:
+        content = message.get("content", "")
+        if isinstance(content, list):
+            return "".join(part.get("text", "") for part in content)
+        return content
+
+    def reset(self) -> None:
+        if self.messages:
+            self.reset_count += 1
+            log("修正セッションをやり直します: %s (turn=%d)", self.file_path, self.turn_count)
+        self.messages = []
+        self.known_code = ""
+
+    def create_first_message(self, code: str, error_message: str, is_smart: bool) -> dict:  # noqa: FBT001
+        prompt = f"""以下のPythonコード({self.file_path})を実行するとエラーになります。エラーを解消してください。
+このあとも新しいエラーが出たら続けて依頼します。
+
+コード:
+{code}
+
+{FixSession.get_order(error_message, is_smart)}"""
+        if self.is_prompt_cache_model():
+            return {
+                "role": "user",
+                "content": [{"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}}],
+            }
+        return {"role": "user", "content": prompt}
+
+    def create_next_message(self, code: str, error_message: str, is_smart: bool) -> dict:  # noqa: FBT001
+        prompt = "修正を適用しましたが、まだエラーがあります。\n"
+        if code != self.known_code:
+            # LLMの修正以外でコードが変わった分(ローカル修復など)を伝える
+            prompt += f"\nあなたの修正以外のコードの変更差分:\n{DiffUtil.diff0(self.known_code, code)}\n"
+        prompt += "\n" + FixSession.get_order(error_message, is_smart)
+        return {"role": "user", "content": prompt}
+
+    @staticmethod
+    def get_order(error_message: str, is_smart: bool) -> str:  # noqa: FBT001
+        order = f"エラーメッセージ:\n{error_message}\n\n"
+        if is_smart:
+            order += "修正が難航しています。エラーの原因を1-2行で簡潔に分析してから修正してください。\n\n"
+        return order + PatchEngine.FORMAT_INSTRUCTION
+
+    def fix(self, code: str, error_message: str, is_smart: bool = False) -> str:  # noqa: FBT001
+        """エラーを解消したコードを返す(修正できなかった場合は元のコード)"""
+        if self.messages and self.get_session_tokens() > self.max_tokens_budget:
+            self.reset()
+        if self.messages:
+            message = self.create_next_message(code, error_message, is_smart)
+        else:
+            message = self.create_first_message(code, error_message, is_smart)
+        self.messages.append(message)
+        self.turn_count += 1
+
+        response = self.generate_response()
+        self.messages.append({"role": "assistant", "content": response})
+
+        fixed_code = self.apply_response(code, response)
+        self.known_code = fixed_code
+        log(
+            "修正セッション: %s turn=%d, tokens=%d, len(code)=%d",
+            self.file_path,
+            self.turn_count,
+            self.get_session_tokens(),
+            len(fixed_code),
+        )
+        return fixed_code
+
+    def apply_response(self, code: str, response: str) -> str:
+        hunks = PatchEngine.parse(response)
+        if not hunks:
+            # 編集形式でなくコード全体が返ってきた場合はそれを採用
+            full_code, _ = CodeValidator.repair(response)
+            if CodeValidator.get_syntax_error(full_code) is None and len(full_code) > len(code) // 2:
+                return full_code
+            log_w("修正が出力されませんでした: %s", self.file_path)
+            return code
+
+        patch_result = PatchEngine.apply(code, hunks)
+        if patch_result.failed_hunks:
+            # LLMの認識とコードがずれているので、次のターンはコード全体から会話をやり直す
+            log_w("修正の一部を適用できませんでした: %s 失敗=%d", self.file_path, len(patch_result.failed_hunks))
+            self.reset()
+        return patch_result.content
+
+    def generate_response(self) -> str:
+        litellm_metadata = LitellmMetadata.new(generation_name="fix_session")
+        litellm_params = LitellmParams.new(
+            prompt="",
+            model=self.model_name,
+            max_tokens=settings.max_tokens_generate_code_fix,
+            temperature=settings.temperature_generate_code_fix,
+            metadata=litellm_metadata,
+        )
+        litellm_params["messages"] = list(self.messages)
+        return self.litellm_api.generate_response(litellm_params)
+
+    def __str__(self) -> str:
+        return f"FixSession({self.file_path}, turn={self.turn_count}, reset={self.reset_count})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
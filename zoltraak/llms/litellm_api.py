@@ -9,6 +9,7 @@ import anyio
 from pydantic import BaseModel
 
 from zoltraak import settings
+from zoltraak.llms.continuation import ContinuationStore, ContinuationUtil
 from zoltraak.utils.file_util import FileUtil
 from zoltraak.utils.log_util import log, log_head, log_w
 
@@ -252,6 +253,35 @@ def generate_response_raw(
     return response_text
 
 
+async def generate_response_raw_async(
+    model: str,
+    prompt: str,
+    *,
+    max_tokens: int = 4000,
+    temperature: float = 0.0,
+    api_key: str = "",
+    metadata: LitellmMetadata = None,
+    response_format: type[BaseModel] | None = None,
+) -> str:
+    if metadata is None:
+        metadata = LitellmMetadata.new()
+
+    response = await litellm.acompletion(
+        model=model,
+        messages=[{"content": prompt, "role": "user"}],
+        max_tokens=max_tokens,
+        temperature=temperature,
+        api_key=api_key,
+        num_retries=5,  # times
+        cooldown_time=30,  # [s]
+        metadata=metadata,
+        response_format=response_format,
+    )
+    response_text = response.choices[0].message.content.strip()
+    log_head("response_text", response_text)
+    return response_text
+
+
 def show_used_total_tokens():
     return LitellmApi().show_stats()
 
@@ -443,7 +473,13 @@ class LitellmApi:
 
     def _validate_input(self, litellm_params: LitellmParams) -> bool:
         """Validate input parameters."""
-        prompt = litellm_params["messages"][0]["content"]
+        # 複数メッセージの会話やcache_control付きのcontent(list)の場合は全テキストで判定
+        prompt = ""
+        for message in litellm_params["messages"]:
+            content = message["content"]
+            if isinstance(content, list):
+                content = "".join(part.get("text", "") for part in content)
+            prompt += content
         max_tokens = litellm_params["max_tokens"]
 
         # skip empty
@@ -469,8 +505,22 @@ class LitellmApi:
     async def _generate_async(self, litellm_params: LitellmParams) -> str:
         """Handle async response generation."""
         router = self._get_router(litellm_params["model"])
-        response = await router.acompletion(**litellm_params)
-        return await anyio.to_thread.run_sync(self._process_response, response, litellm_params)
+        store = ContinuationStore(litellm_params["model"], litellm_params["messages"])
+        text = await anyio.to_thread.run_sync(store.load)
+        if not text:
+            response = await router.acompletion(**litellm_params)
+            if not self._is_length_cut(response):
+                return await anyio.to_thread.run_sync(self._process_response, response, litellm_params)
+            text = self._get_raw_content(response)
+            await anyio.to_thread.run_sync(store.append, text)
+
+        # max_tokensで途中終了した場合は続きをリクエストしてつなげる
+        for i in range(settings.max_continuations):
+            response = await router.acompletion(**self._create_continuation_params(litellm_params, text, i))
+            text = await anyio.to_thread.run_sync(self._stitch_part, store, text, self._get_raw_content(response))
+            if not self._is_length_cut(response):
+                break
+        return await anyio.to_thread.run_sync(self._finish_continuation, store, text)
 
     def _generate_sync(
         self,
@@ -479,8 +529,60 @@ class LitellmApi:
     ) -> str:
         """Handle sync response generation."""
         router = self._get_router(litellm_params["model"])
-        response = router.completion(**litellm_params)
-        return self._process_response(response=response, litellm_params=litellm_params, is_first_try=is_first_try)
+        store = ContinuationStore(litellm_params["model"], litellm_params["messages"])
+        text = store.load()
+        if not text:
+            response = router.completion(**litellm_params)
+            if not self._is_length_cut(response):
+                return self._process_response(
+                    response=response, litellm_params=litellm_params, is_first_try=is_first_try
+                )
+            text = self._get_raw_content(response)
+            store.append(text)
+
+        # max_tokensで途中終了した場合は続きをリクエストしてつなげる
+        for i in range(settings.max_continuations):
+            response = router.completion(**self._create_continuation_params(litellm_params, text, i))
+            text = self._stitch_part(store, text, self._get_raw_content(response))
+            if not self._is_length_cut(response):
+                break
+        return self._finish_continuation(store, text)
+
+    @staticmethod
+    def _is_length_cut(response: litellm.ModelResponse) -> bool:
+        if not response.choices:
+            return False
+        return ContinuationUtil.is_length_cut(response.choices[0].finish_reason)
+
+    @staticmethod
+    def _get_raw_content(response: litellm.ModelResponse) -> str:
+        """途中終了した出力は末尾の空白も意味を持つためstripせずに取り出す"""
+        if not response.choices or not response.choices[0].message:
+            return ""
+        return response.choices[0].message.content or ""
+
+    @staticmethod
+    def _create_continuation_params(litellm_params: LitellmParams, text: str, index: int) -> LitellmParams:
+        log_w("max_tokensで途中終了したため続きをリクエストします。(%d回目, %d文字)", index + 1, len(text))
+        continuation_params = litellm_params.copy()
+        continuation_params["messages"] = ContinuationUtil.create_continuation_messages(
+            litellm_params["messages"], text
+        )
+        continuation_params["metadata"] = {**litellm_params["metadata"], "generation_name": "continuation"}
+        return continuation_params
+
+    @staticmethod
+    def _stitch_part(store: ContinuationStore, text: str, part: str) -> str:
+        stitched_text = ContinuationUtil.stitch(text, part)
+        store.append(stitched_text[len(text) :])  # つないだ分を逐次ディスクに書き出す
+        return stitched_text
+
+    @staticmethod
+    def _finish_continuation(store: ContinuationStore, text: str) -> str:
+        store.clear()
+        response_text = text.strip()
+        log_head("response_text(continuation)", response_text, 1000)
+        return response_text
 
     def _process_response(
         self,
@@ -132,11 +132,15 @@ class ZoltraakParams(BaseModel):
     magic_layer: str = Field(default="", description="グリモアの起動レイヤ")
     magic_layer_end: str = Field(default="", description="グリモアの終了レイヤ")
     eternal_intent: str = Field(default="", description="全レイヤで共通不変の永続的な作業指示")
+    dry_run: bool = Field(default=False, description="クリーンアップで削除せずに削除対象を報告するだけにする")
 
     def get_zoltraak_command(self):
         cmd = "zoltraak"
         for field, value in self:
-            if value:
+            if isinstance(value, bool):
+                if value:
+                    cmd += f" --{field}"  # store_trueのフラグ
+            elif value:
                 cmd += f' --{field} "{value}"'
         print("get_zoltraak_command cmd=", cmd)
         return cmd
@@ -427,7 +431,11 @@ class MagicInfo(BaseModel):
 
     is_debug: bool = Field(default=True, description="デバッグモード(グリモア情報を逐次出力)")
     is_async: bool = Field(default=False, description="非同期モード(一部の同期処理をスキップする)")
+    is_dry_run: bool = Field(default=False, description="クリーンアップで削除せずに削除対象を報告するだけにする")
     score: float = Field(default=1.0, description="スコア(0.0:悪い、1.0:良い)")
+    context_pack_report: dict = Field(
+        default_factory=dict, description="ContextPackerの詰め込み結果(prompt_goal/prompt_finalごと、履歴用)"
+    )
 
     def update(self, **kwargs):
         for key, value in kwargs.items():
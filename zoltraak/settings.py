@@ -49,19 +49,31 @@ max_tokens_create_file_name = 100
 max_tokens_generate_md = 8000
 max_tokens_generate_code = 8000
 max_tokens_generate_code_fix = 8000
-max_tokens_generate_error_reason = 2000
 max_tokens_get_match_rate = 4000
 max_tokens_propose_diff = 4000
 max_tokens_apply_diff = 8000
 max_tokens_claude_haiku = 4000
 max_tokens_any = 4000  # その他の場合
+max_tokens_context_pack = int(os.getenv("MAX_TOKENS_CONTEXT_PACK", "100000"))  # プロンプトに詰め込むコンテキストの上限
+
+# map-reduce(コンテキストに入りきらない大きなソースを分割して要約してから使う)
+max_tokens_map_reduce_source = int(os.getenv("MAX_TOKENS_MAP_REDUCE_SOURCE", "60000"))  # 超えたらmap-reduce
+map_reduce_chunk_tokens = int(os.getenv("MAP_REDUCE_CHUNK_TOKENS", "8000"))  # 1チャンクのトークン数
+map_reduce_max_workers = int(os.getenv("MAP_REDUCE_MAX_WORKERS", "4"))  # チャンク処理の並列数
+
+# fix session(コード修正を1ファイル1会話で行い、2回目以降は新しいエラーと差分だけを送る)
+max_tokens_fix_session = int(os.getenv("MAX_TOKENS_FIX_SESSION", "60000"))  # 超えたら会話をやり直す
+
+# continuation(max_tokensで途中終了した出力を続きのリクエストでつなげる)
+max_continuations = int(os.getenv("MAX_CONTINUATIONS", "5"))  # 続きのリクエストの最大回数(0で無効)
+continuation_tail_chars = int(os.getenv("CONTINUATION_TAIL_CHARS", "2000"))  # 続きの文脈として渡す末尾の文字数
+continuation_part_ttl_sec = int(os.getenv("CONTINUATION_PART_TTL_SEC", "21600"))  # 中断した出力を再開する期限(秒)
 
 # temperature
 temperature_create_file_name = 0.0
 temperature_generate_md = 0.0
 temperature_generate_code = 0.0
 temperature_generate_code_fix = 0.0
-temperature_generate_error_reason = 0.0
 temperature_get_match_rate = 0.0
 temperature_propose_diff = 0.0
 temperature_apply_diff = 0.0
@@ -77,6 +89,59 @@ developer_dir = os.path.join(grimoires_dir, "developer")
 encryption_dir = os.path.join(grimoires_dir, "encryption")
 formatter_dir = os.path.join(grimoires_dir, "formatter")
 interpretspec_dir = os.path.join(grimoires_dir, "interpretspec")
+internal_dir = os.path.join(grimoires_dir, "internal")  # 内部処理用(コンパイラーとしては選択されない)
+
+# cache
+cache_dir = os.path.abspath(os.getenv("ZOLTRAAK_CACHE_DIR", ".zoltraak_cache"))  # 各種キャッシュの保存先
+
+# 依存関係の解析(LAYER_5_1)
+dependency_scan_max_workers = int(os.getenv("DEPENDENCY_SCAN_MAX_WORKERS", "4"))  # パースの並列数(プロセス数)
+llm_context_mode = os.getenv("LLM_CONTEXT_MODE", "symbols").lower()  # 関連ファイルの切り出し(full|signatures|symbols)
+max_tokens_llm_context = int(os.getenv("MAX_TOKENS_LLM_CONTEXT", "16000"))  # 依存関係から作るコンテキストの上限
+dependency_export_formats = os.getenv("DEPENDENCY_EXPORT_FORMATS", "dot").lower()  # 出力形式(dot,json,mmd,png,svg)
+dependency_render_max_nodes = int(os.getenv("DEPENDENCY_RENDER_MAX_NODES", "500"))  # 超えたら画像を作らない
+dependency_focus_radius = int(os.getenv("DEPENDENCY_FOCUS_RADIUS", "2"))  # ファイルを中心にした図に含める距離
+
+# watchモード(zoltraak watch)
+watch_debounce_sec = float(os.getenv("WATCH_DEBOUNCE_SEC", "1.0"))  # 変更が止まってから再生成するまでの秒数
+watch_poll_interval_sec = float(os.getenv("WATCH_POLL_INTERVAL_SEC", "1.0"))  # ポーリング時の確認間隔
+
+# grimoire search(SEARCH_GRIMOIREモード)
+grimoire_search_top_k = int(os.getenv("GRIMOIRE_SEARCH_TOP_K", "5"))  # LLMで再ランキングする候補数
+is_grimoire_search_rerank = os.getenv("IS_GRIMOIRE_SEARCH_RERANK", "False").lower() in ("true", "1", "t")
+
+# 生成の準備(prepare_generation)
+prepare_generation_max_workers = int(os.getenv("PREPARE_GENERATION_MAX_WORKERS", "8"))  # 準備処理の並列数
+
+# 不要ファイルのクリーンアップ(LAYER_11)
+file_remover_max_workers = int(os.getenv("FILE_REMOVER_MAX_WORKERS", "8"))  # ファイル削除の並列数
+
+# md展開(-p xx.mdなどでリンク先のmdを再帰的に読み込む場合の上限文字数)
+max_chars_md_expand = int(os.getenv("MAX_CHARS_MD_EXPAND", "200000"))
+
+# 既存ターゲットファイルの更新方式(edit: LLMに編集箇所だけ出力させてローカルで適用, full: 全文を再出力)
+update_mode = os.getenv("ZOLTRAAK_UPDATE_MODE", "edit").lower()
+# 全文書き換えするターゲットの上限(超える場合は中略せずにセクション/編集で部分更新する)
+max_tokens_rewrite_target = int(os.getenv("MAX_TOKENS_REWRITE_TARGET", "16000"))
+
+# mdターゲットの見出し単位の更新(影響するセクションだけを再生成して、それ以外はそのまま残す)
+is_section_update = os.getenv("IS_SECTION_UPDATE", "True").lower() in ("true", "1", "t")
+section_update_max_workers = int(os.getenv("SECTION_UPDATE_MAX_WORKERS", "4"))  # セクション再生成の並列数
+section_update_ratio_threshold = float(os.getenv("SECTION_UPDATE_RATIO_THRESHOLD", "0.5"))  # 超えたら全体更新
+
+# 評価ポリシー(off | sampled | tiered | all)
+eval_policy = os.getenv("ZOLTRAAK_EVAL_POLICY", "tiered").lower()
+eval_policy_layers = os.getenv(
+    "ZOLTRAAK_EVAL_POLICY_LAYERS", ""
+)  # レイヤー別の指定(例: 5_code_gen:all,11_clean_up:off)
+eval_sample_rate = float(os.getenv("ZOLTRAAK_EVAL_SAMPLE_RATE", "0.2"))  # sampledでLLM評価する割合
+is_background_eval = os.getenv("IS_BACKGROUND_EVAL", "True").lower() in ("true", "1", "t")  # 評価を待たずに進める
+eval_queue_max_workers = int(os.getenv("EVAL_QUEUE_MAX_WORKERS", "4"))  # バックグラウンド評価の並列数
+eval_rollback_threshold = float(os.getenv("EVAL_ROLLBACK_THRESHOLD", "0.5"))  # 未満なら前回の内容に戻す
+eval_requeue_max = int(os.getenv("EVAL_REQUEUE_MAX", "1"))  # ロールバックしたターゲットを同じ実行中に再生成する回数
+
+# prompt
+is_export_prompt_csv = os.getenv("IS_EXPORT_PROMPT_CSV", "True").lower() in ("true", "1", "t")  # 終了時にprompt.csv出力
 
 # mode
 is_debug = os.getenv("IS_DEBUG", "False").lower() in ("true", "1", "t")  # デバッグモード(例: IS_DEBUG=True)
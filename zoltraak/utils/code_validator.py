@@ -0,0 +1,240 @@
+import ast
+import builtins
+import importlib.util
+import keyword
+import os
+import pathlib
+import re
+from dataclasses import dataclass, field
+
+from zoltraak.utils.file_util import FileUtil
+from zoltraak.utils.log_util import log, log_w
+
+
+@dataclass
+class CodeDiagnostic:
+    line: int = 0
+    kind: str = ""  # syntax, undefined_name, unresolved_import
+    message: str = ""
+
+    def __str__(self) -> str:
+        return f"line {self.line}: [{self.kind}] {self.message}"
+
+
+@dataclass
+class ValidationResult:
+    code: str = ""  # ローカル修復後のコード
+    diagnostics: list[CodeDiagnostic] = field(default_factory=list)
+    repairs: list[str] = field(default_factory=list)
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.diagnostics
+
+    def get_error_message(self) -> str:
+        return "\n".join(str(diagnostic) for diagnostic in self.diagnostics)
+
+
+class CodeValidator:
+    """生成されたPythonコードを実行せずに検証するクラス
+
+    1. ローカルで直せるもの(コードブロック記号、前後の説明文、BOM、CRLF)を修復
+    2. ast.parse + compileで構文チェック
+    3. 未定義の名前をチェック(モジュール内のどこかで束縛されていればOKとする保守的な判定)
+    4. importを標準/インストール済みモジュールと生成済みモジュールのインデックスで解決
+    """
+
+    FENCE_PATTERN = re.compile(r"^```(?:python3?|py)?[ \t]*\n(.*?)(?:^```[ \t]*$|\Z)", re.MULTILINE | re.DOTALL)
+    CJK_PATTERN = re.compile(r"^[\u3000-\u30ff\u4e00-\u9fff\uff01-\uff5e]")  # 日本語で始まる行
+    CODE_CHAR_PATTERN = re.compile(r"[()\[\]{}=<>'\"`\\]")
+    MAX_PROSE_LINES = 10  # 前後から削る説明文の最大行数
+    IMPLICIT_NAMES = frozenset(
+        {"__file__", "__name__", "__doc__", "__builtins__", "__spec__", "__loader__", "__package__", "__path__"}
+    )
+
+    def __init__(self, module_index: set[str] | None = None):
+        self.module_index = module_index  # Noneならimportの解決はチェックしない
+
+    @staticmethod
+    def build_module_index(root_dir: str) -> set[str]:
+        """root_dir以下の.pyファイルのモジュール名(末尾一致で解決できるよう、全ての接尾辞)を返す"""
+        module_index: set[str] = set()
+        for dir_path, dir_names, file_names in os.walk(root_dir):
+            dir_names[:] = [name for name in dir_names if not name.startswith((".", "__pycache__"))]
+            rel_dir = os.path.relpath(dir_path, root_dir)
+            dir_parts = list(pathlib.Path(rel_dir).parts) if rel_dir != "." else []
+            for file_name in file_names:
+                if not file_name.endswith(".py"):
+                    continue
+                module_name = os.path.splitext(file_name)[0]
+                parts = dir_parts if module_name == "__init__" else [*dir_parts, module_name]
+                for i in range(len(parts)):
+                    for j in range(i + 1, len(parts) + 1):
+                        module_index.add(".".join(parts[i:j]))
+        return module_index
+
+    @staticmethod
+    def repair(code: str) -> tuple[str, list[str]]:
+        """ローカルで直せるものを修復する(構文エラーが消えない場合はコードを削らずにそのまま返す)"""
+        repairs = []
+        if code.startswith("\ufeff"):
+            code = code.lstrip("\ufeff")
+            repairs.append("BOMを削除")
+        if "\r\n" in code:
+            code = code.replace("\r\n", "\n")
+            repairs.append("改行コードをLFに統一")
+        if CodeValidator.get_syntax_error(code) is None:
+            return code, repairs  # docstring内の```などはコードの一部なので触らない
+
+        candidate = code
+        candidate_repairs = []
+        fence_match = CodeValidator.FENCE_PATTERN.search(candidate)
+        if fence_match:
+            candidate = fence_match.group(1).rstrip() + "\n"
+            candidate_repairs.append("コードブロック記号と外側の説明文を削除")
+
+        # 前後の明らかに説明文の行だけを削る
+        lines = candidate.rstrip("\n").split("\n")
+        head = 0
+        while head < min(CodeValidator.MAX_PROSE_LINES, len(lines)) and CodeValidator.is_prose_line(lines[head]):
+            head += 1
+        tail = 0
+        while tail < min(CodeValidator.MAX_PROSE_LINES, len(lines) - head) and CodeValidator.is_prose_line(
+            lines[len(lines) - 1 - tail]
+        ):
+            tail += 1
+        if head or tail:
+            candidate = "\n".join(lines[head : len(lines) - tail]).rstrip() + "\n"
+            candidate_repairs.append(f"前後の説明文を削除(先頭{head}行, 末尾{tail}行)")
+
+        if candidate.strip() and CodeValidator.get_syntax_error(candidate) is None:
+            return candidate, repairs + candidate_repairs
+        return code, repairs  # 構文エラーはsyntaxとして報告する(途中で切れたコードを削って直したことにしない)
+
+    @staticmethod
+    def is_prose_line(line: str) -> bool:
+        """明らかにPythonコードではない行か(空行、日本語の文、記号を含まない英文)"""
+        text = line.strip()
+        if not text:
+            return True
+        if text.startswith(("#", "@")) or "=" in text:
+            return False
+        if CodeValidator.CJK_PATTERN.match(text):
+            return True
+        if CodeValidator.CODE_CHAR_PATTERN.search(text):
+            return False
+        words = text.split()
+        is_keyword = keyword.iskeyword(words[0]) or keyword.issoftkeyword(words[0])
+        return len(words) > 1 and not is_keyword
+
+    @staticmethod
+    def get_syntax_error(code: str) -> SyntaxError | ValueError | None:
+        try:
+            compile(code, "<generated>", "exec")
+        except (SyntaxError, ValueError) as e:
+            return e
+        return None
+
+    @staticmethod
+    def get_bound_names(tree: ast.AST) -> set[str]:
+        bound_names = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+                bound_names.add(node.id)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                bound_names.add(node.name)
+            elif isinstance(node, ast.arg):
+                bound_names.add(node.arg)
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                bound_names.update((alias.asname or alias.name).split(".")[0] for alias in node.names)
+            elif isinstance(node, ast.ExceptHandler) and node.name:
+                bound_names.add(node.name)
+            elif isinstance(node, (ast.Global, ast.Nonlocal)):
+                bound_names.update(node.names)
+            elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name:
+                bound_names.add(node.name)
+            elif isinstance(node, ast.MatchMapping) and node.rest:
+                bound_names.add(node.rest)
+        return bound_names
+
+    @staticmethod
+    def check_names(tree: ast.AST) -> list[CodeDiagnostic]:
+        if any(
+            isinstance(node, ast.ImportFrom) and any(alias.name == "*" for alias in node.names)
+            for node in ast.walk(tree)
+        ):
+            return []  # import *がある場合は判定できない
+        known_names = CodeValidator.get_bound_names(tree) | set(dir(builtins)) | CodeValidator.IMPLICIT_NAMES
+        diagnostics = []
+        reported = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id not in known_names:
+                if node.id in reported:
+                    continue
+                reported.add(node.id)
+                diagnostics.append(CodeDiagnostic(node.lineno, "undefined_name", f"name '{node.id}' is not defined"))
+        return diagnostics
+
+    def is_resolvable(self, module_name: str) -> bool:
+        if module_name in self.module_index:
+            return True
+        top_name = module_name.partition(".")[0]
+        if top_name in self.module_index:
+            return True
+        try:
+            return importlib.util.find_spec(top_name) is not None
+        except (ImportError, ValueError):
+            return False
+
+    def check_imports(self, tree: ast.AST) -> list[CodeDiagnostic]:
+        if self.module_index is None:
+            return []
+        diagnostics = []
+        for node in ast.walk(tree):
+            module_names = []
+            if isinstance(node, ast.Import):
+                module_names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                module_names = [node.module]  # 相対importも生成済みモジュールの末尾一致で判定
+            diagnostics += [
+                CodeDiagnostic(node.lineno, "unresolved_import", f"No module named '{module_name}'")
+                for module_name in module_names
+                if not self.is_resolvable(module_name)
+            ]
+        return diagnostics
+
+    def validate(self, code: str) -> ValidationResult:
+        code, repairs = CodeValidator.repair(code)
+        result = ValidationResult(code=code, repairs=repairs)
+        syntax_error = CodeValidator.get_syntax_error(code)
+        if syntax_error is not None:
+            line = getattr(syntax_error, "lineno", 0) or 0
+            result.diagnostics.append(CodeDiagnostic(line, "syntax", str(syntax_error)))
+            return result
+
+        tree = ast.parse(code)
+        result.diagnostics += CodeValidator.check_names(tree)
+        result.diagnostics += self.check_imports(tree)
+        return result
+
+    @staticmethod
+    def validate_batch(file_paths: list[str], root_dir: str = "") -> dict[str, ValidationResult]:
+        """レイヤーの全pyファイルを1回で検証する(インデックスは1回だけ作る、修復できたものは書き戻す)"""
+        file_paths = [file_path for file_path in file_paths if file_path.endswith(".py") and os.path.isfile(file_path)]
+        if not file_paths:
+            return {}
+        if not root_dir:
+            root_dir = os.path.commonpath([os.path.dirname(os.path.abspath(file_path)) for file_path in file_paths])
+        validator = CodeValidator(CodeValidator.build_module_index(root_dir))
+
+        result_map = {}
+        for file_path in file_paths:
+            code = FileUtil.read_file(file_path)
+            result = validator.validate(code)
+            if result.repairs and result.code != code and CodeValidator.get_syntax_error(result.code) is None:
+                FileUtil.write_file(file_path, result.code)
+                log("ローカルで修復しました: %s %s", file_path, result.repairs)
+            if result.diagnostics:
+                log_w("静的検証NG: %s\n%s", file_path, result.get_error_message())
+            result_map[file_path] = result
+        return result_map
@@ -1,5 +1,4 @@
-import difflib
-
+from zoltraak.utils.line_diff import LineDiff
 from zoltraak.utils.log_util import log_head
 
 
@@ -11,15 +10,18 @@ class DiffUtil:
         if isinstance(content2, str):
             content2 = content2.split("\n")
 
-        diff_result = difflib.unified_diff(content1, content2, lineterm="", n=0)
-        diff_result_txt = "\n".join(diff_result)
+        diff_result_txt = LineDiff.unified_diff0(content1, content2)
         log_head("diff_result_txt", diff_result_txt)
         return diff_result_txt
 
     @staticmethod
     def is_same_ignore_space(content1: str, content2: str) -> bool:
-        diff_ignore_space = DiffUtil.diff0_ignore_space(content1, content2)
-        return diff_ignore_space == ""
+        return DiffUtil.get_normalized_digest(content1) == DiffUtil.get_normalized_digest(content2)
+
+    @staticmethod
+    def get_normalized_digest(content: str) -> str:
+        """空白・空行を無視した内容のsha256(is_same_ignore_spaceと同じ同一判定をdigest比較で行う)"""
+        return LineDiff.get_digest(LineDiff.normalize_lines(content))
 
     @staticmethod
     def is_contain_ignore_space(content1: str, content2: str) -> bool:
@@ -42,16 +44,15 @@ class DiffUtil:
 
     @staticmethod
     def diff0_ignore_space(content1: str, content2: str) -> str:
-        content1 = content1.strip()
-        content2 = content2.strip()
-        content1_ignored_list = DiffUtil.get_strip_space(content1)
-        content2_ignored_list = DiffUtil.get_strip_space(content2)
+        content1_ignored_list = LineDiff.normalize_lines(content1)
+        content2_ignored_list = LineDiff.normalize_lines(content2)
+        # 同一ならdiffを計算しない
+        if LineDiff.get_digest(content1_ignored_list) == LineDiff.get_digest(content2_ignored_list):
+            return ""
         return DiffUtil.diff0(content1_ignored_list, content2_ignored_list)
 
     @staticmethod
     def get_strip_space(content: str) -> list[str]:
-        content_lines = content.split("\n")
-        content_lines_strip_space_list = [line.strip() for line in content_lines]
-        content_lines_ignore_empty_list = [line for line in content_lines_strip_space_list if line != ""]
+        content_lines_ignore_empty_list = LineDiff.normalize_lines(content)
         log_head("get_strip_space", "\n".join(content_lines_ignore_empty_list))
         return content_lines_ignore_empty_list
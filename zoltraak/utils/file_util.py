@@ -1,11 +1,15 @@
 import datetime
+import hashlib
 import os
 import pathlib
 import re
 import shutil
 
 from zoltraak import settings
+from zoltraak.utils.grimoire_registry import GrimoireRegistry
 from zoltraak.utils.log_util import log, log_i
+from zoltraak.utils.md_expander import MdExpander
+from zoltraak.utils.structure_manifest import StructureManifest
 
 
 class FileUtil:
@@ -37,6 +41,18 @@ class FileUtil:
             log(f"ファイルの書き込みに失敗しました: {e}")
             return f"ファイルの書き込みに失敗しました: {e}"
 
+    @staticmethod
+    def write_file_if_changed(file_path: str, content: str) -> bool:
+        """内容のhashが変わった場合だけ書き込む(書き込んだらTrue、変わらなければmtimeも更新しない)"""
+        if os.path.isfile(file_path):
+            with open(file_path, "rb") as file:
+                old_hash = hashlib.sha256(file.read()).hexdigest()
+            if old_hash == hashlib.sha256(content.encode("utf-8")).hexdigest():
+                log("内容が同じため書き込みをスキップします: %s", file_path)
+                return False
+        FileUtil.write_file(file_path, content)
+        return True
+
     @staticmethod
     def read_grimoire(
         file_path: str,
@@ -47,19 +63,17 @@ class FileUtil:
         target_content: str = "",
         replace_map: dict[str, str] | None = None,
     ) -> str:
-        # TODO: PromptManager版に置き換える
-        # グリモアをpromptとlanguageとcontextをreplaceして読み込む
-        content = FileUtil.read_file(file_path)
-        content = content.replace("{prompt}", prompt)
-        content = content.replace("{language}", language)
-        content = content.replace("{requirements_content}", requirements_content)
-        content = content.replace("{source_content}", source_content)
-        content = content.replace("{target_content}", target_content)
-
-        # 変数を置換する
+        # グリモアをpromptとlanguageとcontextをreplaceして読み込む(置換はGrimoireRegistryに一本化)
+        replace_map_all = {
+            "prompt": prompt,
+            "language": language,
+            "requirements_content": requirements_content,
+            "source_content": source_content,
+            "target_content": target_content,
+        }
         if replace_map:
-            for key, value in replace_map.items():
-                content = content.replace(f"[{key}]", value)
+            replace_map_all.update(replace_map)
+        content = GrimoireRegistry.render(file_path, replace_map_all)
         log(f"read_grimoire content[:100]:\n {content[:100]}")
         return content
 
@@ -79,19 +93,9 @@ class FileUtil:
 
     @staticmethod
     def read_md_recursive(file_path: str) -> str:
-        """mdファイルを再帰的に読み込む"""
+        """mdファイルを再帰的に読み込む(循環リンクや既出のファイルは参照だけを書く)"""
         log("file_path=%s", file_path)
-        if os.path.isfile(file_path):
-            contents = FileUtil.read_file(file_path)
-            # contentsにxx.mdが含まれていたら再帰的に読み込む
-            md_links = re.findall(r"\[.*?\]\((.*?)\)", contents)
-            log("md_links=%s", md_links)
-            for md_link in md_links:
-                if md_link.endswith(".md"):
-                    linked_file_path = os.path.abspath(os.path.join(os.path.dirname(file_path), md_link))
-                    contents += f"\n\n{md_link}\n" + FileUtil.read_md_recursive(linked_file_path)
-            return contents
-        return ""
+        return MdExpander().expand(file_path)
 
     @staticmethod
     def read_structure_file_content(structure_file_path: str, base_dir: str, canonical_name: str) -> list[str]:
@@ -106,22 +110,13 @@ class FileUtil:
         戻り値:
             list[str]: ベースディレクトリに配置されるファイルの絶対パスのリスト。
         """
-        structure_file_content = FileUtil.read_file(structure_file_path)
-        file_path_list = []
-        for file_path_rel in structure_file_content.split("\n"):
-            log("check file_path_rel= %s", file_path_rel)
-            file_path = os.path.abspath(os.path.join(base_dir, file_path_rel))
-            if canonical_name not in file_path:
-                # canonical_nameが入ってない場合は付与
-                file_path = os.path.abspath(os.path.join(base_dir, canonical_name, file_path_rel))
-            if "```" not in file_path:
-                # plaintxtの囲み部分でなければ採用（チェック時に存在しなくても登録が必要）
-                file_path_list.append(file_path)
-                log("append file_path= %s", file_path)
-        return file_path_list
+        # パスとして不正な行は除外し、パース結果は内容のhash単位でキャッシュする(StructureManifest)
+        return StructureManifest.load(structure_file_path).get_file_paths(base_dir, canonical_name)
 
     @staticmethod
-    def read_affected_file_list_content(request_file_path: str, base_dir: str, canonical_name: str) -> list[str]:
+    def read_affected_file_list_content(
+        request_file_path: str, base_dir: str, canonical_name: str, request_file_content: str | None = None
+    ) -> list[str]:
         """
         ユーザ要求記述書の内容を読み込み、修正対象のファイルパスのリストを返します。
 
@@ -129,11 +124,13 @@ class FileUtil:
             request_file_path: ユーザ要求記述書のファイルパス。
             base_dir: 絶対パスに変換するときのベースディレクトリ。
             canonical_name: アウトプットファイルやフォルダを一意に識別するための正規名称
+            request_file_content: 読み込み済みのユーザ要求記述書の内容(Noneの場合はrequest_file_pathから読み込む)
 
         戻り値:
             list[str]: ベースディレクトリに配置されるファイルの絶対パスのリスト。
         """
-        request_file_content = FileUtil.read_file(request_file_path)
+        if request_file_content is None:
+            request_file_content = FileUtil.read_file(request_file_path)
 
         def get_file_path(line: str) -> str:
             file_path_rel = line.strip()
@@ -0,0 +1,158 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from collections.abc import Iterable
+
+from zoltraak.utils.log_util import log, log_w
+
+
+class FileWatcher:
+    """ファイルの変更を監視するクラス
+
+    - Linuxではinotify(ctypes経由)で監視対象ファイルの親ディレクトリを監視する
+    - inotifyが使えない環境ではmtimeとsizeのポーリングで監視する
+    - 変更が続いている間は待ち、debounce_sec静かになったらまとめて返す
+    """
+
+    # inotifyのイベント(linux/inotify.h)
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+    def __init__(
+        self,
+        file_paths: Iterable[str],
+        debounce_sec: float = 1.0,
+        poll_interval_sec: float = 1.0,
+        *,
+        is_polling: bool = False,
+    ):
+        self.debounce_sec = debounce_sec
+        self.poll_interval_sec = poll_interval_sec
+        self.file_paths: set[str] = set()
+        self._snapshot: dict[str, tuple[int, int] | None] = {}  # ポーリング用(path => (mtime_ns, size))
+        self._libc = None
+        self._inotify_fd = -1
+        self._watch_dirs: dict[int, str] = {}  # wd => ディレクトリ
+        if not is_polling:
+            self._init_inotify()
+        self.set_file_paths(file_paths)
+
+    @property
+    def is_polling(self) -> bool:
+        return self._inotify_fd < 0
+
+    def set_file_paths(self, file_paths: Iterable[str]) -> None:
+        """監視対象を更新する(inotifyでは新しい親ディレクトリだけ追加で監視する)"""
+        self.file_paths = {os.path.abspath(file_path) for file_path in file_paths}
+        self._snapshot = {file_path: FileWatcher._stat(file_path) for file_path in self.file_paths}
+        if self.is_polling:
+            return
+        watched_dirs = set(self._watch_dirs.values())
+        for dir_path in {os.path.dirname(file_path) for file_path in self.file_paths} - watched_dirs:
+            if not os.path.isdir(dir_path):
+                continue
+            wd = self._libc.inotify_add_watch(self._inotify_fd, os.fsencode(dir_path), FileWatcher.WATCH_MASK)
+            if wd < 0:
+                log_w("inotifyで監視できません: %s, errno=%d", dir_path, ctypes.get_errno())
+                continue
+            self._watch_dirs[wd] = dir_path
+
+    def wait_changes(self, timeout_sec: float | None = None) -> set[str]:
+        """変更されたファイルを返す(変更がなければtimeout_secまで待つ、Noneなら変更があるまで待つ)"""
+        changed_files: set[str] = set()
+        deadline = None if timeout_sec is None else time.monotonic() + timeout_sec
+        while True:
+            wait_sec = self.debounce_sec if changed_files else self.poll_interval_sec
+            new_changed_files = self._read_changes(wait_sec)
+            if new_changed_files:
+                changed_files |= new_changed_files
+                continue
+            if changed_files:
+                log("ファイルの変更を検知しました: %s", sorted(changed_files))
+                return changed_files
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+
+    def close(self) -> None:
+        if self._inotify_fd >= 0:
+            os.close(self._inotify_fd)
+            self._inotify_fd = -1
+            self._watch_dirs.clear()
+
+    def _init_inotify(self) -> None:
+        if not sys.platform.startswith("linux"):
+            return
+        try:
+            self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError) as e:
+            log_w("inotifyが使えないためポーリングで監視します: %s", e)
+            return
+        if fd < 0:
+            log_w("inotifyが使えないためポーリングで監視します: errno=%d", ctypes.get_errno())
+            return
+        self._inotify_fd = fd
+
+    def _read_changes(self, wait_sec: float) -> set[str]:
+        if self.is_polling:
+            time.sleep(wait_sec)
+            return self._read_changes_polling()
+        return self._read_changes_inotify(wait_sec)
+
+    def _read_changes_polling(self) -> set[str]:
+        changed_files = set()
+        for file_path, old_stat in self._snapshot.items():
+            new_stat = FileWatcher._stat(file_path)
+            if new_stat != old_stat:
+                self._snapshot[file_path] = new_stat
+                changed_files.add(file_path)
+        return changed_files
+
+    def _read_changes_inotify(self, wait_sec: float) -> set[str]:
+        readable, _, _ = select.select([self._inotify_fd], [], [], wait_sec)
+        if not readable:
+            return set()
+        try:
+            buffer = os.read(self._inotify_fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed_files = set()
+        offset = 0
+        while offset + FileWatcher.EVENT_HEADER.size <= len(buffer):
+            wd, _, _, name_len = FileWatcher.EVENT_HEADER.unpack_from(buffer, offset)
+            offset += FileWatcher.EVENT_HEADER.size
+            name = buffer[offset : offset + name_len].rstrip(b"\0")
+            offset += name_len
+            dir_path = self._watch_dirs.get(wd)
+            if not dir_path or not name:
+                continue
+            file_path = os.path.join(dir_path, os.fsdecode(name))
+            if file_path in self.file_paths:
+                changed_files.add(file_path)
+        return changed_files
+
+    @staticmethod
+    def _stat(file_path: str) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def __str__(self) -> str:
+        mode = "polling" if self.is_polling else "inotify"
+        return f"FileWatcher({mode}, files={len(self.file_paths)})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
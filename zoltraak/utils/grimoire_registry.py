@@ -0,0 +1,114 @@
+import os
+import pathlib
+import re
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from zoltraak.utils.log_util import log, log_w
+
+
+@dataclass
+class GrimoireTemplate:
+    """リテラルとプレースホルダに分解済みのグリモア
+
+    segments: (text, key)のリスト
+      - リテラル: key=""
+      - プレースホルダ: text=元の文字列({key}など)、key=変数名
+    """
+
+    file_path: str = ""
+    mtime_ns: int = 0
+    segments: list[tuple[str, str]] = field(default_factory=list)
+    placeholders: set[str] = field(default_factory=set)
+
+    def render(self, replace_map: dict[str, str] | None = None) -> str:
+        """プレースホルダを置換して1回のjoinで組み立てる(未指定のキーは元の文字列のまま)"""
+        replace_map = replace_map or {}
+        return "".join(replace_map.get(key, text) if key else text for text, key in self.segments)
+
+
+class GrimoireRegistry:
+    """グリモアの読み込みと名前解決をキャッシュするレジストリ
+
+    - テンプレートは(path, mtime_ns)単位でパースしてキャッシュする
+    - 名前解決(get_valid_markdown)は見つかった結果だけキャッシュする(後から作られるグリモアに対応するため)
+    """
+
+    # {{key}} / {key} / [key] の3形式
+    PLACEHOLDER_PATTERN = re.compile(r"{{(\w+)}}|{(\w+)}|\[(\w+)\]")
+
+    _template_map: dict[str, GrimoireTemplate] = {}  # noqa: RUF012
+    _resolved_map: dict[tuple[str, str, str], str] = {}  # noqa: RUF012
+    _lock = threading.Lock()
+
+    @staticmethod
+    def parse(content: str, file_path: str = "", mtime_ns: int = 0) -> GrimoireTemplate:
+        template = GrimoireTemplate(file_path=file_path, mtime_ns=mtime_ns)
+        pos = 0
+        for match in GrimoireRegistry.PLACEHOLDER_PATTERN.finditer(content):
+            if match.start() > pos:
+                template.segments.append((content[pos : match.start()], ""))
+            key = next(group for group in match.groups() if group is not None)
+            template.segments.append((match.group(0), key))
+            template.placeholders.add(key)
+            pos = match.end()
+        if pos < len(content):
+            template.segments.append((content[pos:], ""))
+        return template
+
+    @staticmethod
+    def load(file_path: str, known_keys: Iterable[str] | None = None) -> GrimoireTemplate:
+        """グリモアを読み込む(変更がなければキャッシュを返す)"""
+        file_path = os.path.abspath(file_path)
+        try:
+            mtime_ns = pathlib.Path(file_path).stat().st_mtime_ns
+        except OSError:
+            log_w("グリモアが見つかりません: %s", file_path)
+            return GrimoireTemplate(file_path=file_path)
+
+        with GrimoireRegistry._lock:
+            template = GrimoireRegistry._template_map.get(file_path)
+        if template and template.mtime_ns == mtime_ns:
+            return template
+
+        # FileUtil.read_fileと同じく行末の空白を除去して読み込む
+        with open(file_path, encoding="utf-8") as file:
+            content = "\n".join(line.rstrip() for line in file)
+        template = GrimoireRegistry.parse(content, file_path, mtime_ns)
+        log("グリモアをパースしました: %s (placeholders=%s)", file_path, sorted(template.placeholders))
+
+        # 未知のプレースホルダはロード時に1回だけ警告する(コード例の{}なども含むためエラーにはしない)
+        if known_keys is not None:
+            unknown_keys = template.placeholders - set(known_keys)
+            if unknown_keys:
+                log_w("グリモアに未知のプレースホルダがあります: %s %s", file_path, sorted(unknown_keys))
+
+        with GrimoireRegistry._lock:
+            GrimoireRegistry._template_map[file_path] = template
+        return template
+
+    @staticmethod
+    def render(file_path: str, replace_map: dict[str, str] | None = None) -> str:
+        replace_map = replace_map or {}
+        template = GrimoireRegistry.load(file_path, known_keys=replace_map.keys())
+        return template.render(replace_map)
+
+    @staticmethod
+    def get_resolved(markdown_candidate: str, additional_dir: str = "") -> str:
+        """解決済みの絶対パスを返す(未解決なら空文字)"""
+        key = (os.getcwd(), markdown_candidate, additional_dir)
+        with GrimoireRegistry._lock:
+            return GrimoireRegistry._resolved_map.get(key, "")
+
+    @staticmethod
+    def set_resolved(markdown_candidate: str, additional_dir: str, resolved: str) -> None:
+        key = (os.getcwd(), markdown_candidate, additional_dir)
+        with GrimoireRegistry._lock:
+            GrimoireRegistry._resolved_map[key] = resolved
+
+    @staticmethod
+    def clear() -> None:
+        with GrimoireRegistry._lock:
+            GrimoireRegistry._template_map.clear()
+            GrimoireRegistry._resolved_map.clear()
@@ -0,0 +1,201 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+
+from zoltraak import settings
+from zoltraak.utils.log_util import log, log_inout, log_w
+
+
+@dataclass
+class GrimoireDoc:
+    """インデックス済みのグリモア1件"""
+
+    category: str = ""  # compiler, developer, architect, formatter
+    mtime_ns: int = 0
+    size: int = 0
+    length: int = 0  # トークン数
+    tf: dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class GrimoireSearchResult:
+    file_path: str = ""
+    category: str = ""
+    score: float = 0.0
+
+
+class GrimoireIndex:
+    """グリモアのBM25インデックス(ローカルで高速に最適なグリモアを選ぶ)
+
+    - トークナイズ: 英数字は単語、日本語(かな・漢字)は文字bigram
+    - インデックスはcache_dirにJSONで保存し、(mtime, size)が変わったファイルだけ再作成する
+    """
+
+    INDEX_VERSION = 1
+    DEF_INDEX_FILE_NAME = "grimoire_index.json"
+    K1 = 1.5
+    B = 0.75
+
+    TOKEN_PATTERN = re.compile(r"[a-z0-9_]+|[\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff]+")
+    ASCII_PATTERN = re.compile(r"[a-z0-9_]+")
+
+    def __init__(self, index_file_path: str = "", grimoire_dir_map: dict[str, str] | None = None):
+        if not index_file_path:
+            index_file_path = os.path.join(settings.cache_dir, GrimoireIndex.DEF_INDEX_FILE_NAME)
+        if grimoire_dir_map is None:
+            grimoire_dir_map = {
+                "compiler": settings.compiler_dir,
+                "developer": settings.developer_dir,
+                "architect": settings.architects_dir,
+                "formatter": settings.formatter_dir,
+            }
+        self.index_file_path = index_file_path
+        self.grimoire_dir_map = grimoire_dir_map
+        self.doc_map: dict[str, GrimoireDoc] = {}
+        self.df: Counter = Counter()
+        self.avg_length = 0.0
+        self.load()
+
+    @staticmethod
+    def tokenize(text: str) -> list[str]:
+        tokens = []
+        for word in GrimoireIndex.TOKEN_PATTERN.findall(text.lower()):
+            if GrimoireIndex.ASCII_PATTERN.fullmatch(word) or len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i : i + 2] for i in range(len(word) - 1))
+        return tokens
+
+    def load(self) -> None:
+        if not os.path.isfile(self.index_file_path):
+            return
+        try:
+            with open(self.index_file_path, encoding="utf-8") as index_file:
+                index_data = json.load(index_file)
+            if index_data.get("version") != GrimoireIndex.INDEX_VERSION:
+                log("インデックスのバージョンが異なるため作り直します: %s", self.index_file_path)
+                return
+            self.doc_map = {path: GrimoireDoc(**doc) for path, doc in index_data.get("docs", {}).items()}
+        except (OSError, TypeError, json.JSONDecodeError) as e:
+            log_w("インデックスの読み込みに失敗しました: %s, %s", self.index_file_path, e)
+            self.doc_map = {}
+        self._update_stats()
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.index_file_path), exist_ok=True)
+        index_data = {
+            "version": GrimoireIndex.INDEX_VERSION,
+            "docs": {path: asdict(doc) for path, doc in self.doc_map.items()},
+        }
+        with open(self.index_file_path, "w", encoding="utf-8") as index_file:
+            json.dump(index_data, index_file, ensure_ascii=False)
+        log("インデックスを保存しました: %s (%d件)", self.index_file_path, len(self.doc_map))
+
+    @log_inout
+    def update(self) -> bool:
+        """グリモアフォルダを走査して差分だけインデックスに反映する(変更があればTrue)"""
+        current_paths = set()
+        is_changed = False
+        for category, grimoire_dir in self.grimoire_dir_map.items():
+            if not os.path.isdir(grimoire_dir):  # noqa: PTH112
+                continue
+            for entry in os.scandir(grimoire_dir):
+                if not entry.is_file() or not entry.name.endswith(".md"):
+                    continue
+                file_path = os.path.abspath(entry.path)
+                current_paths.add(file_path)
+                stat = entry.stat()
+                doc = self.doc_map.get(file_path)
+                if doc and doc.mtime_ns == stat.st_mtime_ns and doc.size == stat.st_size:
+                    continue
+
+                with open(file_path, encoding="utf-8", errors="ignore") as grimoire_file:
+                    tokens = GrimoireIndex.tokenize(entry.name[:-3] + "\n" + grimoire_file.read())
+                self.doc_map[file_path] = GrimoireDoc(
+                    category=category,
+                    mtime_ns=stat.st_mtime_ns,
+                    size=stat.st_size,
+                    length=len(tokens),
+                    tf=dict(Counter(tokens)),
+                )
+                is_changed = True
+
+        for removed_path in set(self.doc_map) - current_paths:
+            del self.doc_map[removed_path]
+            is_changed = True
+
+        if is_changed:
+            self._update_stats()
+            self.save()
+        return is_changed
+
+    def _update_stats(self) -> None:
+        self.df = Counter()
+        for doc in self.doc_map.values():
+            self.df.update(doc.tf.keys())
+        total_length = sum(doc.length for doc in self.doc_map.values())
+        self.avg_length = total_length / len(self.doc_map) if self.doc_map else 0.0
+
+    def search(
+        self, query: str, categories: tuple[str, ...] | None = None, top_k: int = 5
+    ) -> list[GrimoireSearchResult]:
+        """BM25でqueryに近いグリモアを上位top_k件返す(categories未指定なら全カテゴリ)"""
+        query_terms = set(GrimoireIndex.tokenize(query))
+        doc_count = len(self.doc_map)
+        if not query_terms or doc_count == 0:
+            return []
+
+        idf_map = {}
+        for term in query_terms:
+            df = self.df.get(term, 0)
+            if df:
+                idf_map[term] = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+
+        results = []
+        for file_path, doc in self.doc_map.items():
+            if categories is not None and doc.category not in categories:
+                continue
+            score = 0.0
+            length_norm = GrimoireIndex.K1 * (1 - GrimoireIndex.B + GrimoireIndex.B * doc.length / self.avg_length)
+            for term, idf in idf_map.items():
+                tf = doc.tf.get(term, 0)
+                if tf:
+                    score += idf * tf * (GrimoireIndex.K1 + 1) / (tf + length_norm)
+            if score > 0:
+                results.append(GrimoireSearchResult(file_path=file_path, category=doc.category, score=score))
+
+        results.sort(key=lambda result: result.score, reverse=True)
+        return results[:top_k]
+
+    @staticmethod
+    def rerank(
+        query: str, results: list[GrimoireSearchResult], generate_response_fn: Callable[[str], str]
+    ) -> list[GrimoireSearchResult]:
+        """上位候補だけをLLMで並べ替える(候補の先頭数行だけを渡す)"""
+        if len(results) <= 1:
+            return results
+
+        prompt = "以下のグリモアから、要求に最も適したものを1つ選び、番号だけを回答してください。\n\n"
+        for i, result in enumerate(results):
+            with open(result.file_path, encoding="utf-8", errors="ignore") as grimoire_file:
+                head = " ".join(grimoire_file.read().split("\n")[:3])
+            prompt += f"{i}: {os.path.basename(result.file_path)}\n```\n{head}\n```\n\n"
+        prompt += f"## 要求\n\n```\n{query}\n```\n"
+
+        response = generate_response_fn(prompt)
+        match = re.search(r"\d+", response)
+        if not match or int(match.group(0)) >= len(results):
+            log_w("再ランキングの回答が不正なためBM25の順位を使います: %s", response[:100])
+            return results
+        best_index = int(match.group(0))
+        return [results[best_index]] + [result for i, result in enumerate(results) if i != best_index]
+
+    def __str__(self) -> str:
+        return f"GrimoireIndex({self.index_file_path}, docs={len(self.doc_map)})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -1,6 +1,7 @@
 import os
 
 from zoltraak import settings
+from zoltraak.utils.grimoire_registry import GrimoireRegistry
 from zoltraak.utils.log_util import log
 
 
@@ -61,6 +62,17 @@ class GrimoireUtil:
             log("空文字")
             return ""
 
+        # 解決済みならキャッシュを返す
+        resolved = GrimoireRegistry.get_resolved(markdown_candidate, additional_dir)
+        if resolved:
+            return resolved
+        resolved = GrimoireUtil._resolve_markdown(markdown_candidate, additional_dir)
+        if resolved:
+            GrimoireRegistry.set_resolved(markdown_candidate, additional_dir, resolved)
+        return resolved
+
+    @staticmethod
+    def _resolve_markdown(markdown_candidate: str, additional_dir: str = "") -> str:
         # 拡張子".md"を準備して、以降はファイル存在チェックする
         if not markdown_candidate.endswith(".md"):
             markdown_candidate += ".md"
@@ -0,0 +1,256 @@
+import hashlib
+
+
+class LineDiff:
+    """行単位の高速diff
+
+    - 行を整数IDに置き換えてから比較する(文字列比較を1回のint比較にする)
+    - 同一判定は正規化した内容のsha256で行い、diffを計算しない
+    - diffはpatience diffで分割し、残りの区間を線形空間のMyers法(middle snakeによる分割統治)で求める
+    """
+
+    PATIENCE_MIN_LINES = 1000  # この行数(両方の合計)以上の区間だけpatience diffで分割する
+
+    @staticmethod
+    def normalize_lines(content: str) -> list[str]:
+        """前後の空白と空行を無視した行リスト"""
+        lines = [line.strip() for line in content.strip().split("\n")]
+        return [line for line in lines if line != ""]
+
+    @staticmethod
+    def get_digest(lines: list[str]) -> str:
+        return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def to_ids(lines1: list[str], lines2: list[str]) -> tuple[list[int], list[int]]:
+        """同じ行が同じIDになるように両方の行リストを整数IDに変換する"""
+        id_map: dict[str, int] = {}
+        ids1 = [id_map.setdefault(line, len(id_map)) for line in lines1]
+        ids2 = [id_map.setdefault(line, len(id_map)) for line in lines2]
+        return ids1, ids2
+
+    @staticmethod
+    def get_matching_blocks(a: list, b: list) -> list[tuple[int, int, int]]:  # noqa: C901
+        """一致ブロック(i, j, size)のリストを返す(difflibと同じく末尾に(len(a), len(b), 0)を付ける)
+
+        1. 共通の先頭/末尾を除く
+        2. 大きい区間は、両方に1回ずつだけ現れる行を最長増加部分列でアンカーにして分割する(patience diff)
+        3. アンカーがない区間は、相手側に存在しない行を除いてからMyers法で比較する
+        """
+        matches = []
+        stack = [(0, len(a), 0, len(b))]
+        while stack:
+            a0, a1, b0, b1 = stack.pop()
+
+            # 共通の先頭
+            start = a0
+            while a0 < a1 and b0 < b1 and a[a0] == b[b0]:
+                a0 += 1
+                b0 += 1
+            if a0 > start:
+                matches.append((start, b0 - (a0 - start), a0 - start))
+
+            # 共通の末尾
+            end = a1
+            while a0 < a1 and b0 < b1 and a[a1 - 1] == b[b1 - 1]:
+                a1 -= 1
+                b1 -= 1
+            if end > a1:
+                matches.append((a1, b1, end - a1))
+
+            if a0 == a1 or b0 == b1:
+                continue
+
+            # 小さい区間はMyers法だけで最小のdiffを求める(patienceは速いが最小とは限らない)
+            anchors = []
+            if (a1 - a0) + (b1 - b0) >= LineDiff.PATIENCE_MIN_LINES:
+                anchors = LineDiff._get_unique_anchors(a, a0, a1, b, b0, b1)
+            if not anchors:
+                matches.extend(LineDiff._get_myers_matches(a, a0, a1, b, b0, b1))
+                continue
+            prev_i, prev_j = a0, b0
+            for i, j in anchors:
+                stack.append((prev_i, i, prev_j, j))
+                matches.append((i, j, 1))
+                prev_i, prev_j = i + 1, j + 1
+            stack.append((prev_i, a1, prev_j, b1))
+
+        # 隣接するブロックを結合
+        matches.sort()
+        merged: list[tuple[int, int, int]] = []
+        for i, j, size in matches:
+            if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+                merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + size)
+            else:
+                merged.append((i, j, size))
+        merged.append((len(a), len(b), 0))
+        return merged
+
+    @staticmethod
+    def _get_unique_anchors(a: list, a0: int, a1: int, b: list, b0: int, b1: int) -> list[tuple[int, int]]:  # noqa: C901, PLR0912, PLR0917
+        """両方の区間に1回ずつだけ現れる行の対応(i, j)のうち、順序が保たれる最長の列を返す"""
+        count_map: dict[int, list[int]] = {}  # value => [aでの出現数, bでの出現数, aでの位置]
+        for i in range(a0, a1):
+            count = count_map.setdefault(a[i], [0, 0, i])
+            count[0] += 1
+        pairs = []
+        for j in range(b0, b1):
+            count = count_map.get(b[j])
+            if count is not None:
+                count[1] += 1
+        for j in range(b0, b1):
+            count = count_map.get(b[j])
+            if count is not None and count[0] == 1 and count[1] == 1:
+                pairs.append((count[2], j))
+        if not pairs:
+            return []
+
+        # pairsはjの昇順なので、iの最長増加部分列を求める(patience sorting)
+        pairs.sort()
+        tails: list[int] = []  # 長さk+1の増加列の末尾のpairsインデックス
+        prev_index = [-1] * len(pairs)
+        for index, (_, j) in enumerate(pairs):
+            lo, hi = 0, len(tails)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if pairs[tails[mid]][1] < j:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo > 0:
+                prev_index[index] = tails[lo - 1]
+            if lo == len(tails):
+                tails.append(index)
+            else:
+                tails[lo] = index
+        anchors = []
+        index = tails[-1]
+        while index >= 0:
+            anchors.append(pairs[index])
+            index = prev_index[index]
+        anchors.reverse()
+        return anchors
+
+    @staticmethod
+    def _get_myers_matches(a: list, a0: int, a1: int, b: list, b0: int, b1: int) -> list[tuple[int, int, int]]:  # noqa: PLR0917
+        """区間同士をMyers法で比較した一致ブロックを返す
+
+        相手側に存在しない行は必ず削除/追加になるので、除いてから比較する(LCSは変わらない)
+        """
+        b_values = set(b[b0:b1])
+        a_index = [i for i in range(a0, a1) if a[i] in b_values]
+        a_values = {a[i] for i in a_index}
+        b_index = [j for j in range(b0, b1) if b[j] in a_values]
+        a_filtered = [a[i] for i in a_index]
+        b_filtered = [b[j] for j in b_index]
+
+        matches = []
+        stack = [(0, len(a_filtered), 0, len(b_filtered))]
+        while stack:
+            x0, x1, y0, y1 = stack.pop()
+            while x0 < x1 and y0 < y1 and a_filtered[x0] == b_filtered[y0]:
+                matches.append((a_index[x0], b_index[y0], 1))
+                x0 += 1
+                y0 += 1
+            while x0 < x1 and y0 < y1 and a_filtered[x1 - 1] == b_filtered[y1 - 1]:
+                x1 -= 1
+                y1 -= 1
+                matches.append((a_index[x1], b_index[y1], 1))
+            if x0 == x1 or y0 == y1:
+                continue
+            snake_x0, snake_y0, snake_x1, snake_y1 = LineDiff._middle_snake(a_filtered, x0, x1, b_filtered, y0, y1)
+            matches.extend((a_index[x], b_index[snake_y0 + x - snake_x0], 1) for x in range(snake_x0, snake_x1))
+            stack.append((snake_x1, x1, snake_y1, y1))
+            stack.append((x0, snake_x0, y0, snake_y0))
+        return matches
+
+    @staticmethod
+    def _middle_snake(a: list, a0: int, a1: int, b: list, b0: int, b1: int) -> tuple[int, int, int, int]:  # noqa: PLR0917
+        """最短編集経路の中央にある一致区間(snake)を絶対座標(x0, y0, x1, y1)で返す"""
+        n = a1 - a0
+        m = b1 - b0
+        delta = n - m
+        is_odd = delta % 2 == 1
+        max_d = (n + m + 1) // 2
+        offset = max_d + 1
+        vf = [0] * (2 * offset + 1)  # 前方探索: 対角線k(x - y = k)で到達した最大のx
+        vb = [0] * (2 * offset + 1)  # 後方探索: 末尾から逆向きに見た座標で同上
+
+        for d in range(max_d + 1):
+            # 前方探索
+            for k in range(-d, d + 1, 2):
+                if k == -d or (k != d and vf[offset + k - 1] < vf[offset + k + 1]):
+                    x = vf[offset + k + 1]
+                else:
+                    x = vf[offset + k - 1] + 1
+                y = x - k
+                x_start, y_start = x, y
+                while x < n and y < m and a[a0 + x] == b[b0 + y]:
+                    x += 1
+                    y += 1
+                vf[offset + k] = x
+                k_reverse = delta - k
+                if is_odd and -(d - 1) <= k_reverse <= d - 1 and x + vb[offset + k_reverse] >= n:
+                    return a0 + x_start, b0 + y_start, a0 + x, b0 + y
+
+            # 後方探索(a, bを逆順に見て同じ処理)
+            for k in range(-d, d + 1, 2):
+                if k == -d or (k != d and vb[offset + k - 1] < vb[offset + k + 1]):
+                    x = vb[offset + k + 1]
+                else:
+                    x = vb[offset + k - 1] + 1
+                y = x - k
+                x_start, y_start = x, y
+                while x < n and y < m and a[a1 - 1 - x] == b[b1 - 1 - y]:
+                    x += 1
+                    y += 1
+                vb[offset + k] = x
+                k_forward = delta - k
+                if not is_odd and -d <= k_forward <= d and x + vf[offset + k_forward] >= n:
+                    return a1 - x, b1 - y, a1 - x_start, b1 - y_start
+
+        msg = "middle snakeが見つかりません"  # 到達しない
+        raise RuntimeError(msg)
+
+    @staticmethod
+    def get_opcodes(a: list, b: list) -> list[tuple[str, int, int, int, int]]:
+        """difflib.SequenceMatcher.get_opcodes()と同じ形式の編集操作を返す"""
+        opcodes = []
+        i = j = 0
+        for ai, bj, size in LineDiff.get_matching_blocks(a, b):
+            if i < ai and j < bj:
+                opcodes.append(("replace", i, ai, j, bj))
+            elif i < ai:
+                opcodes.append(("delete", i, ai, j, bj))
+            elif j < bj:
+                opcodes.append(("insert", i, ai, j, bj))
+            if size:
+                opcodes.append(("equal", ai, ai + size, bj, bj + size))
+            i, j = ai + size, bj + size
+        return opcodes
+
+    @staticmethod
+    def _format_range(start: int, stop: int) -> str:
+        # difflib._format_range_unifiedと同じ表記
+        beginning = start + 1
+        length = stop - start
+        if length == 1:
+            return str(beginning)
+        if not length:
+            beginning -= 1
+        return f"{beginning},{length}"
+
+    @staticmethod
+    def unified_diff0(lines1: list[str], lines2: list[str]) -> str:
+        """difflib.unified_diff(lines1, lines2, lineterm="", n=0)と同じ形式のdiff文字列"""
+        if lines1 == lines2:
+            return ""
+        ids1, ids2 = LineDiff.to_ids(lines1, lines2)
+        result = ["--- ", "+++ "]
+        for tag, i1, i2, j1, j2 in LineDiff.get_opcodes(ids1, ids2):
+            if tag == "equal":
+                continue
+            result.append(f"@@ -{LineDiff._format_range(i1, i2)} +{LineDiff._format_range(j1, j2)} @@")
+            result.extend("-" + line for line in lines1[i1:i2])
+            result.extend("+" + line for line in lines2[j1:j2])
+        return "\n".join(result)
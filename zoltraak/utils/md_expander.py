@@ -0,0 +1,107 @@
+import os
+import re
+from dataclasses import dataclass, field
+
+from zoltraak import settings
+from zoltraak.utils.log_util import log, log_w
+
+
+@dataclass
+class MdExpandNode:
+    """展開ツリーの1ノード"""
+
+    file_path: str = ""
+    link: str = ""  # 親ファイル内のリンク文字列
+    status: str = ""  # inlined, reference(既出), missing, truncated, skipped(上限超過)
+    children: list["MdExpandNode"] = field(default_factory=list)
+
+
+class MdExpander:
+    """mdファイルのリンクを辿って1つのテキストに展開するクラス
+
+    - 訪問済みのファイルは再度展開せず「既出」の参照だけを書く(循環リンクでも停止する)
+    - 各ファイルは1回だけ読み込む
+    - 展開後の合計文字数がmax_charsを超えたら以降は展開しない
+    """
+
+    MD_LINK_PATTERN = re.compile(r"\[.*?\]\((.*?)\)")
+
+    STATUS_INLINED = "inlined"
+    STATUS_REFERENCE = "reference"
+    STATUS_MISSING = "missing"
+    STATUS_TRUNCATED = "truncated"
+    STATUS_SKIPPED = "skipped"
+
+    def __init__(self, max_chars: int = 0):
+        self.max_chars = max_chars or settings.max_chars_md_expand
+        self.total_chars = 0
+        self.content_map: dict[str, str] = {}  # file_path => 内容(読み込みキャッシュ)
+        self.visited: set[str] = set()
+        self.root: MdExpandNode | None = None
+
+    def read(self, file_path: str) -> str:
+        if file_path not in self.content_map:
+            with open(file_path, encoding="utf-8") as file:
+                self.content_map[file_path] = "\n".join(line.rstrip() for line in file)
+        return self.content_map[file_path]
+
+    def expand(self, file_path: str) -> str:
+        file_path = os.path.abspath(file_path)
+        self.root = MdExpandNode(file_path=file_path, link=os.path.basename(file_path))
+        if not os.path.isfile(file_path):
+            self.root.status = MdExpander.STATUS_MISSING
+            return ""
+        contents = self._expand_node(self.root)
+        log("md展開ツリー:\n%s", self.format_tree())
+        return contents
+
+    def _expand_node(self, node: MdExpandNode) -> str:
+        self.visited.add(node.file_path)
+        contents = self.read(node.file_path)
+
+        # 上限を超える場合は先頭だけ残してリンクは辿らない
+        remain_chars = self.max_chars - self.total_chars
+        if len(contents) > remain_chars:
+            log_w("展開の上限(%d文字)を超えたため切り詰めます: %s", self.max_chars, node.file_path)
+            contents = contents[: max(0, remain_chars)] + "\n...(展開の上限により省略)..."
+            node.status = MdExpander.STATUS_TRUNCATED
+            self.total_chars = self.max_chars
+            return contents
+        node.status = MdExpander.STATUS_INLINED
+        self.total_chars += len(contents)
+
+        for md_link in MdExpander.MD_LINK_PATTERN.findall(self.read(node.file_path)):
+            if not md_link.endswith(".md"):
+                continue
+            linked_file_path = os.path.abspath(os.path.join(os.path.dirname(node.file_path), md_link))
+            child = MdExpandNode(file_path=linked_file_path, link=md_link)
+            node.children.append(child)
+
+            if self.total_chars >= self.max_chars:
+                child.status = MdExpander.STATUS_SKIPPED
+                continue
+            if linked_file_path in self.visited:
+                # 既に展開済み(または展開中=循環)なので参照だけ書く
+                child.status = MdExpander.STATUS_REFERENCE
+                contents += f"\n\n{md_link}\n(既出: {os.path.basename(linked_file_path)} を参照)"
+                continue
+            if not os.path.isfile(linked_file_path):
+                child.status = MdExpander.STATUS_MISSING
+                contents += f"\n\n{md_link}\n"
+                continue
+            contents += f"\n\n{md_link}\n" + self._expand_node(child)
+        return contents
+
+    def format_tree(self) -> str:
+        if self.root is None:
+            return ""
+        lines = []
+
+        def add_lines(node: MdExpandNode, depth: int) -> None:
+            lines.append(f"{'  ' * depth}- {node.link} ({node.status})")
+            for child in node.children:
+                add_lines(child, depth + 1)
+
+        add_lines(self.root, 0)
+        lines.append(f"total_chars={self.total_chars}, files={len(self.content_map)}")
+        return "\n".join(lines)
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass
+
+from zoltraak import settings
+from zoltraak.utils.grimoire_search import GrimoireIndex
+from zoltraak.utils.log_util import log, log_w
+
+
+@dataclass
+class MdSection:
+    """見出しで区切ったmdの1セクション(textは見出し行を含む元の文字列そのまま)"""
+
+    key: str = ""  # セクションの識別子(見出し文字列、重複時は#2などを付与、見出し前は空文字)
+    level: int = 0  # 見出しレベル(見出し前の部分は0)
+    text: str = ""
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.text.strip().encode("utf-8")).hexdigest()
+
+
+class MdSectionUtil:
+    """mdを見出し単位で分割・結合するユーティリティ(結合すると元の文字列に戻る)"""
+
+    HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+    FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+    DEF_MAX_LEVEL = 2  # この見出しレベル以下(#, ##)で分割する
+
+    @staticmethod
+    def split(content: str, max_level: int = DEF_MAX_LEVEL) -> list[MdSection]:
+        sections = [MdSection(key="", level=0, text="")]
+        key_count: dict[str, int] = {}
+        is_in_fence = False
+        for line in content.splitlines(keepends=True):
+            if MdSectionUtil.FENCE_PATTERN.match(line):
+                is_in_fence = not is_in_fence
+            heading_match = None if is_in_fence else MdSectionUtil.HEADING_PATTERN.match(line.rstrip("\n"))
+            if heading_match and len(heading_match.group(1)) <= max_level:
+                title = heading_match.group(2)
+                key_count[title] = key_count.get(title, 0) + 1
+                key = title if key_count[title] == 1 else f"{title}#{key_count[title]}"
+                sections.append(MdSection(key=key, level=len(heading_match.group(1)), text=line))
+                continue
+            sections[-1].text += line
+        if not sections[0].text:
+            sections.pop(0)
+        return sections
+
+    @staticmethod
+    def join(sections: list[MdSection]) -> str:
+        return "".join(section.text for section in sections)
+
+    @staticmethod
+    def get_changed_keys(old_sections: list[MdSection], new_sections: list[MdSection]) -> list[str]:
+        """内容が変わった(追加・削除を含む)セクションのkeyを返す"""
+        old_map = {section.key: section.digest for section in old_sections}
+        new_map = {section.key: section.digest for section in new_sections}
+        changed_keys = [key for key, digest in new_map.items() if old_map.get(key) != digest]
+        changed_keys += [key for key in old_map if key not in new_map]
+        return changed_keys
+
+    @staticmethod
+    def get_similarity(source_text: str, target_text: str) -> float:
+        """sourceのトークンのうちtargetに含まれる割合"""
+        source_tokens = set(GrimoireIndex.tokenize(source_text))
+        if not source_tokens:
+            return 0.0
+        target_tokens = set(GrimoireIndex.tokenize(target_text))
+        return len(source_tokens & target_tokens) / len(source_tokens)
+
+
+class MdSectionMap:
+    """ソースのセクション => 影響するターゲットのセクション の対応(cache_dirに保存して次回以降も使う)"""
+
+    SIMILARITY_THRESHOLD = 0.3  # これ以上のターゲットセクションは全て対応ありとする
+    SIMILARITY_MIN = 0.1  # しきい値以上がない場合も、最も近いものがこれ以上なら対応ありとする
+
+    def __init__(self, target_file_path: str):
+        self.target_file_path = os.path.abspath(target_file_path)
+        path_hash = hashlib.sha256(self.target_file_path.encode("utf-8")).hexdigest()[:16]
+        self.map_file_path = os.path.join(settings.cache_dir, "section_map", f"{path_hash}.json")
+        self.section_map: dict[str, list[str]] = {}
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.isfile(self.map_file_path):
+            return
+        try:
+            with open(self.map_file_path, encoding="utf-8") as map_file:
+                self.section_map = json.load(map_file).get("section_map", {})
+        except (OSError, json.JSONDecodeError) as e:
+            log_w("セクション対応の読み込みに失敗しました: %s, %s", self.map_file_path, e)
+            self.section_map = {}
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.map_file_path), exist_ok=True)
+        with open(self.map_file_path, "w", encoding="utf-8") as map_file:
+            json.dump(
+                {"target_file_path": self.target_file_path, "section_map": self.section_map},
+                map_file,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+    def get_target_keys(self, source_key: str, source_text: str, target_sections: list[MdSection]) -> list[str]:
+        """source_keyに対応するターゲットのセクションを返す(未登録なら類似度で推定して登録)"""
+        target_keys = {section.key for section in target_sections}
+        cached_keys = [key for key in self.section_map.get(source_key, []) if key in target_keys]
+        if cached_keys:
+            return cached_keys
+
+        scored = sorted(
+            ((MdSectionUtil.get_similarity(source_text, section.text), section.key) for section in target_sections),
+            reverse=True,
+        )
+        matched_keys = [key for score, key in scored if score >= MdSectionMap.SIMILARITY_THRESHOLD]
+        if not matched_keys and scored and scored[0][0] >= MdSectionMap.SIMILARITY_MIN:
+            matched_keys = [scored[0][1]]
+        log("セクション対応を推定しました: %s => %s", source_key, matched_keys)
+        if matched_keys:
+            self.section_map[source_key] = matched_keys
+        return matched_keys
@@ -0,0 +1,211 @@
+import difflib
+import re
+from dataclasses import dataclass, field
+
+from zoltraak.utils.log_util import log, log_w
+
+
+@dataclass
+class PatchHunk:
+    """置換1件(SEARCH/REPLACEブロックまたはunified diffのhunk)"""
+
+    search: str = ""
+    replace: str = ""
+    old_start: int = 0  # unified diffの元ファイルの開始行(1始まり、SEARCHが空の挿入で使う)
+    match_method: str = ""  # exact, ignore_space, fuzzy(適用できなかった場合は空文字)
+
+    def to_search_replace(self) -> str:
+        return (
+            f"{PatchEngine.SEARCH_MARKER}\n{self.search}\n"
+            f"{PatchEngine.DIVIDER_MARKER}\n{self.replace}\n{PatchEngine.REPLACE_MARKER}"
+        )
+
+
+@dataclass
+class PatchResult:
+    content: str = ""
+    applied_hunks: list[PatchHunk] = field(default_factory=list)
+    failed_hunks: list[PatchHunk] = field(default_factory=list)
+
+    @property
+    def is_success(self) -> bool:
+        return bool(self.applied_hunks) and not self.failed_hunks
+
+
+class PatchEngine:
+    """LLMが出力した編集(SEARCH/REPLACEブロック or unified diff)をローカルで適用するクラス
+
+    検索は 完全一致 => 空白無視の行一致 => 類似度(FUZZY_THRESHOLD以上)の行一致 の順に試す。
+    """
+
+    SEARCH_MARKER = "<<<<<<< SEARCH"
+    DIVIDER_MARKER = "======="
+    REPLACE_MARKER = ">>>>>>> REPLACE"
+    SEARCH_REPLACE_PATTERN = re.compile(
+        r"^<{5,9} SEARCH[^\n]*\n(.*?)^={5,9}[ \t]*\n(.*?)^>{5,9} REPLACE[^\n]*$", re.MULTILINE | re.DOTALL
+    )
+    HUNK_HEADER_PATTERN = re.compile(r"^@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@")
+
+    FUZZY_THRESHOLD = 0.85
+
+    # LLMに編集の出力形式を指示する文(プロンプトに埋め込む)
+    FORMAT_INSTRUCTION = f"""出力形式(厳守):
+変更が必要な箇所ごとに、次のブロックだけを出力してください。説明文やコードブロック記号は不要です。
+{SEARCH_MARKER}
+(現在の内容から変更箇所をそのままコピーした数行。前後1-2行を含め、ファイル内で一意になるようにする)
+{DIVIDER_MARKER}
+(変更後の内容)
+{REPLACE_MARKER}
+- SEARCHは現在の内容と一字一句同じにしてください。
+- 削除はREPLACEを空に、追加は直前の行をSEARCHに含めてREPLACEに追加行を書いてください。
+- 変更が不要な場合は何も出力しないでください。"""
+
+    @staticmethod
+    def parse(text: str) -> list[PatchHunk]:
+        """SEARCH/REPLACEブロック、なければunified diffのhunkを読み取る"""
+        hunks = [
+            PatchHunk(search=search.rstrip("\n"), replace=replace.rstrip("\n"))
+            for search, replace in PatchEngine.SEARCH_REPLACE_PATTERN.findall(text)
+        ]
+        if hunks:
+            return hunks
+        return PatchEngine.parse_unified_diff(text)
+
+    @staticmethod
+    def parse_unified_diff(text: str) -> list[PatchHunk]:
+        hunks = []
+        search_lines: list[str] = []
+        replace_lines: list[str] = []
+        old_start = -1  # -1: hunkの外
+
+        def flush() -> None:
+            PatchEngine.strip_trailing_blank_context(search_lines, replace_lines)
+            if old_start >= 0 and (search_lines != replace_lines):
+                hunks.append(
+                    PatchHunk(search="\n".join(search_lines), replace="\n".join(replace_lines), old_start=old_start)
+                )
+
+        for line in text.split("\n"):
+            header_match = PatchEngine.HUNK_HEADER_PATTERN.match(line)
+            if header_match:
+                flush()
+                old_start = int(header_match.group(1))
+                search_lines, replace_lines = [], []
+                continue
+            if old_start < 0 or line.startswith(("--- ", "+++ ", "```")):
+                continue
+            if line.startswith("-"):
+                search_lines.append(line[1:])
+            elif line.startswith("+"):
+                replace_lines.append(line[1:])
+            elif line.startswith(" ") or line == "":
+                search_lines.append(line[1:])
+                replace_lines.append(line[1:])
+            elif line.startswith("\\"):  # "\ No newline at end of file"
+                continue
+            else:
+                flush()
+                old_start = -1
+        flush()
+        return hunks
+
+    @staticmethod
+    def strip_trailing_blank_context(search_lines: list[str], replace_lines: list[str]) -> None:
+        """hunk末尾の空行のコンテキストを取り除く(差分末尾の改行で、ファイル末尾のhunkが一致しなくなるため)"""
+        while search_lines and replace_lines and search_lines[-1] == replace_lines[-1] == "":
+            search_lines.pop()
+            replace_lines.pop()
+
+    @staticmethod
+    def apply(content: str, hunks: list[PatchHunk]) -> PatchResult:
+        result = PatchResult(content=content)
+        for hunk in hunks:
+            patched = PatchEngine.apply_hunk(result.content, hunk)
+            if patched is None:
+                log_w("編集を適用できませんでした: search(先頭100文字)=%s", hunk.search[:100])
+                result.failed_hunks.append(hunk)
+                continue
+            result.content = patched
+            result.applied_hunks.append(hunk)
+        log("編集の適用結果: 成功=%d, 失敗=%d", len(result.applied_hunks), len(result.failed_hunks))
+        return result
+
+    @staticmethod
+    def apply_hunk(content: str, hunk: PatchHunk) -> str | None:
+        """1件適用した結果を返す(見つからなければNone)"""
+        lines = content.split("\n")
+
+        # SEARCHが空(文脈なしの追加)はunified diffの行番号に挿入する
+        if not hunk.search.strip():
+            if hunk.old_start <= 0 and not content.strip():
+                hunk.match_method = "exact"
+                return hunk.replace
+            if hunk.old_start <= 0 or hunk.old_start > len(lines):
+                return None
+            hunk.match_method = "line_number"
+            replace_lines = hunk.replace.split("\n")
+            return "\n".join([*lines[: hunk.old_start], *replace_lines, *lines[hunk.old_start :]])
+
+        # 1. 完全一致
+        if content.count(hunk.search) == 1:
+            hunk.match_method = "exact"
+            return content.replace(hunk.search, hunk.replace, 1)
+
+        # 2. 空白無視の行一致 / 3. 類似度の行一致
+        search_lines = hunk.search.split("\n")
+        start, match_method = PatchEngine.find_lines(lines, search_lines)
+        if start is None:
+            return None
+        hunk.match_method = match_method
+        replace_lines = hunk.replace.split("\n") if hunk.replace else []
+        return "\n".join([*lines[:start], *replace_lines, *lines[start + len(search_lines) :]])
+
+    @staticmethod
+    def find_lines(lines: list[str], search_lines: list[str]) -> tuple[int | None, str]:
+        """search_linesに一致する位置(行番号)と一致方法を探す(複数候補がある場合は曖昧なのでNone)"""
+        size = len(search_lines)
+        if size == 0 or size > len(lines):
+            return None, ""
+
+        # 空白無視
+        search_stripped = [line.strip() for line in search_lines]
+        lines_stripped = [line.strip() for line in lines]
+        candidates = [i for i in range(len(lines) - size + 1) if lines_stripped[i : i + size] == search_stripped]
+        if len(candidates) == 1:
+            return candidates[0], "ignore_space"
+        if len(candidates) > 1:
+            log_w("編集箇所が複数見つかったため適用しません: 候補数=%d", len(candidates))
+            return None, ""
+
+        # 類似度(最も近い候補がしきい値以上で、2位と差がある場合だけ採用)
+        search_text = "\n".join(search_stripped)
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        matcher.set_seq2(search_text)
+        scored = []
+        for i in range(len(lines) - size + 1):
+            matcher.set_seq1("\n".join(lines_stripped[i : i + size]))
+            if matcher.real_quick_ratio() < PatchEngine.FUZZY_THRESHOLD:
+                continue
+            if matcher.quick_ratio() < PatchEngine.FUZZY_THRESHOLD:
+                continue
+            scored.append((matcher.ratio(), i))
+        scored.sort(reverse=True)
+        if not scored or scored[0][0] < PatchEngine.FUZZY_THRESHOLD:
+            return None, ""
+        if len(scored) > 1 and scored[1][0] == scored[0][0]:
+            return None, ""
+        log("類似度で編集箇所を特定しました: ratio=%.2f, line=%d", scored[0][0], scored[0][1] + 1)
+        return scored[0][1], "fuzzy"
+
+    @staticmethod
+    def validate(content: str, file_path: str = "") -> bool:
+        """適用後の内容の簡易チェック(空でないこと、pyならコンパイルできること)"""
+        if not content.strip():
+            return False
+        if file_path.endswith(".py"):
+            try:
+                compile(content, file_path, "exec")
+            except SyntaxError as e:
+                log_w("編集後のコードが構文エラーです: %s", e)
+                return False
+        return True
@@ -0,0 +1,201 @@
+import hashlib
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import ClassVar
+
+from zoltraak.utils.log_util import log, log_w
+
+
+class StructurePathKind(str, Enum):
+    """ファイル構造定義書に書かれたファイルの種類"""
+
+    PYTHON = "py"
+    MARKDOWN = "md"
+    OTHER = "other"  # pyproject.tomlなど
+    NO_EXT = "no_ext"  # Dockerfileなど拡張子なし(コード生成の対象外)
+
+    @staticmethod
+    def from_path(file_path: str) -> "StructurePathKind":
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext == ".py":
+            return StructurePathKind.PYTHON
+        if ext == ".md":
+            return StructurePathKind.MARKDOWN
+        if ext:
+            return StructurePathKind.OTHER
+        return StructurePathKind.NO_EXT
+
+
+@dataclass(frozen=True)
+class StructureEntry:
+    """ファイル構造定義書の1ファイル(file_pathは絶対パス)と、そこから派生する成果物のパス"""
+
+    rel_path: str = ""  # ファイル構造定義書に書かれた相対パス(正規化済み)
+    file_path: str = ""
+    kind: StructurePathKind = StructurePathKind.OTHER
+
+    @property
+    def code_base_file_path(self) -> str:
+        """詳細設計書(もともと.mdだった場合は.md.md)"""
+        code_base_file_path = os.path.splitext(self.file_path)[0] + ".md"
+        if code_base_file_path == self.file_path:
+            code_base_file_path += ".md"
+        return code_base_file_path
+
+    @property
+    def requirement_file_path(self) -> str:
+        """ソースファイルに対する変更要求"""
+        return os.path.splitext(self.file_path)[0] + "_requirement.md"
+
+    @property
+    def info_structure_file_path(self) -> str:
+        """個々の詳細設計書に対応する情報構造体"""
+        return os.path.splitext(self.file_path)[0] + "_info_structure.md"
+
+    @property
+    def info_structure_file_path_merged(self) -> str:
+        """ディレクトリ単位で集約した情報構造体"""
+        return os.path.join(os.path.dirname(self.file_path), "info_structure.md")
+
+
+@dataclass
+class StructureManifestDiff:
+    """ファイル構造定義書の版の差分(相対パス)"""
+
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not self.added and not self.removed
+
+    def __str__(self) -> str:
+        return f"StructureManifestDiff(added={len(self.added)}, removed={len(self.removed)})"
+
+
+class StructureManifest:
+    """ファイル構造定義書(STRUCTURE.md)をパースしたファイルパスの一覧
+
+    - パス以外の行(見出し、説明文、コードブロックの囲み、フォルダ)は採用しない
+    - 「- 」や「├── 」などの先頭の記号、行末の「# コメント」は取り除く
+    - パース結果は内容のhash単位でキャッシュし、各レイヤで共有する
+    - 同じファイル構造定義書の前回の版との差分をログに出す
+    """
+
+    TREE_PREFIX_PATTERN = re.compile(r"^(?:[-*+]\s+|\d+\.\s+|[│├└─|`\s]+)+")
+    TRAILING_COMMENT_PATTERN = re.compile(r"(?:\s+#|\s+[-–—]\s|\s*:\s|\s*：).*$")  # "# 説明", " - 説明", ": 説明"
+    # 空白、制御文字、パスに使えない記号、日本語の句読点(説明文)を含まない要素を/でつないだもの
+    PATH_COMPONENT = r'[^\s/\\:*?"<>|\x00-\x1f\x7f。、]+'
+    PATH_PATTERN = re.compile(rf"^{PATH_COMPONENT}(?:/{PATH_COMPONENT})*$")
+    NO_EXT_FILE_NAMES: ClassVar[set[str]] = {"Dockerfile", "Makefile", "LICENSE", "Procfile", "Pipfile"}
+
+    _cache: ClassVar[dict[str, "StructureManifest"]] = {}  # 内容のhash => パース結果
+    _last_hash_map: ClassVar[dict[str, str]] = {}  # ファイル構造定義書のパス => 前回読み込んだ内容のhash
+    _cache_lock = threading.Lock()
+
+    def __init__(self, content: str = ""):
+        self.content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        self.rel_paths: list[str] = []
+        self.rejected_lines: list[str] = []
+        self._resolve_cache: dict[tuple[str, str], list[StructureEntry]] = {}
+        self._parse(content)
+
+    @staticmethod
+    def load(structure_file_path: str) -> "StructureManifest":
+        """ファイル構造定義書を読み込む(内容が同じなら前回のパース結果を返す)"""
+        content = ""
+        if os.path.isfile(structure_file_path):
+            with open(structure_file_path, encoding="utf-8") as f:
+                content = f.read()
+        manifest = StructureManifest.from_content(content)
+
+        structure_file_path = os.path.abspath(structure_file_path)
+        with StructureManifest._cache_lock:
+            last_hash = StructureManifest._last_hash_map.get(structure_file_path)
+            StructureManifest._last_hash_map[structure_file_path] = manifest.content_hash
+            last_manifest = StructureManifest._cache.get(last_hash)
+        if last_manifest is not None and last_manifest is not manifest:
+            diff = last_manifest.diff(manifest)
+            log("ファイル構造定義書が更新されました: %s, %s", structure_file_path, diff)
+        return manifest
+
+    @staticmethod
+    def from_content(content: str) -> "StructureManifest":
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        with StructureManifest._cache_lock:
+            if content_hash in StructureManifest._cache:
+                return StructureManifest._cache[content_hash]
+        manifest = StructureManifest(content)
+        with StructureManifest._cache_lock:
+            return StructureManifest._cache.setdefault(content_hash, manifest)
+
+    @staticmethod
+    def parse_line(line: str) -> str:
+        """1行をパスとして正規化する(パスでなければ空文字列)"""
+        text = StructureManifest.TREE_PREFIX_PATTERN.sub("", line.strip())
+        text = StructureManifest.TRAILING_COMMENT_PATTERN.sub("", text).strip().strip("`")
+        text = text.replace("\\", "/")
+        while text.startswith("./"):
+            text = text[2:]
+        if not text or text.endswith(("/", ".")) or not StructureManifest.PATH_PATTERN.match(text):
+            return ""
+        file_name = text.rsplit("/", 1)[-1]
+        if (
+            "/" not in text
+            and not os.path.splitext(file_name)[1]
+            and not file_name.startswith(".")
+            and file_name not in StructureManifest.NO_EXT_FILE_NAMES
+        ):
+            return ""  # 拡張子もフォルダもない単語は説明文とみなす
+        if any(part in (".", "..") for part in text.split("/")):
+            return ""  # ルート外を指すパスは採用しない
+        return text
+
+    def resolve(self, base_dir: str, canonical_name: str) -> list[StructureEntry]:
+        """base_dirに配置するファイルのリスト(canonical_nameが含まれない場合は付与する)"""
+        cache_key = (base_dir, canonical_name)
+        if cache_key not in self._resolve_cache:
+            entries = []
+            for rel_path in self.rel_paths:
+                file_path = os.path.abspath(os.path.join(base_dir, rel_path))
+                if canonical_name not in file_path:
+                    file_path = os.path.abspath(os.path.join(base_dir, canonical_name, rel_path))
+                entries.append(StructureEntry(rel_path, file_path, StructurePathKind.from_path(rel_path)))
+            self._resolve_cache[cache_key] = entries
+        return self._resolve_cache[cache_key]
+
+    def get_file_paths(self, base_dir: str, canonical_name: str) -> list[str]:
+        return [entry.file_path for entry in self.resolve(base_dir, canonical_name)]
+
+    def diff(self, new_manifest: "StructureManifest") -> StructureManifestDiff:
+        """この版からnew_manifestへの差分"""
+        old_paths = set(self.rel_paths)
+        new_paths = set(new_manifest.rel_paths)
+        return StructureManifestDiff(added=sorted(new_paths - old_paths), removed=sorted(old_paths - new_paths))
+
+    def _parse(self, content: str) -> None:
+        rel_path_set = set()
+        for line in content.split("\n"):
+            if not line.strip() or line.strip().startswith("```"):
+                continue
+            rel_path = StructureManifest.parse_line(line)
+            if not rel_path:
+                self.rejected_lines.append(line.strip())
+                continue
+            if rel_path not in rel_path_set:
+                rel_path_set.add(rel_path)
+                self.rel_paths.append(rel_path)
+        if self.rejected_lines:
+            log_w(
+                "ファイル構造定義書のパス以外の行を無視しました: %d行 %s",
+                len(self.rejected_lines),
+                self.rejected_lines[:5],
+            )
+
+    def __str__(self) -> str:
+        return f"StructureManifest(files={len(self.rel_paths)}, rejected={len(self.rejected_lines)})"
+
+    def __repr__(self) -> str:
+        return self.__str__()